@@ -0,0 +1,118 @@
+"""
+Benchmark calculate_allergen_exposure against the previous per-allergen loop.
+
+The previous implementation ran a full `isin` scan and mask copy for each
+allergen; the current one does a single grouped max over foods and fans out
+through FOOD_ALLERGEN_INDEX.
+
+Usage:
+    uv run python benchmarks/bench_allergen_exposure.py [rows ...]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.allergen_service import (
+    ALLERGEN_FOOD_MAP,
+    FOOD_ALLERGEN_INDEX,
+    calculate_allergen_exposure,
+    local_today,
+)
+
+DEFAULT_ROWS = [10_000, 100_000, 500_000, 1_000_000]
+NON_ALLERGEN_FOODS = [
+    "banana",
+    "avocado",
+    "sweet potato",
+    "oatmeal",
+    "apple sauce",
+    "broccoli",
+    "blueberries",
+    "chicken",
+    "rice",
+    "pear",
+]
+
+
+def legacy_calculate_allergen_exposure(df: pd.DataFrame) -> list[dict]:
+    """The per-allergen scan this benchmark compares against."""
+    today = local_today()
+    allergen_data = []
+
+    for allergen, foods in ALLERGEN_FOOD_MAP.items():
+        foods_lower = [f.lower() for f in foods]
+        mask = df["food"].isin(foods_lower)
+        matching_entries = df[mask]
+
+        if matching_entries.empty:
+            last_exposure_date = None
+            days_since = None
+        else:
+            last_exposure_date = matching_entries["datetime"].max().date()
+            days_since = (today - last_exposure_date).days
+
+        allergen_data.append(
+            {
+                "name": allergen,
+                "days_since_exposure": days_since,
+                "last_exposure_date": last_exposure_date.isoformat()
+                if last_exposure_date
+                else None,
+                "foods": foods,
+            }
+        )
+
+    allergen_data.sort(
+        key=lambda x: (x["days_since_exposure"] is None, x["days_since_exposure"] or 0),
+        reverse=True,
+    )
+    return allergen_data
+
+
+def make_food_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build a (datetime, food) frame shaped like process_solid_food_data output."""
+    rng = random.Random(seed)
+    vocabulary = list(FOOD_ALLERGEN_INDEX) + NON_ALLERGEN_FOODS
+    start = pd.Timestamp("2020-01-01", tz="US/Eastern")
+    offsets = sorted(rng.randrange(0, 6 * 365 * 24 * 3600) for _ in range(rows))
+    return pd.DataFrame(
+        {
+            "datetime": start + pd.to_timedelta(offsets, unit="s"),
+            "food": [rng.choice(vocabulary) for _ in range(rows)],
+        }
+    )
+
+
+def best_of(fn, df: pd.DataFrame, repeat: int = 5) -> float:
+    """Return the fastest of several timed runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(df)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'rows':>10} {'legacy ms':>10} {'indexed ms':>11} {'speedup':>8}")
+    for rows in sizes:
+        df = make_food_frame(rows)
+        if calculate_allergen_exposure(df) != legacy_calculate_allergen_exposure(df):
+            raise SystemExit(f"Result mismatch at {rows} rows")
+
+        legacy = best_of(legacy_calculate_allergen_exposure, df)
+        indexed = best_of(calculate_allergen_exposure, df)
+        print(
+            f"{rows:>10} {legacy * 1000:>10.1f} {indexed * 1000:>11.1f} "
+            f"{legacy / indexed:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS)
@@ -0,0 +1,91 @@
+"""
+Compare Firestore reads of the previous and current feed fetch.
+
+The previous fetch streamed every interval document with all fields, then ran
+a second, sequential query for `multi` batch documents. The current one runs
+both queries concurrently, filters regular documents to solids on the server
+and projects only the fields the pipeline reads. Both are run against the
+counting fake Firestore client, checked to yield the same solid food entries,
+and compared by documents read, bytes read and wall time.
+
+Documents and bytes are the meaningful comparison: against the fake, the
+current fetch's wall time also includes the projection that Firestore would
+do server-side, and no network time is saved.
+
+Usage:
+    uv run python benchmarks/bench_fetch.py [entries ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from devtools.fake_firestore import FakeFirestore
+from devtools.feed_generator import generate_feed_documents
+from services.huckleberry import (
+    expand_interval_document,
+    extract_solid_food_entries,
+    get_intervals_ref,
+    iter_feed_intervals,
+)
+
+DEFAULT_ENTRIES = [10_000, 100_000]
+CHILD_UID = "bench-child"
+
+
+def previous_fetch_all_feed_intervals(client, child_uid: str) -> list[tuple[str, dict]]:
+    """The fetch as it was before server-side filtering and projection."""
+    intervals_ref = get_intervals_ref(client, child_uid)
+
+    regular_intervals = []
+    for doc in intervals_ref.order_by("start", direction="DESCENDING").stream():
+        data = doc.to_dict()
+        if not data.get("multi"):
+            regular_intervals.append((doc.id, data))
+
+    batched_entries = []
+    for doc in intervals_ref.where("multi", "==", True).stream():
+        batched_entries.extend(expand_interval_document(doc.id, doc.to_dict()))
+
+    return regular_intervals + batched_entries
+
+
+def run(client: FakeFirestore, fetch) -> tuple[list[dict], dict, float]:
+    """Time fetch(client, CHILD_UID) through extraction, with the client's read stats."""
+    client.reset_stats()
+    started = time.perf_counter()
+    solid_entries = extract_solid_food_entries(fetch(client, CHILD_UID))
+    elapsed = time.perf_counter() - started
+    return solid_entries, client.stats(), elapsed
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'entries':>8} {'fetch':>9} {'docs':>8} {'MiB':>8} {'ms':>9}")
+    for count in sizes:
+        client = FakeFirestore()
+        client.load_feed(CHILD_UID, generate_feed_documents(count))
+
+        before = run(client, previous_fetch_all_feed_intervals)
+        after = run(client, iter_feed_intervals)
+        # Projection drops fields the pipeline never reads, so compare the rest
+        if [(e["start"], e["foods"]) for e in before[0]] != [
+            (e["start"], e["foods"]) for e in after[0]
+        ]:
+            raise SystemExit("Solid food entries differ between fetches")
+
+        for label, (_, stats, elapsed) in (("previous", before), ("current", after)):
+            print(
+                f"{count:>8} {label:>9} {stats['documents']:>8} "
+                f"{stats['bytes'] / 2**20:>8.2f} {elapsed * 1000:>9.1f}"
+            )
+        print(
+            f"{'':>8} {'saved':>9} "
+            f"{1 - after[1]['documents'] / before[1]['documents']:>8.0%} "
+            f"{1 - after[1]['bytes'] / before[1]['bytes']:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_ENTRIES)
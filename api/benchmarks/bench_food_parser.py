@@ -0,0 +1,102 @@
+"""
+Check parity between the python and pandas parser engines, then time both.
+
+Parity is checked on several synthetic histories, including entries with no
+foods, foods without a created_name, mixed-case names and fractional
+timestamps. Each case must produce the same (datetime, food) rows and the same
+allergen results from both engines; tests/test_food_parser.py covers the
+same contract, plus malformed entries and multi batch documents.
+
+Usage:
+    uv run python benchmarks/bench_food_parser.py [entries ...]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.allergen_service import (
+    FOOD_ALLERGEN_INDEX,
+    LOCAL_TIMEZONE,
+    calculate_allergen_exposure,
+    parse_solid_food_data,
+)
+
+DEFAULT_ENTRIES = [10_000, 100_000, 300_000]
+EXTRA_FOODS = ["Banana", "avocado", "Sweet Potato", "oatmeal", "pear"]
+
+
+def make_entries(count: int, seed: int = 0, messy: bool = False) -> list[dict]:
+    """Build raw solid food entries shaped like extract_solid_food_entries output."""
+    rng = random.Random(seed)
+    vocabulary = [f.title() for f in FOOD_ALLERGEN_INDEX] + EXTRA_FOODS
+    entries = []
+    for i in range(count):
+        start = 1_600_000_000 + i * 3_600
+        if messy and rng.random() < 0.3:
+            start += rng.random()
+
+        foods = {}
+        for n in range(rng.choice([0, 1, 1, 2, 3]) if messy else rng.randint(1, 3)):
+            food = {"created_name": rng.choice(vocabulary), "amount": "some"}
+            if messy and rng.random() < 0.05:
+                del food["created_name"]
+            foods[f"food{n}"] = food
+
+        entries.append({"mode": "solids", "start": start, "foods": foods})
+    entries.reverse()
+    return entries
+
+
+def check_parity(entries: list[dict]) -> None:
+    events = parse_solid_food_data(entries, engine="python")
+    df = parse_solid_food_data(entries, engine="pandas")
+    expected = df.dropna(subset=["food"]).reset_index(drop=True)
+    actual = events.to_dataframe(LOCAL_TIMEZONE)
+
+    if not actual.equals(expected) or list(actual.dtypes) != list(expected.dtypes):
+        raise SystemExit(f"Row mismatch:\n{actual.head()}\n{expected.head()}")
+    for match_mode in ("exact", "keyword"):
+        expected_allergens = calculate_allergen_exposure(df, match_mode)
+        if calculate_allergen_exposure(events, match_mode) != expected_allergens:
+            raise SystemExit(f"Allergen mismatch in {match_mode} mode")
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    """Return the fastest of several timed runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(sizes: list[int]) -> None:
+    for seed in range(5):
+        check_parity(make_entries(2_000, seed=seed))
+        check_parity(make_entries(2_000, seed=seed, messy=True))
+    print("Parity: python and pandas engines agree")
+
+    print(f"{'entries':>10} {'pandas ms':>10} {'python ms':>10} {'speedup':>8}")
+    for count in sizes:
+        entries = make_entries(count)
+
+        def run(engine, entries=entries):
+            return lambda: calculate_allergen_exposure(
+                parse_solid_food_data(entries, engine)
+            )
+
+        pandas_time = best_of(run("pandas"))
+        python_time = best_of(run("python"))
+        print(
+            f"{count:>10} {pandas_time * 1000:>10.1f} {python_time * 1000:>10.1f} "
+            f"{pandas_time / python_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_ENTRIES)
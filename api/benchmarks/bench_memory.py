@@ -0,0 +1,120 @@
+"""
+Compare the memory of the DataFrame and compact FoodEvents representations.
+
+The same synthetic solid food entries are parsed by process_solid_food_data
+(a DataFrame of timestamps and food name objects) and parse_food_events
+(float64 epoch seconds, uint32 interned food ids and a small vocabulary).
+For each, the script reports the peak memory traced while it was built, the
+memory held by the result once built, and the time taken to build it and to
+calculate allergen exposure from it. The FoodEvents table is then written
+to a mappable file and mapped back, which holds only the vocabulary on the
+heap.
+
+Usage:
+    uv run python benchmarks/bench_memory.py [entries]
+"""
+
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from cache.event_store import map_food_events, write_food_events
+from devtools.feed_generator import generate_feed_documents
+from services.allergen_service import (
+    calculate_allergen_exposure,
+    process_solid_food_data,
+)
+from services.food_events import parse_food_events
+from services.huckleberry import (
+    expand_interval_document,
+    extract_solid_food_entries,
+)
+
+DEFAULT_ENTRIES = 500_000
+
+
+def build(fn, *args) -> tuple[object, float, float, float]:
+    """
+    Return fn(*args), seconds taken, peak traced MiB and MiB still held.
+
+    Tracing slows allocation down, so the time comes from a separate
+    untraced run.
+    """
+    elapsed = timed(fn, *args)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn(*args)
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 2**20, held / 2**20
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main(count: int) -> None:
+    # Every generated entry is a solid, so `count` entries are compared
+    solid_entries = extract_solid_food_entries(
+        entry
+        for doc_id, data in generate_feed_documents(count, solids_fraction=1.0)
+        for entry in expand_interval_document(doc_id, data)
+    )
+    print(f"{len(solid_entries)} solid food entries")
+
+    df, df_seconds, df_peak, df_held = build(process_solid_food_data, solid_entries)
+    df_bytes = df.memory_usage(deep=True).sum() / 2**20
+    df_calculate = timed(calculate_allergen_exposure, df)
+    rows = len(df)
+    del df
+
+    events, ev_seconds, ev_peak, ev_held = build(parse_food_events, solid_entries)
+    ev_bytes = events.nbytes / 2**20
+    ev_calculate = timed(calculate_allergen_exposure, events)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "food_events.bin"
+        write_seconds = timed(write_food_events, events, path)
+        mapped, map_seconds, map_peak, map_held = build(map_food_events, path)
+        map_calculate = timed(calculate_allergen_exposure, mapped)
+        file_mib = path.stat().st_size / 2**20
+        if calculate_allergen_exposure(mapped) != calculate_allergen_exposure(events):
+            raise SystemExit("Mapped events give different results")
+        del mapped
+
+    print(f"{rows} food events, {len(events.foods)} distinct foods\n")
+    print(
+        f"{'representation':<22} {'build ms':>9} {'peak MiB':>9} {'held MiB':>9} "
+        f"{'size MiB':>9} {'calc ms':>9}"
+    )
+    for name, seconds, peak, held, size, calculate in (
+        ("DataFrame", df_seconds, df_peak, df_held, df_bytes, df_calculate),
+        ("FoodEvents", ev_seconds, ev_peak, ev_held, ev_bytes, ev_calculate),
+        (
+            "FoodEvents (mapped)",
+            map_seconds,
+            map_peak,
+            map_held,
+            file_mib,
+            map_calculate,
+        ),
+    ):
+        print(
+            f"{name:<22} {seconds * 1000:>9.1f} {peak:>9.1f} {held:>9.1f} "
+            f"{size:>9.1f} {calculate * 1000:>9.1f}"
+        )
+    print(f"\nDataFrame holds {df_held / ev_held:.0f}x the memory of FoodEvents")
+    print(f"Writing the mappable file took {write_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ENTRIES)
@@ -0,0 +1,263 @@
+"""
+Time and memory-profile the ingestion and computation pipeline on synthetic data.
+
+Feed histories come from devtools.feed_generator (regular documents, `multi`
+batch documents, non-solid feeds and multi-food entries) and are served by
+the in-process devtools.fake_firestore client, so the whole pipeline runs
+offline:
+
+    fetch_all_feed_intervals -> extract_solid_food_entries
+        -> process_solid_food_data / parse_solid_food_data
+        -> calculate_allergen_exposure
+
+ConnectionManager.broadcast is timed separately, from the call until every
+connected client has been handed the message.
+
+Each stage reports the best of --repeat timed runs and, from one further run
+under tracemalloc, its peak allocated memory. Results are compared with the
+saved baseline, and stages slower than --threshold times the baseline are
+reported as regressions (exit status 1). Pass --save to record the run as the
+new baseline.
+
+Usage:
+    uv run python benchmarks/bench_pipeline.py [entries ...] [--save]
+    uv run python benchmarks/bench_pipeline.py 1000000 --repeat 1
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from devtools.fake_firestore import FakeFirestore
+from devtools.feed_generator import count_entries, generate_feed_documents
+from services.allergen_service import (
+    calculate_allergen_exposure,
+    parse_solid_food_data,
+    process_solid_food_data,
+)
+from services.huckleberry import (
+    expand_interval_document,
+    extract_solid_food_entries,
+    fetch_all_feed_intervals,
+)
+from websocket.connection_manager import ConnectionManager
+
+DEFAULT_ENTRIES = [1_000, 10_000, 100_000]
+DEFAULT_CLIENTS = [10, 100, 1_000]
+BASELINE_FILE = Path(__file__).resolve().parent / "results" / "baseline.json"
+CHILD_UID = "bench-child"
+# Slowdowns smaller than this are timer noise, whatever their ratio
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def measure(fn, repeat: int) -> dict:
+    """Return the best wall time of `repeat` runs and the peak traced memory of one."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(timings), "peak_mib": peak / 2**20}
+
+
+def bench_pipeline(count: int, repeat: int) -> dict[str, dict]:
+    """Benchmark each pipeline stage on a synthetic history of `count` entries."""
+    documents = generate_feed_documents(count)
+    client = FakeFirestore()
+    client.load_feed(CHILD_UID, documents)
+    counts = count_entries(documents)
+    print(
+        f"  {counts['entries']} entries in {counts['documents']} documents "
+        f"({counts['multi_documents']} multi), {counts['solids']} solids"
+    )
+    del documents
+
+    all_entries = fetch_all_feed_intervals(client, CHILD_UID)
+    solid_entries = extract_solid_food_entries(all_entries)
+    df = process_solid_food_data(solid_entries)
+    events = parse_solid_food_data(solid_entries, engine="python")
+
+    stages = {
+        "fetch_all_feed_intervals": lambda: fetch_all_feed_intervals(client, CHILD_UID),
+        "fetch_all_feed_intervals[solids]": lambda: fetch_all_feed_intervals(
+            client, CHILD_UID, solids_only=True
+        ),
+        "extract_solid_food_entries": lambda: extract_solid_food_entries(all_entries),
+        "process_solid_food_data": lambda: process_solid_food_data(solid_entries),
+        "parse_solid_food_data[python]": lambda: parse_solid_food_data(
+            solid_entries, engine="python"
+        ),
+        "calculate_allergen_exposure[pandas]": lambda: calculate_allergen_exposure(df),
+        "calculate_allergen_exposure[python]": lambda: calculate_allergen_exposure(
+            events
+        ),
+    }
+    return {name: measure(fn, repeat) for name, fn in stages.items()}
+
+
+class _SinkWebSocket:
+    """WebSocket stand-in that counts delivered messages."""
+
+    def __init__(self, delivered: asyncio.Queue):
+        self._delivered = delivered
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        self._delivered.put_nowait(len(message))
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+def bench_broadcast(clients: int, repeat: int) -> dict:
+    """Benchmark ConnectionManager.broadcast of an allergen snapshot to `clients` sockets."""
+    all_entries = [
+        entry
+        for doc_id, data in generate_feed_documents(2_000)
+        for entry in expand_interval_document(doc_id, data)
+    ]
+    allergens = calculate_allergen_exposure(
+        parse_solid_food_data(extract_solid_food_entries(all_entries))
+    )
+    message = {
+        "type": "snapshot",
+        "version": 1,
+        "allergens": allergens,
+        "last_updated": datetime.now(timezone.utc).isoformat(),
+    }
+
+    async def run() -> dict:
+        manager = ConnectionManager()
+        manager.set_event_loop(asyncio.get_running_loop())
+        delivered: asyncio.Queue = asyncio.Queue()
+        for _ in range(clients):
+            await manager.connect(_SinkWebSocket(delivered))
+
+        async def broadcast_once():
+            await manager.broadcast(message)
+            for _ in range(clients):
+                await delivered.get()
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await broadcast_once()
+            timings.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            await broadcast_once()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        for websocket in list(manager._clients):
+            manager.disconnect(websocket)
+        return {"seconds": min(timings), "peak_mib": peak / 2**20}
+
+    return asyncio.run(run())
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print each result next to its baseline and return the regressed stages."""
+    regressions = []
+    print(
+        f"\n{'stage':<38} {'size':>8} {'ms':>10} {'base ms':>10} {'ratio':>6} {'MiB':>8}"
+    )
+    for stage, by_size in results.items():
+        for size, result in by_size.items():
+            base = baseline.get(stage, {}).get(size)
+            ms = result["seconds"] * 1000
+            if base is None:
+                print(
+                    f"{stage:<38} {size:>8} {ms:>10.2f} {'-':>10} {'-':>6} "
+                    f"{result['peak_mib']:>8.1f}"
+                )
+                continue
+
+            ratio = result["seconds"] / base["seconds"]
+            slower = result["seconds"] - base["seconds"] > MIN_REGRESSION_SECONDS
+            flag = "  REGRESSION" if ratio > threshold and slower else ""
+            print(
+                f"{stage:<38} {size:>8} {ms:>10.2f} {base['seconds'] * 1000:>10.2f} "
+                f"{ratio:>5.2f}x {result['peak_mib']:>8.1f}{flag}"
+            )
+            if flag:
+                regressions.append(f"{stage} @ {size}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("entries", nargs="*", type=int, default=DEFAULT_ENTRIES)
+    parser.add_argument("--clients", nargs="*", type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--save", action="store_true", help="save as the new baseline")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, dict]] = {}
+    for count in args.entries:
+        print(f"Pipeline with {count} entries")
+        for stage, result in bench_pipeline(count, args.repeat).items():
+            results.setdefault(stage, {})[str(count)] = result
+    for clients in args.clients:
+        print(f"Broadcast to {clients} clients")
+        results.setdefault("ConnectionManager.broadcast", {})[str(clients)] = (
+            bench_broadcast(clients, args.repeat)
+        )
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "recorded": datetime.now(timezone.utc).isoformat(
+                        timespec="seconds"
+                    ),
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "pandas": pd.__version__,
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"\nSaved baseline to {args.baseline}")
+    elif regressions:
+        raise SystemExit(
+            f"\n{len(regressions)} regression(s): {', '.join(regressions)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
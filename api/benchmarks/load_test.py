@@ -0,0 +1,313 @@
+"""
+End-to-end load test of the API fed by the local fake data source.
+
+Starts the API under uvicorn with DATA_SOURCE=fake, a synthetic history of
+--entries feed entries, --events-per-second new feeds logged while it runs,
+and a throwaway CACHE_DIR (or targets an already running server with --url).
+Then --clients concurrent /ws/allergens clients and --pollers /api/allergens
+pollers run for --duration seconds, and the script reports:
+
+- update-to-client latency: from the server publishing an update (the
+  diff's last_updated) until each WebSocket client has received it
+- WebSocket throughput: diffs delivered per second, and clients dropped
+- poll latency and requests per second, with the share answered
+  304 Not Modified through If-None-Match
+
+Latencies compare the server's clock with this script's, so --url must be
+a server on the same host.
+
+Usage:
+    uv run python benchmarks/load_test.py --clients 2000 --pollers 200
+    uv run python benchmarks/load_test.py --workers 4 --events-per-second 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+import websockets
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+STARTUP_TIMEOUT = 120.0
+# Connections opened at once while clients are connecting
+CONNECT_CONCURRENCY = 200
+
+
+class Results:
+    """Samples recorded during the measurement window."""
+
+    def __init__(self):
+        self.window_start: float | None = None
+        self.update_latencies: list[float] = []
+        self.versions: set[int] = set()
+        self.connected = 0
+        self.connect_failures = 0
+        self.dropped = 0
+        self.poll_latencies: list[float] = []
+        self.poll_statuses: dict[int, int] = {}
+        self.poll_errors = 0
+
+    def measuring(self) -> bool:
+        return self.window_start is not None
+
+
+async def websocket_client(
+    url: str, results: Results, connects: asyncio.Semaphore, stop: asyncio.Event
+):
+    """Receive updates until stopped, recording the latency of each diff."""
+    try:
+        async with connects:
+            ws = await websockets.connect(url, open_timeout=60, max_size=None)
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException):
+        results.connect_failures += 1
+        return
+
+    results.connected += 1
+    try:
+        async with ws:
+            while not stop.is_set():
+                receiving = asyncio.ensure_future(ws.recv())
+                stopping = asyncio.ensure_future(stop.wait())
+                done, _ = await asyncio.wait(
+                    {receiving, stopping}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if receiving not in done:
+                    receiving.cancel()
+                    break
+                stopping.cancel()
+
+                received = time.time()
+                message = json.loads(receiving.result())
+                if message["type"] != "diff" or not results.measuring():
+                    continue
+                published = datetime.fromisoformat(message["last_updated"]).timestamp()
+                results.update_latencies.append(received - published)
+                results.versions.add(message["version"])
+    except websockets.ConnectionClosed:
+        if not stop.is_set():
+            results.dropped += 1
+
+
+async def poller(
+    client: httpx.AsyncClient,
+    url: str,
+    interval: float,
+    results: Results,
+    stop: asyncio.Event,
+):
+    """Poll like the dashboard does, revalidating with the last ETag."""
+    etag = None
+    # Spread pollers over the interval instead of firing them in lockstep
+    await asyncio.sleep(np.random.uniform(0, interval))
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            headers = {"If-None-Match": etag} if etag else {}
+            response = await client.get(url, headers=headers)
+        except httpx.HTTPError:
+            results.poll_errors += 1
+        else:
+            etag = response.headers.get("etag", etag)
+            if results.measuring():
+                results.poll_latencies.append(time.perf_counter() - started)
+                status = response.status_code
+                results.poll_statuses[status] = results.poll_statuses.get(status, 0) + 1
+        elapsed = time.perf_counter() - started
+        try:
+            await asyncio.wait_for(stop.wait(), max(0.0, interval - elapsed))
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_server(args, cache_dir: str, log) -> tuple[subprocess.Popen, str]:
+    """Start uvicorn on a free port with the fake data source, logging to `log`."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    env = {
+        **os.environ,
+        "DATA_SOURCE": "fake",
+        "FAKE_FEED_ENTRIES": str(args.entries),
+        "FAKE_EVENTS_PER_SECOND": str(args.events_per_second),
+        "CACHE_DIR": cache_dir,
+        "WORKERS": str(args.workers),
+        "INGEST_MODE": args.ingest_mode,
+        # Keep slow consumers connected rather than measuring evictions
+        "WS_SEND_QUEUE_SIZE": str(max(16, int(args.events_per_second * 10))),
+    }
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--log-level", "warning"]
+    command += ["--host", "127.0.0.1", "--port", str(port)]
+    command += ["--workers", str(args.workers)]
+    server = subprocess.Popen(
+        command,
+        cwd=SRC_DIR,
+        env=env,
+        # The app logs every connection; keep that out of the report
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_ready(base_url: str, server: subprocess.Popen | None) -> float:
+    """Wait until /api/allergens serves data; return the seconds it took."""
+    started = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - started < STARTUP_TIMEOUT:
+            if server is not None and server.poll() is not None:
+                raise SystemExit(f"Server exited with status {server.returncode}")
+            try:
+                if (await client.get(f"{base_url}/api/allergens")).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"Server not ready after {STARTUP_TIMEOUT:.0f}s")
+
+
+def raise_open_file_limit() -> int:
+    """Allow as many sockets as the hard limit permits; return the new limit."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def percentiles_ms(samples: list[float]) -> str:
+    if not samples:
+        return "no samples"
+    p50, p99 = np.percentile(samples, [50, 99]) * 1000
+    return f"p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {max(samples) * 1000:.1f} ms"
+
+
+async def run(args, base_url: str, server: subprocess.Popen | None) -> Results:
+    ready = await wait_until_ready(base_url, server)
+    print(f"Server ready in {ready:.1f}s")
+
+    results = Results()
+    stop = asyncio.Event()
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/allergens"
+    connects = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    started = time.perf_counter()
+    clients = [
+        asyncio.create_task(websocket_client(ws_url, results, connects, stop))
+        for _ in range(args.clients)
+    ]
+    while results.connected + results.connect_failures < args.clients:
+        await asyncio.sleep(0.05)
+    print(
+        f"Connected {results.connected} WebSocket clients in "
+        f"{time.perf_counter() - started:.1f}s ({results.connect_failures} failed)"
+    )
+
+    limits = httpx.Limits(
+        max_connections=args.pollers, max_keepalive_connections=args.pollers
+    )
+    async with httpx.AsyncClient(limits=limits, timeout=30) as http:
+        pollers = [
+            asyncio.create_task(
+                poller(
+                    http, f"{base_url}/api/allergens", args.poll_interval, results, stop
+                )
+            )
+            for _ in range(args.pollers)
+        ]
+
+        results.window_start = time.time()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*pollers, *clients)
+
+        stats = (await http.get(f"{base_url}/api/ws/stats")).json()
+    print(f"Server WebSocket stats: {stats}")
+    return results
+
+
+def report(args, results: Results) -> None:
+    duration = args.duration
+    delivered = len(results.update_latencies)
+    polls = len(results.poll_latencies)
+    not_modified = results.poll_statuses.get(304, 0)
+
+    print(
+        f"\nOver {duration:.0f}s with {results.connected} clients "
+        f"and {args.pollers} pollers:"
+    )
+    print(f"  updates published      {len(results.versions)}")
+    print(f"  update-to-client       {percentiles_ms(results.update_latencies)}")
+    print(f"  diffs delivered        {delivered} ({delivered / duration:.0f}/s)")
+    print(f"  clients dropped        {results.dropped}")
+    print(f"  poll latency           {percentiles_ms(results.poll_latencies)}")
+    print(
+        f"  polls                  {polls} ({polls / duration:.0f}/s, "
+        f"{not_modified / polls if polls else 0:.0%} not modified, "
+        f"{results.poll_errors} errors)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=1000, help="WebSocket clients")
+    parser.add_argument(
+        "--pollers", type=int, default=100, help="/api/allergens pollers"
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=1.0, help="seconds between polls"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30.0, help="measurement seconds"
+    )
+    parser.add_argument(
+        "--events-per-second", type=float, default=5.0, help="fake feed events"
+    )
+    parser.add_argument(
+        "--entries", type=int, default=5_000, help="synthetic history size"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="server worker processes"
+    )
+    parser.add_argument(
+        "--ingest-mode", choices=("incremental", "full"), default="incremental"
+    )
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    args = parser.parse_args()
+
+    limit = raise_open_file_limit()
+    if args.clients + args.pollers + 64 > limit:
+        raise SystemExit(
+            f"Open file limit {limit} is too low for {args.clients} clients"
+        )
+
+    if args.url:
+        report(args, asyncio.run(run(args, args.url.rstrip("/"), None)))
+        return
+
+    with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryFile() as log:
+        server, base_url = start_server(args, cache_dir, log)
+        try:
+            report(args, asyncio.run(run(args, base_url, server)))
+        except SystemExit:
+            log.seek(0)
+            lines = log.read().decode(errors="replace").splitlines()
+            print("\n".join(lines[-40:]), file=sys.stderr)
+            raise
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""Files the app persists between runs, all kept under CACHE_DIR."""
+
+import os
+from pathlib import Path
+
+# Defaults to api/cache; load tests point it elsewhere so synthetic data never
+# ends up in a real deployment's cache
+CACHE_DIR = Path(
+    os.getenv("CACHE_DIR") or Path(__file__).parent.parent.parent / "cache"
+)
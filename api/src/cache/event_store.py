@@ -0,0 +1,104 @@
+"""
+Memory-mappable file of FoodEvents columns.
+
+The file is a one-line JSON header (format version, byte order, row count,
+food vocabulary and column offsets) followed by the raw float64 timestamp and
+uint32 food id columns, each 8-byte aligned. Reading maps the file and
+wraps the columns as memoryviews, so opening even a long history costs
+only the vocabulary; pages are loaded by the OS as they are touched and
+shared between worker processes. Files are replaced atomically, so a
+mapping stays valid while a newer file is written.
+"""
+
+import json
+import mmap
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from cache import CACHE_DIR
+from services.food_events import FOOD_ID_TYPECODE, TIMESTAMP_TYPECODE, FoodEvents
+
+EVENTS_FILE = CACHE_DIR / "food_events.bin"
+
+EVENTS_MAGIC = "food-events"
+EVENTS_VERSION = 2
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def write_food_events(events: FoodEvents, path: Path = EVENTS_FILE) -> None:
+    """Atomically write a FoodEvents table to a mappable file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    count = len(events)
+    header = {
+        "magic": EVENTS_MAGIC,
+        "version": EVENTS_VERSION,
+        "byteorder": sys.byteorder,
+        "count": count,
+        "foods": events.foods,
+    }
+    # The column offsets are stored in the header, so leave room in it for
+    # the widest possible offsets before placing the columns after it
+    widest = {**header, "timestamps_offset": 2**63, "food_ids_offset": 2**63}
+    timestamps_offset = _align(len(json.dumps(widest, separators=(",", ":"))) + 1)
+    header["timestamps_offset"] = timestamps_offset
+    header["food_ids_offset"] = _align(timestamps_offset + count * 8)
+    header_bytes = json.dumps(header, separators=(",", ":")).encode() + b"\n"
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)
+            f.write(header_bytes.ljust(timestamps_offset, b" "))
+            f.write(memoryview(events.timestamps).cast("B"))
+            f.write(b"\0" * (header["food_ids_offset"] - f.tell()))
+            f.write(memoryview(events.food_ids).cast("B"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def map_food_events(path: Path = EVENTS_FILE) -> FoodEvents | None:
+    """
+    Memory-map a FoodEvents file written by write_food_events.
+
+    Returns:
+        FoodEvents with read-only columns backed by the mapping, or None if
+        the file is missing, from another format version or byte order, or
+        truncated
+    """
+    try:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            size = os.fstat(f.fileno()).st_size
+            if (
+                not isinstance(header, dict)
+                or header.get("magic") != EVENTS_MAGIC
+                or header.get("version") != EVENTS_VERSION
+                or header.get("byteorder") != sys.byteorder
+                or size < header["food_ids_offset"] + header["count"] * 4
+            ):
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+    count = header["count"]
+    view = memoryview(mapped)
+    ts_start, ids_start = header["timestamps_offset"], header["food_ids_offset"]
+    return FoodEvents.from_columns(
+        view[ts_start : ts_start + count * 8].cast(TIMESTAMP_TYPECODE),
+        view[ids_start : ids_start + count * 4].cast(FOOD_ID_TYPECODE),
+        header["foods"],
+        buffer=mapped,
+    )
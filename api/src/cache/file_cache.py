@@ -1,55 +1,214 @@
-"""JSON file-based caching for allergen data."""
+"""
+Snapshot file caching for allergen data.
+
+A snapshot is a one-line JSON header followed by a zlib-compressed compact
+JSON body. The header carries the format version, last_updated time, body
+length and a CRC32 of the body, so validity can be checked without reading
+the body, and a torn or corrupt body is detected before it is parsed.
+Snapshots are written to a temporary file and atomically renamed into place.
+"""
 
 import json
+import os
+import tempfile
+import zlib
 from datetime import datetime, timedelta
 from pathlib import Path
 
-CACHE_FILE = Path(__file__).parent.parent.parent / "cache" / "allergens.json"
+from cache import CACHE_DIR
+
+CACHE_FILE = CACHE_DIR / "allergens.snapshot"
 CACHE_TTL_HOURS = 24
 
+SNAPSHOT_MAGIC = "allergen-snapshot"
+SNAPSHOT_VERSION = 2
+MAX_HEADER_BYTES = 4096
+
 
 def _ensure_cache_dir():
     """Ensure the cache directory exists."""
     CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 
-def is_cache_valid() -> bool:
-    """Check if cache exists and is less than 24 hours old."""
-    if not CACHE_FILE.exists():
-        return False
+def _parse_header(line: bytes) -> dict | None:
+    """Parse and check a snapshot header line. Returns None if not a valid header."""
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return None
+
+    if (
+        not isinstance(header, dict)
+        or header.get("magic") != SNAPSHOT_MAGIC
+        or header.get("version") != SNAPSHOT_VERSION
+    ):
+        return None
+    return header
 
+
+def read_header() -> dict | None:
+    """Read only the snapshot header. Returns None if missing or not a snapshot."""
     try:
-        with open(CACHE_FILE, "r") as f:
-            data = json.load(f)
+        with open(CACHE_FILE, "rb") as f:
+            return _parse_header(f.readline(MAX_HEADER_BYTES))
+    except FileNotFoundError:
+        return None
 
-        last_updated = datetime.fromisoformat(data.get("last_updated", ""))
-        age = datetime.now(last_updated.tzinfo) - last_updated
 
-        return age < timedelta(hours=CACHE_TTL_HOURS)
-    except (json.JSONDecodeError, ValueError, KeyError):
+def _is_fresh(header: dict) -> bool:
+    try:
+        last_updated = datetime.fromisoformat(header["last_updated"])
+    except (KeyError, TypeError, ValueError):
         return False
 
+    age = datetime.now(last_updated.tzinfo) - last_updated
+    return age < timedelta(hours=CACHE_TTL_HOURS)
+
+
+def is_cache_valid() -> bool:
+    """Check if cache exists and is less than 24 hours old, from the header alone."""
+    header = read_header()
+    return header is not None and _is_fresh(header)
+
+
+def read_cache(ignore_ttl: bool = False) -> dict | None:
+    """
+    Read the snapshot, parsing the body once.
+
+    Args:
+        ignore_ttl: Return snapshots older than CACHE_TTL_HOURS too (warm boot)
 
-def read_cache() -> dict | None:
-    """Read data from cache file. Returns None if cache is invalid."""
-    if not is_cache_valid():
+    Returns:
+        dict with "allergens", "last_updated" (datetime) and, when the snapshot
+        holds them, "entries" as (entry_id, entry_data) pairs and the writer's
+        state "version"; None if the cache is missing, stale, or fails its
+        checksum
+    """
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            header = _parse_header(f.readline(MAX_HEADER_BYTES))
+            if header is None or not (ignore_ttl or _is_fresh(header)):
+                return None
+            body = f.read()
+    except FileNotFoundError:
+        return None
+
+    if len(body) != header.get("length") or zlib.crc32(body) != header.get("crc32"):
         return None
 
     try:
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
+        payload = json.loads(zlib.decompress(body))
+        last_updated = datetime.fromisoformat(header["last_updated"])
+    except (zlib.error, ValueError, KeyError):
         return None
 
+    data = {"allergens": payload.get("allergens", []), "last_updated": last_updated}
+    if "entries" in payload:
+        data["entries"] = [tuple(item) for item in payload["entries"]]
+    if "state_version" in header:
+        data["version"] = header["state_version"]
+    return data
+
+
+def write_cache(
+    allergens: list[dict],
+    last_updated: datetime,
+    entries: list[tuple[str, dict]] | None = None,
+    version: int | None = None,
+    upstream: tuple[str, datetime | None] | None = None,
+) -> None:
+    """
+    Atomically write an allergen snapshot to the cache file.
+
+    Args:
+        allergens: Allergen result dicts
+        last_updated: Time the results were calculated
+        entries: Optional (entry_id, entry_data) pairs of parsed solid food
+            entries, so a warm boot can resume without re-fetching
+        version: Optional state version of the results, in the header so
+            other worker processes can tell a new snapshot from the header alone
+        upstream: Optional (status, stale_since) of the writer's upstream
+            connection, which follower workers report as their own
+    """
+
+    payload: dict = {"allergens": allergens}
+    if entries is not None:
+        payload["entries"] = entries
+
+    body = zlib.compress(
+        json.dumps(payload, separators=(",", ":"), default=str).encode()
+    )
+    header = {
+        "magic": SNAPSHOT_MAGIC,
+        "version": SNAPSHOT_VERSION,
+        "last_updated": last_updated.isoformat(),
+        "encoding": "json+zlib",
+        "length": len(body),
+        "crc32": zlib.crc32(body),
+        "has_entries": entries is not None,
+    }
+    if version is not None:
+        header["state_version"] = version
+    if upstream is not None:
+        _set_upstream(header, *upstream)
+    _write_snapshot(header, body)
+
+
+def write_upstream_status(status: str, stale_since: datetime | None) -> bool:
+    """
+    Rewrite the snapshot header with a new upstream status, keeping the body.
+
+    Returns:
+        bool: False if there is no snapshot to update
+    """
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            header = _parse_header(f.readline(MAX_HEADER_BYTES))
+            body = f.read()
+    except FileNotFoundError:
+        return False
+    if header is None:
+        return False
 
-def write_cache(allergens: list[dict], last_updated: datetime) -> None:
-    """Write allergen data to cache file."""
-    _ensure_cache_dir()
+    _set_upstream(header, status, stale_since)
+    _write_snapshot(header, body)
+    return True
 
-    data = {"allergens": allergens, "last_updated": last_updated.isoformat()}
 
-    with open(CACHE_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+def read_upstream_status(header: dict) -> tuple[str, datetime | None] | None:
+    """Get the (status, stale_since) a snapshot header carries, if any."""
+    status = header.get("upstream_status")
+    if not isinstance(status, str):
+        return None
+    try:
+        stale_since = header.get("upstream_stale_since")
+        return status, datetime.fromisoformat(stale_since) if stale_since else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _set_upstream(header: dict, status: str, stale_since: datetime | None) -> None:
+    header["upstream_status"] = status
+    header["upstream_stale_since"] = stale_since.isoformat() if stale_since else None
+
+
+def _write_snapshot(header: dict, body: bytes) -> None:
+    _ensure_cache_dir()
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=CACHE_FILE.parent, prefix=f".{CACHE_FILE.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)
+            f.write(json.dumps(header, separators=(",", ":")).encode() + b"\n")
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CACHE_FILE)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
 
 
 def clear_cache() -> None:
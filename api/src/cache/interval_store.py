@@ -0,0 +1,145 @@
+"""SQLite-backed local store of raw Firestore interval documents."""
+
+import json
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+
+from cache import CACHE_DIR
+
+INTERVAL_STORE_FILE = CACHE_DIR / "intervals.db"
+
+
+class IntervalStore:
+    """
+    Durable copy of a child's feed interval documents.
+
+    Documents are keyed by Firestore document id and stored with their
+    Firestore update time, so a sync only needs to fetch documents whose
+    update time differs from the stored one. The store is tied to a single
+    child; opening it for a different child starts from empty. Opening it
+    with no child_uid reads whatever the writing process stored, which is
+    how follower workers share the leader's documents.
+    """
+
+    def __init__(self, child_uid: str | None, path: Path = INTERVAL_STORE_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS intervals ("
+                "doc_id TEXT PRIMARY KEY, update_time REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+        if child_uid is not None and self._get_meta("child_uid") != child_uid:
+            self.clear()
+            self._set_meta("child_uid", child_uid)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM intervals").fetchone()[0]
+
+    @property
+    def child_uid(self) -> str | None:
+        """The child whose documents are stored, or None if none yet."""
+        return self._get_meta("child_uid")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def clear(self) -> None:
+        """Delete every stored document."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM intervals")
+
+    def documents(self) -> Iterable[tuple[str, dict]]:
+        """Return all stored (doc_id, data) pairs."""
+        with self._lock:
+            rows = self._conn.execute("SELECT doc_id, data FROM intervals").fetchall()
+        return [(doc_id, json.loads(data)) for doc_id, data in rows]
+
+    def get_documents(self, doc_ids: list[str]) -> list[tuple[str, dict]]:
+        """Return the stored (doc_id, data) pairs for the given ids."""
+        rows = []
+        with self._lock:
+            # Chunked to stay under SQLite's bound parameter limit
+            for i in range(0, len(doc_ids), 500):
+                chunk = doc_ids[i : i + 500]
+                rows.extend(
+                    self._conn.execute(
+                        "SELECT doc_id, data FROM intervals WHERE doc_id IN "
+                        f"({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                )
+        return [(doc_id, json.loads(data)) for doc_id, data in rows]
+
+    def update_times(self, doc_ids: list[str] | None = None) -> dict[str, float]:
+        """Return the stored Firestore update times of the given (or all) documents."""
+        with self._lock:
+            if doc_ids is None:
+                return dict(
+                    self._conn.execute(
+                        "SELECT doc_id, update_time FROM intervals"
+                    ).fetchall()
+                )
+            rows = []
+            # Chunked to stay under SQLite's bound parameter limit
+            for i in range(0, len(doc_ids), 500):
+                chunk = doc_ids[i : i + 500]
+                rows.extend(
+                    self._conn.execute(
+                        "SELECT doc_id, update_time FROM intervals WHERE doc_id IN "
+                        f"({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                )
+        return dict(rows)
+
+    def high_water_mark(self) -> float | None:
+        """Return the latest stored update time, or None if the store is empty."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MAX(update_time) FROM intervals"
+            ).fetchone()[0]
+
+    def upsert(self, documents: Iterable[tuple[str, float, dict]]) -> None:
+        """Insert or replace (doc_id, update_time, data) documents."""
+        rows = [
+            (doc_id, update_time, json.dumps(data, separators=(",", ":"), default=str))
+            for doc_id, update_time, data in documents
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO intervals (doc_id, update_time, data) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def delete(self, doc_ids: Iterable[str]) -> None:
+        """Delete documents by id."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM intervals WHERE doc_id = ?", [(d,) for d in doc_ids]
+            )
+
+    def _get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
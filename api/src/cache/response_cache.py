@@ -0,0 +1,52 @@
+"""Pre-encoded HTTP response bodies keyed by state version."""
+
+import gzip
+
+
+class EncodedResponse:
+    """
+    A JSON response body encoded once, with its gzip variant and strong ETag.
+
+    `tag` distinguishes bodies of the same state version that differ in
+    something else, such as upstream health metadata; it becomes part of
+    the ETag.
+    """
+
+    def __init__(self, body: bytes, version: int, tag: str = ""):
+        self.version = version
+        self.tag = tag
+        self.body = body
+        self.gzip_body = gzip.compress(body, mtime=0)
+        self.etag = f'"{version}-{tag}"' if tag else f'"{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag."""
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Check whether an Accept-Encoding header value allows gzip."""
+    if not accept_encoding:
+        return False
+
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+
+        params = params.replace(" ", "").lower()
+        if not params.startswith("q="):
+            return True
+        try:
+            return float(params[2:]) > 0
+        except ValueError:
+            return False
+    return False
@@ -0,0 +1 @@
+"""Synthetic feed data and a Firestore stand-in for benchmarks and local runs."""
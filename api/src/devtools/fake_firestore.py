@@ -0,0 +1,427 @@
+"""In-process stand-in for the parts of the Firestore client the app uses."""
+
+import itertools
+import logging
+import pickle
+import threading
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+}
+
+_MISSING = object()
+
+
+class FakeDocumentSnapshot:
+    """Snapshot of a stored document, decoded on every to_dict() call."""
+
+    def __init__(
+        self,
+        reference: "FakeDocumentReference",
+        payload: bytes | None,
+        update_time: datetime | None,
+    ):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = payload is not None
+        self.update_time = update_time
+        self._payload = payload
+
+    def to_dict(self) -> dict | None:
+        if self._payload is None:
+            return None
+        # Decoding a fresh copy each time mirrors the client building new
+        # dicts from the wire format
+        return pickle.loads(self._payload)
+
+    def get(self, field: str) -> Any:
+        return (self.to_dict() or {}).get(field)
+
+
+class FakeDocumentReference:
+    """Reference to a single document; subcollections hang off it."""
+
+    def __init__(self, client: "FakeFirestore", path: str, doc_id: str):
+        self._client = client
+        self._path = path
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._path}/{self.id}"
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self._client, f"{self.path}/{name}")
+
+    def get(self, field_paths: list[str] | None = None) -> FakeDocumentSnapshot:
+        payload, update_time = self._client._read(self._path, self.id)
+        return self._client._snapshot(self, payload, update_time, field_paths)
+
+    def set(self, data: dict) -> None:
+        self._client.set_document(self._path, self.id, data)
+
+    def delete(self) -> None:
+        self._client.delete_document(self._path, self.id)
+
+    def on_snapshot(self, callback: Callable) -> "FakeWatch":
+        return FakeWatch(
+            self._client, self._path, lambda doc_id, _: doc_id == self.id, callback
+        )
+
+
+class FakeQuery:
+    """Immutable query over one collection: filters, ordering and projection."""
+
+    def __init__(
+        self,
+        client: "FakeFirestore",
+        path: str,
+        filters: tuple = (),
+        order: tuple[str, bool] | None = None,
+        fields: list[str] | None = None,
+        limit: int | None = None,
+    ):
+        self._client = client
+        self._path = path
+        self._filters = filters
+        self._order = order
+        self._fields = fields
+        self._limit = limit
+
+    def _copy(self, **changes) -> "FakeQuery":
+        args = {
+            "filters": self._filters,
+            "order": self._order,
+            "fields": self._fields,
+            "limit": self._limit,
+        }
+        args.update(changes)
+        return FakeQuery(self._client, self._path, **args)
+
+    def where(self, field: str, op: str, value: Any) -> "FakeQuery":
+        return self._copy(filters=self._filters + ((field, _OPERATORS[op], value),))
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "FakeQuery":
+        return self._copy(order=(field, direction == "DESCENDING"))
+
+    def select(self, fields: list[str]) -> "FakeQuery":
+        return self._copy(fields=list(fields))
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count)
+
+    def _matches(self, indexed: dict) -> bool:
+        # Like Firestore, filters and ordering skip documents missing the field
+        if any(
+            indexed.get(field, _MISSING) is _MISSING
+            or not _compare(op, indexed[field], value)
+            for field, op, value in self._filters
+        ):
+            return False
+        return not self._order or self._order[0] in indexed
+
+    def stream(self) -> Iterator[FakeDocumentSnapshot]:
+        matched = []
+        for doc_id, (payload, update_time, indexed) in self._client._scan(self._path):
+            if self._matches(indexed):
+                matched.append((doc_id, payload, update_time, indexed))
+
+        if self._order:
+            field, descending = self._order
+            matched.sort(key=lambda item: item[3][field], reverse=descending)
+        if self._limit is not None:
+            matched = matched[: self._limit]
+
+        for doc_id, payload, update_time, _ in matched:
+            reference = FakeDocumentReference(self._client, self._path, doc_id)
+            yield self._client._snapshot(reference, payload, update_time, self._fields)
+
+    def get(self) -> list[FakeDocumentSnapshot]:
+        return list(self.stream())
+
+    def on_snapshot(self, callback: Callable) -> "FakeWatch":
+        """Watch the documents matching the query's filters (limit is ignored)."""
+        return FakeWatch(
+            self._client,
+            self._path,
+            lambda _, indexed: self._matches(indexed),
+            callback,
+        )
+
+
+class ChangeType(Enum):
+    ADDED = 1
+    MODIFIED = 2
+    REMOVED = 3
+
+
+class FakeDocumentChange:
+    def __init__(self, type: ChangeType, document: FakeDocumentSnapshot):
+        self.type = type
+        self.document = document
+
+
+class FakeWatch:
+    """
+    Snapshot listener on a query or document, called back on its own thread.
+
+    Like a Firestore watch, the first callback delivers every matching
+    document as ADDED; later ones deliver the documents written since,
+    batched, so writes landing while a callback runs arrive together in the
+    next one. Callbacks get (docs, changes, read_time), where docs are all
+    documents currently matching.
+    """
+
+    def __init__(
+        self,
+        client: "FakeFirestore",
+        path: str,
+        matches: Callable[[str, dict], bool],
+        callback: Callable,
+    ):
+        self._client = client
+        self._path = path
+        self._matches = matches
+        self._callback = callback
+        self._condition = threading.Condition()
+        self._pending: set[str] = set()
+        self._known: dict[str, tuple[bytes, datetime]] = {}
+        self.is_active = True
+        client._add_watch(path, self)
+        self._thread = threading.Thread(
+            target=self._run, name="fake-watch", daemon=True
+        )
+        self._thread.start()
+
+    def unsubscribe(self) -> None:
+        self._client._remove_watch(self._path, self)
+        with self._condition:
+            self.is_active = False
+            self._condition.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _notify(self, doc_id: str) -> None:
+        with self._condition:
+            self._pending.add(doc_id)
+            self._condition.notify()
+
+    def _run(self) -> None:
+        # The initial snapshot considers every document in the collection
+        doc_ids = [doc_id for doc_id, _ in self._client._scan(self._path)]
+        initial = True
+        while True:
+            changes = self._changes(doc_ids)
+            if changes or initial:
+                docs = [
+                    self._snapshot(doc_id, payload, update_time)
+                    for doc_id, (payload, update_time) in self._known.items()
+                ]
+                try:
+                    self._callback(docs, changes, datetime.now(timezone.utc))
+                except Exception:
+                    logger.exception("Fake watch callback failed")
+            initial = False
+
+            with self._condition:
+                while self.is_active and not self._pending:
+                    self._condition.wait()
+                if not self.is_active:
+                    return
+                doc_ids, self._pending = sorted(self._pending), set()
+
+    def _changes(self, doc_ids: list[str]) -> list[FakeDocumentChange]:
+        changes = []
+        for doc_id in doc_ids:
+            stored = self._client._read_indexed(self._path, doc_id)
+            if stored is not None and self._matches(doc_id, stored[2]):
+                payload, update_time, _ = stored
+                type = (
+                    ChangeType.MODIFIED if doc_id in self._known else ChangeType.ADDED
+                )
+                self._known[doc_id] = (payload, update_time)
+                changes.append(
+                    FakeDocumentChange(
+                        type, self._snapshot(doc_id, payload, update_time)
+                    )
+                )
+            elif doc_id in self._known:
+                payload, update_time = self._known.pop(doc_id)
+                changes.append(
+                    FakeDocumentChange(
+                        ChangeType.REMOVED, self._snapshot(doc_id, payload, update_time)
+                    )
+                )
+        return changes
+
+    def _snapshot(
+        self, doc_id: str, payload: bytes, update_time: datetime
+    ) -> FakeDocumentSnapshot:
+        reference = FakeDocumentReference(self._client, self._path, doc_id)
+        return self._client._snapshot(reference, payload, update_time, None)
+
+
+class FakeCollection(FakeQuery):
+    """A collection is also the query matching all of its documents."""
+
+    def __init__(self, client: "FakeFirestore", path: str):
+        super().__init__(client, path)
+
+    def document(self, doc_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self._path, doc_id)
+
+
+class FakeFirestore:
+    """
+    Thread-safe in-memory document store with a Firestore-like client API.
+
+    Supports the calls the app makes: nested collection/document paths,
+    where/order_by/select/limit queries streamed as snapshots, document get,
+    get_all, and on_snapshot listeners on queries and documents. Documents are kept pickled with a monotonically increasing
+    update time, so every read decodes a fresh copy as the real client does.
+    Queries can filter and order on top-level scalar fields only; field
+    projections may use dotted paths into maps.
+
+    Every document read is counted, with the encoded size of what it returned
+    (after projection), so query changes can be measured by `stats()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # path -> doc_id -> (pickled data, update time, top-level scalar fields)
+        self._documents: dict[str, dict[str, tuple[bytes, datetime, dict]]] = {}
+        self._clock = itertools.count(1)
+        self._documents_read = 0
+        self._bytes_read = 0
+        self._watches: dict[str, list[FakeWatch]] = {}
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of documents read and their encoded size in bytes."""
+        with self._lock:
+            return {"documents": self._documents_read, "bytes": self._bytes_read}
+
+    def reset_stats(self) -> None:
+        """Zero the read counters."""
+        with self._lock:
+            self._documents_read = 0
+            self._bytes_read = 0
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def get_all(
+        self, references, field_paths: list[str] | None = None
+    ) -> Iterator[FakeDocumentSnapshot]:
+        for reference in references:
+            yield reference.get(field_paths)
+
+    def set_document(self, path: str, doc_id: str, data: dict) -> None:
+        """Create or replace a document, bumping its update time."""
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        fields = {k: v for k, v in data.items() if not isinstance(v, (dict, list))}
+        with self._lock:
+            update_time = self._next_update_time()
+            self._documents.setdefault(path, {})[doc_id] = payload, update_time, fields
+        self._notify_watches(path, doc_id)
+
+    def delete_document(self, path: str, doc_id: str) -> None:
+        """Delete a document if it exists."""
+        with self._lock:
+            self._documents.get(path, {}).pop(doc_id, None)
+        self._notify_watches(path, doc_id)
+
+    def load_feed(self, child_uid: str, documents: list[tuple[str, dict]]) -> None:
+        """Store (doc_id, data) documents as a child's feed intervals."""
+        path = f"feed/{child_uid}/intervals"
+        for doc_id, data in documents:
+            self.set_document(path, doc_id, data)
+
+    def _next_update_time(self) -> datetime:
+        # Microsecond ticks from a fixed epoch keep update times unique
+        return datetime.fromtimestamp(
+            1_700_000_000 + next(self._clock) / 1e6, timezone.utc
+        )
+
+    def _snapshot(
+        self,
+        reference: FakeDocumentReference,
+        payload: bytes | None,
+        update_time: datetime | None,
+        field_paths: list[str] | None,
+    ) -> FakeDocumentSnapshot:
+        if payload is not None and field_paths is not None:
+            projected = _project(pickle.loads(payload), field_paths)
+            payload = pickle.dumps(projected, protocol=pickle.HIGHEST_PROTOCOL)
+        if payload is not None:
+            with self._lock:
+                self._documents_read += 1
+                self._bytes_read += len(payload)
+        return FakeDocumentSnapshot(reference, payload, update_time)
+
+    def _read(self, path: str, doc_id: str) -> tuple[bytes | None, datetime | None]:
+        with self._lock:
+            stored = self._documents.get(path, {}).get(doc_id)
+        return (stored[0], stored[1]) if stored else (None, None)
+
+    def _read_indexed(
+        self, path: str, doc_id: str
+    ) -> tuple[bytes, datetime, dict] | None:
+        with self._lock:
+            return self._documents.get(path, {}).get(doc_id)
+
+    def _add_watch(self, path: str, watch: FakeWatch) -> None:
+        with self._lock:
+            self._watches.setdefault(path, []).append(watch)
+
+    def _remove_watch(self, path: str, watch: FakeWatch) -> None:
+        with self._lock:
+            watches = self._watches.get(path, [])
+            if watch in watches:
+                watches.remove(watch)
+
+    def _notify_watches(self, path: str, doc_id: str) -> None:
+        with self._lock:
+            watches = list(self._watches.get(path, ()))
+        for watch in watches:
+            watch._notify(doc_id)
+
+    def _scan(self, path: str) -> list[tuple[str, tuple[bytes, datetime, dict]]]:
+        with self._lock:
+            return list(self._documents.get(path, {}).items())
+
+
+def _project(data: dict, field_paths: list[str]) -> dict:
+    """Copy only the given (possibly dotted) field paths out of a document."""
+    projected: dict = {}
+    for path in field_paths:
+        keys = path.split(".")
+        value = data
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = projected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return projected
+
+
+def _compare(op, a, b) -> bool:
+    try:
+        return op(a, b)
+    except TypeError:
+        return False
@@ -0,0 +1,154 @@
+"""Local stand-in for the Huckleberry API, backed by a synthetic FakeFirestore feed."""
+
+import logging
+import random
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+from devtools.fake_firestore import FakeFirestore
+from devtools.feed_generator import generate_feed_documents, generate_feed_entry
+from services.huckleberry import get_intervals_ref
+
+logger = logging.getLogger(__name__)
+
+FAKE_CHILD_UID = "fake-child"
+
+
+class FakeHuckleberryAPI:
+    """
+    The HuckleberryAPI calls the app makes, answered locally.
+
+    The child's feed is a synthetic history of `entries` entries from
+    devtools.feed_generator ending now, held in a FakeFirestore. Once
+    authenticated, a FeedEmitter logs `events_per_second` new feeds into it,
+    each bumping the feed document as Huckleberry does, so incremental
+    watches and full-mode feed listeners both fire. Tokens last
+    `token_lifetime` seconds, so proactive refresh is exercised too.
+    """
+
+    def __init__(
+        self,
+        entries: int = 5_000,
+        events_per_second: float = 0.0,
+        solids_fraction: float = 0.4,
+        token_lifetime: float = 3600.0,
+        seed: int = 0,
+    ):
+        self.firestore = FakeFirestore()
+        self.firestore.load_feed(
+            FAKE_CHILD_UID,
+            generate_feed_documents(
+                entries, seed=seed, solids_fraction=solids_fraction, end=time.time()
+            ),
+        )
+        self.emitter = FeedEmitter(
+            self.firestore, FAKE_CHILD_UID, events_per_second, solids_fraction, seed
+        )
+        self._token_lifetime = token_lifetime
+        self.token_expires_at: float | None = None
+        self._listeners: dict[str, object] = {}
+        self._feed_callbacks: dict[str, Callable[[dict], None]] = {}
+
+    def authenticate(self) -> None:
+        self.token_expires_at = time.time() + self._token_lifetime
+        self.emitter.start()
+
+    def refresh_auth_token(self) -> None:
+        self.token_expires_at = time.time() + self._token_lifetime
+        # Huckleberry recreates its listeners with the new token
+        self.stop_all_listeners()
+        for child_uid, callback in list(self._feed_callbacks.items()):
+            self.setup_feed_listener(child_uid, callback)
+
+    def get_children(self) -> list[dict]:
+        return [{"uid": FAKE_CHILD_UID, "name": "Fake Child"}]
+
+    def _get_firestore_client(self) -> FakeFirestore:
+        return self.firestore
+
+    def setup_feed_listener(
+        self, child_uid: str, callback: Callable[[dict], None]
+    ) -> None:
+        def on_snapshot(docs, changes, read_time):
+            for doc in docs:
+                callback(doc.to_dict())
+
+        self._feed_callbacks[child_uid] = callback
+        feed_ref = self.firestore.collection("feed").document(child_uid)
+        self._listeners[f"feed_{child_uid}"] = feed_ref.on_snapshot(on_snapshot)
+
+    def stop_all_listeners(self) -> None:
+        listeners, self._listeners = self._listeners, {}
+        for watch in listeners.values():
+            watch.unsubscribe()
+
+    def close(self) -> None:
+        """Stop the emitter and all listeners."""
+        self.emitter.stop()
+        self.stop_all_listeners()
+
+
+class FeedEmitter:
+    """
+    Logs new feed entries into a FakeFirestore at a steady rate.
+
+    Each event is a new regular interval document starting now (a solid
+    feed with probability `solids_fraction`), followed by an update of the
+    child's feed document. `emitted` counts events so far.
+    """
+
+    def __init__(
+        self,
+        firestore: FakeFirestore,
+        child_uid: str,
+        events_per_second: float,
+        solids_fraction: float = 0.4,
+        seed: int = 0,
+    ):
+        self._firestore = firestore
+        self._child_uid = child_uid
+        self._interval = 1.0 / events_per_second if events_per_second > 0 else None
+        self._solids_fraction = solids_fraction
+        self._rng = random.Random(seed + 1)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.emitted = 0
+
+    def start(self) -> None:
+        """Start emitting on a background thread, unless the rate is zero."""
+        if self._interval is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="fake-feed-emitter", daemon=True
+        )
+        self._thread.start()
+        logger.info("Emitting %.1f fake feed events per second", 1 / self._interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def emit(self) -> None:
+        """Log one feed entry now."""
+        now = time.time()
+        entry = generate_feed_entry(
+            self._rng, round(now, 3), self._rng.random() < self._solids_fraction
+        )
+        doc_id = uuid.UUID(int=self._rng.getrandbits(128)).hex[:20]
+        get_intervals_ref(self._firestore, self._child_uid).document(doc_id).set(entry)
+        self._firestore.collection("feed").document(self._child_uid).set(
+            {"lastUpdated": now}
+        )
+        self.emitted += 1
+
+    def _run(self) -> None:
+        # Events are scheduled against the clock so slow writes do not lower the rate
+        next_at = time.monotonic()
+        while not self._stop.wait(max(0.0, next_at - time.monotonic())):
+            self.emit()
+            next_at += self._interval
@@ -0,0 +1,59 @@
+"""Local stand-in for the meal photo model, for tests and load runs."""
+
+import asyncio
+import hashlib
+
+# Foods the stub picks from; most map to an allergen in the built-in food map
+STUB_FOODS = (
+    "scrambled egg",
+    "peanut butter",
+    "salmon",
+    "yogurt",
+    "toast",
+    "tofu",
+    "hummus",
+    "banana",
+    "avocado",
+    "sweet potato",
+)
+
+
+class StubRecognizer:
+    """
+    Recognizes foods without a model.
+
+    Each photo gets a deterministic pick of `foods_per_photo` STUB_FOODS
+    derived from its bytes, or `foods` when given, after sleeping `delay`
+    seconds to stand in for model latency. `calls` counts recognitions,
+    which shows whether caching and de-duplication kept work off the model.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        foods: list[str] | None = None,
+        delay: float = 0.0,
+        foods_per_photo: int = 3,
+    ):
+        self._foods = foods
+        self._delay = delay
+        self._foods_per_photo = foods_per_photo
+        self.calls = 0
+
+    async def recognize(self, jpeg: bytes) -> list[str]:
+        self.calls += 1
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        if self._foods is not None:
+            return list(self._foods)
+
+        digest = hashlib.sha256(jpeg).digest()
+        picks = []
+        for byte in digest:
+            food = STUB_FOODS[byte % len(STUB_FOODS)]
+            if food not in picks:
+                picks.append(food)
+            if len(picks) == self._foods_per_photo:
+                break
+        return picks
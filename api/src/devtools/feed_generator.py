@@ -0,0 +1,147 @@
+"""Generator of realistic synthetic Huckleberry feed interval documents."""
+
+import random
+import uuid
+
+from services.allergen_service import ALLERGEN_FOOD_MAP
+
+# Foods that match no allergen, and free-text names that only keyword
+# matching recognizes
+OTHER_FOODS = [
+    "Banana",
+    "Avocado",
+    "Sweet Potato",
+    "Oatmeal",
+    "Pear",
+    "Apple Sauce",
+    "Carrots",
+    "Broccoli",
+    "Rice Cereal",
+    "Peas",
+]
+FREE_TEXT_FOODS = [
+    "Salmon cakes",
+    "Scrambled eggs with cheese",
+    "Peanut butter toast",
+    "Shrimp fried rice",
+    "Almond milk oatmeal",
+    "Sesame noodles",
+]
+
+NON_SOLID_MODES = ["breast", "bottle", "bottle", "pump"]
+AMOUNTS = ["taste", "some", "half", "all"]
+REACTIONS = ["none", "none", "none", "liked", "disliked"]
+
+# Huckleberry stores recent feeds as one document each and rolls older
+# history into `multi` batch documents
+DEFAULT_BATCH_SIZE = 100
+
+
+def generate_feed_entry(rng: random.Random, start: float, solids: bool) -> dict:
+    """Build a single feed entry, as stored in a document or a batch's data map."""
+    entry = {
+        "start": start,
+        "offset": -300.0,
+        "end_offset": -300.0,
+    }
+    if not solids:
+        mode = rng.choice(NON_SOLID_MODES)
+        entry["mode"] = mode
+        if mode == "breast":
+            entry["leftDuration"] = rng.randint(60, 900)
+            entry["rightDuration"] = rng.randint(60, 900)
+            entry["lastSide"] = rng.choice(["left", "right"])
+        else:
+            entry["amount"] = rng.randint(2, 8)
+            entry["units"] = "oz"
+            entry["bottleType"] = rng.choice(["formula", "breast milk"])
+        return entry
+
+    entry["mode"] = "solids"
+    foods = {}
+    for _ in range(rng.choice([1, 1, 1, 2, 2, 3, 4])):
+        roll = rng.random()
+        if roll < 0.55:
+            name = rng.choice(rng.choice(list(ALLERGEN_FOOD_MAP.values())))
+            name = name.title() if rng.random() < 0.5 else name
+        elif roll < 0.9:
+            name = rng.choice(OTHER_FOODS)
+        else:
+            name = rng.choice(FREE_TEXT_FOODS)
+
+        food = {"created_name": name, "amount": rng.choice(AMOUNTS)}
+        if rng.random() < 0.3:
+            food["reaction"] = rng.choice(REACTIONS)
+        if rng.random() < 0.02:
+            # Some foods are stored without a name
+            del food["created_name"]
+        foods[str(uuid.UUID(int=rng.getrandbits(128)))] = food
+    entry["foods"] = foods
+    if rng.random() < 0.1:
+        entry["notes"] = "Ate well"
+    return entry
+
+
+def generate_feed_documents(
+    entries: int,
+    seed: int = 0,
+    solids_fraction: float = 0.4,
+    multi_fraction: float = 0.6,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    end: float = 1_760_000_000.0,
+    spacing: float = 3 * 3600,
+) -> list[tuple[str, dict]]:
+    """
+    Generate a child's feed interval documents.
+
+    Entries are spaced `spacing` seconds apart (with jitter) going back from
+    `end`. The oldest `multi_fraction` of them are rolled into `multi` batch
+    documents whose nested `data` maps hold `batch_size` entries each; the
+    rest are regular one-entry documents. About `solids_fraction` of entries
+    are solid food feeds with one to four foods; the others are breast,
+    bottle or pump feeds.
+
+    Args:
+        entries: Total number of feed entries
+        seed: Random seed, so the same arguments always give the same data
+
+    Returns:
+        list: (doc_id, document data) tuples, newest regular documents first
+    """
+    rng = random.Random(seed)
+    batched = int(entries * multi_fraction)
+
+    timeline = []
+    for i in range(entries):
+        start = end - i * spacing - rng.random() * spacing * 0.5
+        timeline.append(
+            generate_feed_entry(rng, round(start, 3), rng.random() < solids_fraction)
+        )
+
+    documents = [(_document_id(rng), entry) for entry in timeline[: entries - batched]]
+    old = timeline[entries - batched :]
+    for i in range(0, len(old), batch_size):
+        data = {_document_id(rng): entry for entry in old[i : i + batch_size]}
+        documents.append((_document_id(rng), {"multi": True, "data": data}))
+    return documents
+
+
+def count_entries(documents: list[tuple[str, dict]]) -> dict[str, int]:
+    """Count documents, batch documents, entries and solid food entries."""
+    counts = {
+        "documents": len(documents),
+        "multi_documents": 0,
+        "entries": 0,
+        "solids": 0,
+    }
+    for _, data in documents:
+        entries = data["data"].values() if data.get("multi") else [data]
+        counts["multi_documents"] += bool(data.get("multi"))
+        for entry in entries:
+            counts["entries"] += 1
+            counts["solids"] += entry.get("mode") == "solids"
+    return counts
+
+
+def _document_id(rng: random.Random) -> str:
+    return uuid.UUID(int=rng.getrandbits(128)).hex[:20]
@@ -1,14 +1,30 @@
 """FastAPI application entry point."""
 
 import logging
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from dotenv import load_dotenv
+
+# Settings are read when services are imported, so load .env before them
+load_dotenv()
+
+# Imported first so startup phases are timed from before the heavy imports
+from services.startup import STARTUP
+
+# isort: split
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from models import HealthResponse
 from routes.allergens import router as allergens_router
+from routes.foods import router as foods_router
+from routes.meals import router as meals_router
+from routes.metrics import router as metrics_router
 from routes.websocket import router as websocket_router
+from services.metrics import HTTP_REQUEST_SECONDS
+from services.photo_processing import PhotoProcessor
 from services.realtime_listener import AllergenCache
 from websocket.connection_manager import ConnectionManager
 
@@ -21,20 +37,30 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Manage application lifespan - start/stop Firebase listener."""
+    """
+    Manage application lifespan - start/stop Firebase listener.
+
+    Startup only loads the file cache; authentication and listener setup
+    run in the background, so requests are served from the warm cache
+    straight away.
+    """
     import asyncio
 
     # Startup
+    STARTUP.mark("imports")
     # Set the event loop for WebSocket broadcasts from Firebase callback thread
     manager = ConnectionManager.get_instance()
     manager.set_event_loop(asyncio.get_event_loop())
 
     cache = AllergenCache.get_instance()
     cache.start_listener()
+    STARTUP.mark("serving")
+    STARTUP.report()
     logger.info("Application startup complete")
     yield
     # Shutdown
     cache.stop_listener()
+    PhotoProcessor.get_instance().shutdown()
     logger.info("Application shutdown complete")
 
 
@@ -61,9 +87,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record request latency per route template, method and status code."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        ).observe(time.perf_counter() - started)
+
+
 # Include routes
 app.include_router(allergens_router, prefix="/api")
+app.include_router(foods_router, prefix="/api")
+app.include_router(meals_router, prefix="/api")
 app.include_router(websocket_router)
+app.include_router(metrics_router)
 
 
 @app.get("/api/health", response_model=HealthResponse)
@@ -75,4 +121,9 @@ async def health_check():
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Several workers elect one leader to run the Firebase listener (see
+    # AllergenCache); reloading only works with a single worker
+    workers = int(os.getenv("WORKERS", "1"))
+    uvicorn.run(
+        "main:app", host="0.0.0.0", port=8000, reload=workers == 1, workers=workers
+    )
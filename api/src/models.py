@@ -1,6 +1,7 @@
 """Pydantic models for API responses."""
 
-from datetime import datetime
+from datetime import date, datetime
+
 from pydantic import BaseModel
 
 
@@ -14,6 +15,13 @@ class Allergen(BaseModel):
 class AllergenResponse(BaseModel):
     allergens: list[Allergen]
     last_updated: datetime
+    version: int | None = None
+    # True while the data is not being kept current (listener down, Firestore
+    # failing, or still connecting after a restart); stale_since is when that
+    # began and upstream_status says why
+    stale: bool = False
+    stale_since: datetime | None = None
+    upstream_status: str | None = None
 
 
 class HealthResponse(BaseModel):
@@ -27,6 +35,13 @@ class RefreshResponse(BaseModel):
     last_updated: datetime
 
 
+class RefreshJobResponse(BaseModel):
+    job_id: int
+    status: str
+    error: str | None = None
+    last_updated: datetime | None = None
+
+
 class FeedEntry(BaseModel):
     timestamp: datetime
     foods: list[str]
@@ -35,3 +50,59 @@ class FeedEntry(BaseModel):
 class FeedLogResponse(BaseModel):
     entries: list[FeedEntry]
     total_count: int
+    # Opaque; pass as `cursor` to get the next page
+    next_cursor: str | None = None
+
+
+class WebSocketStatsResponse(BaseModel):
+    connections: int
+    queue_depth_total: int
+    queue_depth_max: int
+    messages_sent: int
+    dropped_clients: int
+
+
+class AllergenHistory(BaseModel):
+    name: str
+    total_exposures: int
+    weekly_counts: list[int]
+    rolling_7d: list[int]
+    rolling_30d: list[int]
+    longest_gap_days: int | None
+
+
+class AllergenHistoryResponse(BaseModel):
+    start_date: date
+    end_date: date
+    week_starts: list[date]
+    allergens: list[AllergenHistory]
+
+
+class RecognizedFood(BaseModel):
+    name: str
+    allergens: list[str]
+
+
+class MealPhotoResult(BaseModel):
+    content_hash: str
+    foods: list[RecognizedFood]
+    # True when neither decoding nor the model call had to be repeated
+    cached: bool
+
+
+class MealAnalysisResponse(BaseModel):
+    photos: list[MealPhotoResult]
+    allergens: list[str]
+
+
+class FoodStats(BaseModel):
+    name: str
+    # Number of feed entries containing the food; 0 if never logged
+    count: int
+    last_seen: datetime | None
+    days_since: int | None
+    allergens: list[str]
+
+
+class FoodSuggestionsResponse(BaseModel):
+    foods: list[FoodStats]
@@ -1,68 +1,248 @@
 """Allergen API routes."""
 
+import base64
+import binascii
+import json
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException
-
-from models import AllergenResponse, RefreshResponse, FeedLogResponse, FeedEntry
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from cache.response_cache import accepts_gzip, etag_matches
+from models import (
+    AllergenHistoryResponse,
+    AllergenResponse,
+    FeedEntry,
+    FeedLogResponse,
+    RefreshJobResponse,
+    RefreshResponse,
+)
+from services.allergen_service import LOCAL_TIMEZONE, get_allergen_food_map
 from services.realtime_listener import AllergenCache
-from services.huckleberry import fetch_solid_food_entries
 
 router = APIRouter()
 
 
 @router.get("/allergens", response_model=AllergenResponse)
-async def get_allergens():
-    """Returns all allergens with days since last exposure."""
+async def get_allergens(request: Request):
+    """
+    Returns all allergens with days since last exposure.
+
+    The body is pre-encoded once per state version and served as-is (gzipped
+    when accepted); a matching If-None-Match returns 304 Not Modified.
+    """
     cache = AllergenCache.get_instance()
-    allergens, last_updated = cache.get_allergens()
+    encoded = cache.get_encoded_allergens()
 
-    if not allergens:
+    if encoded is None:
         raise HTTPException(
             status_code=503,
             detail="Allergen data not yet available. Please wait for cache to initialize.",
         )
 
-    return AllergenResponse(allergens=allergens, last_updated=last_updated)
+    headers = {
+        "ETag": encoded.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), encoded.etag):
+        return Response(status_code=304, headers=headers)
+
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(
+            encoded.gzip_body, media_type="application/json", headers=headers
+        )
+
+    return Response(encoded.body, media_type="application/json", headers=headers)
+
 
+@router.get("/allergens/history", response_model=AllergenHistoryResponse)
+async def get_allergen_history(
+    days: int = Query(90, ge=1, le=730),
+    allergen: str | None = None,
+):
+    """
+    Returns per-allergen exposure time series for the last `days` days.
+
+    Each allergen has weekly exposure counts (one per entry in week_starts),
+    daily trailing 7- and 30-day exposure counts (one per day from start_date
+    to end_date) and the longest gap in days between exposures.
+    """
+    if allergen is not None and allergen not in get_allergen_food_map():
+        raise HTTPException(status_code=400, detail=f"Unknown allergen: {allergen}")
+
+    cache = AllergenCache.get_instance()
+    # Waits on the cache's update lock, so keep it off the event loop
+    history = await run_in_threadpool(cache.get_exposure_history, days, allergen)
+
+    if history is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Feed data not yet available. Please wait for cache to initialize.",
+        )
 
-@router.post("/refresh", response_model=RefreshResponse)
-async def refresh_cache():
-    """Manually trigger cache refresh."""
+    return AllergenHistoryResponse(**history)
+
+
+@router.post(
+    "/refresh",
+    response_model=RefreshResponse,
+    responses={202: {"model": RefreshJobResponse}},
+)
+async def refresh_cache(
+    wait: bool = True,
+    timeout: float | None = Query(None, gt=0, le=600),
+):
+    """
+    Manually trigger cache refresh.
+
+    The refresh runs on the background refresh worker and joins one already
+    in flight. By default the request waits for it (up to `timeout` seconds,
+    REFRESH_TIMEOUT_SECONDS if unset) without blocking the event loop. With
+    `wait=false`, or if the wait times out, returns 202 with a job to poll at
+    GET /api/refresh/{job_id}.
+    """
     cache = AllergenCache.get_instance()
 
     try:
-        allergens, last_updated = cache.refresh()
+        job_id = cache.start_refresh()
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e))
 
-    return RefreshResponse(
-        status="success",
-        message="Cache refreshed successfully",
-        last_updated=last_updated,
+    if wait and await run_in_threadpool(cache.wait_for_refresh, job_id, timeout):
+        job = cache.get_refresh_job(job_id)
+        if job["status"] == "failed" or job["last_updated"] is None:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Failed to refresh allergen data: {job['error']}",
+            )
+        return RefreshResponse(
+            status="success",
+            message="Cache refreshed successfully",
+            last_updated=job["last_updated"],
+        )
+
+    job = RefreshJobResponse(**cache.get_refresh_job(job_id))
+    return JSONResponse(
+        job.model_dump(mode="json"),
+        status_code=202,
+        headers={"Location": f"/api/refresh/{job_id}"},
+    )
+
+
+@router.get("/refresh/{job_id}", response_model=RefreshJobResponse)
+async def get_refresh_job(job_id: int):
+    """Returns the status of a refresh job started by POST /api/refresh."""
+    job = AllergenCache.get_instance().get_refresh_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown refresh job: {job_id}")
+    return RefreshJobResponse(**job)
+
+
+def encode_feed_cursor(start: float, entry_id: str) -> str:
+    """Encode a feed entry's (start, entry_id) position as an opaque cursor."""
+    raw = json.dumps([start, entry_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_feed_cursor(cursor: str) -> tuple[float, str]:
+    """
+    Decode a cursor made by encode_feed_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        start, entry_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+    is_position = (
+        isinstance(start, (int, float))
+        and not isinstance(start, bool)
+        and isinstance(entry_id, str)
     )
+    if not is_position:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return start, entry_id
+
+
+def _epoch_seconds(value: datetime) -> float:
+    # Dates without an offset are read in the tracker's time zone, not the server's
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=ZoneInfo(LOCAL_TIMEZONE))
+    return value.timestamp()
 
 
 @router.get("/feeds", response_model=FeedLogResponse)
-async def get_feed_log():
-    """Returns all solid food feed entries."""
+async def get_feed_log(
+    before: datetime | None = None,
+    after: datetime | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    food: str | None = None,
+    allergen: str | None = None,
+    cursor: str | None = None,
+):
+    """
+    Returns solid food feed entries, newest first.
+
+    Page through older entries by passing the response's next_cursor as
+    `cursor`. Filter by date range with `before`/`after` (read in
+    LOCAL_TIMEZONE when they have no offset), by a single food name with
+    `food`, or by any food mapped to an allergen with `allergen`.
+    """
+    if allergen is not None and allergen not in get_allergen_food_map():
+        raise HTTPException(status_code=400, detail=f"Unknown allergen: {allergen}")
+
     try:
-        solid_entries = fetch_solid_food_entries()
-
-        # Convert raw entries to response format
-        feed_entries = []
-        for entry in solid_entries:
-            timestamp = datetime.fromtimestamp(entry.get("start", 0), tz=timezone.utc)
-
-            # Extract food names from the foods dict
-            foods_dict = entry.get("foods", {})
-            food_names = []
-            if isinstance(foods_dict, dict):
-                for food_data in foods_dict.values():
-                    if isinstance(food_data, dict) and "created_name" in food_data:
-                        food_names.append(food_data["created_name"])
-
-            feed_entries.append(FeedEntry(timestamp=timestamp, foods=food_names))
-
-        return FeedLogResponse(entries=feed_entries, total_count=len(feed_entries))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch feed log: {str(e)}")
+        position = decode_feed_cursor(cursor) if cursor is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    cache = AllergenCache.get_instance()
+    # Fetch one extra entry to know whether another page exists; the query
+    # waits on the cache's update lock, so keep it off the event loop
+    result = await run_in_threadpool(
+        cache.get_feed_entries,
+        before=_epoch_seconds(before) if before else None,
+        after=_epoch_seconds(after) if after else None,
+        limit=limit + 1,
+        food=food,
+        allergen=allergen,
+        cursor=position,
+    )
+
+    if result is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Feed data not yet available. Please wait for cache to initialize.",
+        )
+
+    solid_entries, total_count = result
+
+    # Convert raw entries to response format
+    feed_entries = []
+    for _, entry in solid_entries[:limit]:
+        timestamp = datetime.fromtimestamp(entry.get("start", 0), tz=timezone.utc)
+
+        # Extract food names from the foods dict
+        foods_dict = entry.get("foods", {})
+        food_names = []
+        if isinstance(foods_dict, dict):
+            for food_data in foods_dict.values():
+                if isinstance(food_data, dict) and "created_name" in food_data:
+                    food_names.append(food_data["created_name"])
+
+        feed_entries.append(FeedEntry(timestamp=timestamp, foods=food_names))
+
+    next_cursor = None
+    if len(solid_entries) > limit:
+        entry_id, entry = solid_entries[limit - 1]
+        next_cursor = encode_feed_cursor(entry.get("start", 0), entry_id)
+
+    return FeedLogResponse(
+        entries=feed_entries, total_count=total_count, next_cursor=next_cursor
+    )
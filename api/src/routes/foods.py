@@ -0,0 +1,47 @@
+"""Per-food lookup and autocomplete routes."""
+
+from fastapi import APIRouter, HTTPException, Path, Query
+from starlette.concurrency import run_in_threadpool
+
+from models import FoodStats, FoodSuggestionsResponse
+from services.realtime_listener import AllergenCache
+
+router = APIRouter()
+
+
+@router.get("/foods", response_model=FoodSuggestionsResponse)
+async def suggest_foods(
+    prefix: str = Query("", max_length=100),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Autocomplete eaten food names starting with `prefix` (case insensitive).
+
+    Foods are returned alphabetically with their entry count, last-seen time
+    and allergens; the lookup is a binary search over the sorted food names.
+    """
+    # Lookups wait on the cache's update lock, so keep them off the event loop
+    cache = AllergenCache.get_instance()
+    foods = await run_in_threadpool(cache.suggest_foods, prefix, limit)
+    if foods is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Feed data not yet available. Please wait for cache to initialize.",
+        )
+    return FoodSuggestionsResponse(foods=[FoodStats(**food) for food in foods])
+
+
+@router.get("/foods/{food}", response_model=FoodStats)
+async def get_food(food: str = Path(max_length=100)):
+    """
+    Returns when a food was last eaten, how many entries contain it, and the
+    allergens it maps to. Foods never logged have a count of 0.
+    """
+    cache = AllergenCache.get_instance()
+    stats = await run_in_threadpool(cache.get_food, food)
+    if stats is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Feed data not yet available. Please wait for cache to initialize.",
+        )
+    return FoodStats(**stats)
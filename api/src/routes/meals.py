@@ -0,0 +1,62 @@
+"""Meal photo logging routes."""
+
+import logging
+import os
+from typing import Annotated
+
+from fastapi import APIRouter, File, HTTPException, UploadFile
+
+from models import MealAnalysisResponse
+from services.meal_recognition import RecognitionError, RecognitionQueueFull
+from services.meal_service import analyze_meal_photos
+from services.photo_processing import PhotoError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+MAX_PHOTOS = int(os.getenv("MEAL_MAX_PHOTOS", "10"))
+MAX_PHOTO_BYTES = int(os.getenv("MEAL_MAX_PHOTO_MB", "20")) * 2**20
+
+
+@router.post("/meals/analyze", response_model=MealAnalysisResponse)
+async def analyze_meal(photos: Annotated[list[UploadFile], File()]):
+    """
+    Recognize the foods in uploaded meal photos and match them to allergens.
+
+    Accepts up to MEAL_MAX_PHOTOS photos (JPEG, PNG, HEIC, ...) as multipart
+    `photos` fields. Re-uploading a photo reuses its cached decode and
+    recognition. Returns 503 when the model queue is full.
+    """
+    if len(photos) > MAX_PHOTOS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_PHOTOS} photos per request"
+        )
+
+    contents = []
+    for photo in photos:
+        data = await photo.read(MAX_PHOTO_BYTES + 1)
+        if len(data) > MAX_PHOTO_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"{photo.filename} is larger than {MAX_PHOTO_BYTES // 2**20} MB",
+            )
+        if not data:
+            raise HTTPException(status_code=400, detail=f"{photo.filename} is empty")
+        contents.append(data)
+
+    try:
+        result = await analyze_meal_photos(contents)
+    except PhotoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RecognitionQueueFull as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "5"}
+        )
+    except RecognitionError as e:
+        logger.error("Meal recognition failed: %s", e)
+        raise HTTPException(
+            status_code=502, detail="Could not recognize the foods in the photo"
+        )
+
+    return MealAnalysisResponse(**result)
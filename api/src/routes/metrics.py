@@ -0,0 +1,15 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter, Response
+
+from services.metrics import REGISTRY
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Returns pipeline, listener, cache and HTTP metrics in Prometheus text format."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
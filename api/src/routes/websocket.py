@@ -4,6 +4,7 @@ import logging
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from models import WebSocketStatsResponse
 from services.realtime_listener import AllergenCache
 from websocket.connection_manager import ConnectionManager
 
@@ -13,24 +14,25 @@ router = APIRouter()
 
 
 @router.websocket("/ws/allergens")
-async def websocket_allergens(websocket: WebSocket):
-    """WebSocket endpoint for real-time allergen updates."""
+async def websocket_allergens(websocket: WebSocket, since: int | None = None):
+    """
+    WebSocket endpoint for real-time allergen updates.
+
+    The first message is a full "snapshot" (including each allergen's food
+    list); later messages are "diff"s carrying only allergens whose exposure
+    changed. Reconnecting clients pass `since=<version>` to receive just what
+    they missed.
+    """
     manager = ConnectionManager.get_instance()
     await manager.connect(websocket)
 
     try:
-        # Send current allergen data immediately on connect
+        # Bring the client up to date immediately on connect
         cache = AllergenCache.get_instance()
-        allergens, last_updated = cache.get_allergens()
+        message = cache.get_update_since(since)
 
-        if allergens:
-            await websocket.send_json(
-                {
-                    "type": "update",
-                    "allergens": allergens,
-                    "last_updated": last_updated.isoformat() if last_updated else None,
-                }
-            )
+        if message:
+            await manager.send(websocket, message)
 
         # Keep connection alive waiting for messages/disconnect
         while True:
@@ -40,6 +42,12 @@ async def websocket_allergens(websocket: WebSocket):
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected normally")
     except Exception as e:
-        logger.warning("WebSocket error: %s", e)
+        logger.warning("WebSocket error: %s", e, exc_info=True)
     finally:
         manager.disconnect(websocket)
+
+
+@router.get("/api/ws/stats", response_model=WebSocketStatsResponse)
+async def websocket_stats():
+    """Returns WebSocket connection, queue depth and eviction counters."""
+    return WebSocketStatsResponse(**ConnectionManager.get_instance().stats())
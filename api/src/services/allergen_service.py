@@ -1,11 +1,30 @@
 """Business logic for allergen tracking."""
 
-import pandas as pd
-from datetime import date
+import json
+import os
+from collections.abc import Callable, Iterable
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
 
+from services.food_events import FoodEvents, parse_food_events
+from services.food_matcher import KeywordMatcher
 from services.huckleberry import fetch_solid_food_entries
 
+if TYPE_CHECKING:
+    import pandas as pd
 
+
+# JSON file of allergen -> foods, reloaded when it changes; the built-in
+# ALLERGEN_FOOD_MAP applies while it does not exist
+ALLERGEN_CONFIG_FILE = Path(
+    os.getenv(
+        "ALLERGEN_CONFIG_FILE", Path(__file__).parent.parent.parent / "allergens.json"
+    )
+)
+
+# Built-in allergen -> foods map, used unless ALLERGEN_CONFIG_FILE exists
 ALLERGEN_FOOD_MAP = {
     "dairy": [
         "cheese",
@@ -21,9 +40,18 @@ ALLERGEN_FOOD_MAP = {
         "cottage cheese",
         "ricotta cheese",
         "pancake",
-        "ice cream"
+        "ice cream",
+    ],
+    "egg": [
+        "egg",
+        "omelette",
+        "omlette",
+        "scrambled egg",
+        "egg white",
+        "egg yolk",
+        "challah",
+        "pancake",
     ],
-    "egg": ["egg", "omelette", "omlette", "scrambled egg", "egg white", "egg yolk", "challah", "pancake"],
     "fish": ["salmon", "sardine", "tuna", "cod", "tilapia", "anchovy", "fish"],
     "crustacean shellfish": [
         "shrimp",
@@ -32,7 +60,7 @@ ALLERGEN_FOOD_MAP = {
         "crab",
         "crayfish",
         "crawfish",
-        "shrimp gyoza (trader joe's)"
+        "shrimp gyoza (trader joe's)",
     ],
     "peanut": ["peanut", "peanut butter", "bamba"],
     "tree nut": [
@@ -60,28 +88,173 @@ ALLERGEN_FOOD_MAP = {
         "matzah",
         "challah",
         "shrimp gyoza (trader joe's)",
-        "pancake"
+        "pancake",
+    ],
+    "soy": [
+        "soybean oil",
+        "soy milk",
+        "soybean",
+        "edamame",
+        "tofu",
+        "shrimp gyoza (trader joe's)",
     ],
-    "soy": ["soybean oil", "soy milk", "soybean", "edamame", "tofu", "shrimp gyoza (trader joe's)"],
     "sesame": ["sesame", "sesame oil", "tahini", "hummus"],
 }
 
+# Time zone that exposure dates and day counts are calculated in
+LOCAL_TIMEZONE = os.getenv("TIMEZONE", "US/Eastern")
+
+
+def local_today() -> date:
+    """Return today's date in LOCAL_TIMEZONE."""
+    return datetime.now(ZoneInfo(LOCAL_TIMEZONE)).date()
+
+
+def build_food_allergen_index(
+    allergen_food_map: dict[str, list[str]],
+) -> dict[str, tuple[str, ...]]:
+    """
+    Invert an allergen -> foods map into a lowercased food -> allergens index.
+
+    Foods listed under several allergens (e.g. "pancake") map to all of them.
+    """
+    index: dict[str, list[str]] = {}
+    for allergen, foods in allergen_food_map.items():
+        for food in foods:
+            allergens = index.setdefault(food.lower(), [])
+            if allergen not in allergens:
+                allergens.append(allergen)
+    return {food: tuple(allergens) for food, allergens in index.items()}
+
+
+FOOD_ALLERGEN_INDEX = build_food_allergen_index(ALLERGEN_FOOD_MAP)
+
+# "exact" matches whole food names against the allergen food map; "keyword"
+# also finds allergen keywords inside free-text names ("salmon cakes")
+MATCH_MODES = ("exact", "keyword")
+
+# Food names whose keyword matches are memoized; comfortably above the
+# number of distinct foods a feed history holds
+KEYWORD_MEMO_SIZE = int(os.getenv("KEYWORD_MEMO_SIZE", "10000"))
+
+
+class CompiledFoodMap:
+    """An allergen -> foods map together with the matchers built from it."""
+
+    def __init__(self, food_map: dict[str, list[str]], index=None):
+        self.food_map = food_map
+        self.index = index if index is not None else build_food_allergen_index(food_map)
+        self._keyword_matcher: KeywordMatcher | None = None
+
+    def matcher(self, match_mode: str = "exact") -> Callable[[str], tuple[str, ...]]:
+        """Return a function mapping a lowercased food name to its allergens."""
+        if match_mode == "exact":
+            index = self.index
+            return lambda food: index.get(food, ())
+        if match_mode == "keyword":
+            if self._keyword_matcher is None:
+                self._keyword_matcher = KeywordMatcher(self.food_map, KEYWORD_MEMO_SIZE)
+            return self._keyword_matcher
+
+        raise ValueError(
+            f"Unknown match mode {match_mode!r}, expected one of {', '.join(MATCH_MODES)}"
+        )
+
+
+# Swapped as a whole on reload, so readers never see a map and index that
+# disagree
+_active = CompiledFoodMap(ALLERGEN_FOOD_MAP, FOOD_ALLERGEN_INDEX)
+
+
+def get_compiled_food_map() -> CompiledFoodMap:
+    """Return the allergen food map currently in effect, with its matchers."""
+    return _active
+
+
+def get_allergen_food_map() -> dict[str, list[str]]:
+    """Return the allergen -> foods map currently in effect."""
+    return _active.food_map
+
+
+def get_food_matcher(match_mode: str = "exact") -> Callable[[str], tuple[str, ...]]:
+    """Return a function mapping a lowercased food name to its allergens."""
+    return _active.matcher(match_mode)
+
+
+def load_allergen_food_map(path) -> dict[str, list[str]]:
+    """
+    Read an allergen -> foods map from a JSON file.
+
+    Raises:
+        ValueError: If the file is not a JSON object mapping allergen names to
+            lists of food names
+    """
+    with open(path) as f:
+        food_map = json.load(f)
+
+    if not isinstance(food_map, dict) or not food_map:
+        raise ValueError(f"{path}: expected a non-empty object of allergen -> foods")
+    for allergen, foods in food_map.items():
+        if not allergen or not isinstance(foods, list):
+            raise ValueError(f"{path}: foods for {allergen!r} must be a list")
+        if not all(isinstance(food, str) and food for food in foods):
+            raise ValueError(
+                f"{path}: foods for {allergen!r} must be non-empty strings"
+            )
+    return food_map
+
+
+def set_allergen_food_map(food_map: dict[str, list[str]]) -> CompiledFoodMap:
+    """
+    Compile and switch to a new allergen -> foods map.
+
+    Returns:
+        The previously active CompiledFoodMap
+    """
+    global _active
+
+    previous = _active
+    _active = CompiledFoodMap(food_map)
+    return previous
+
+
+# "python" streams entries into a compact FoodEvents table; "pandas" builds the
+# (datetime, food) DataFrame from process_solid_food_data
+PARSER_ENGINES = ("python", "pandas")
+
+
+def parse_solid_food_data(
+    solid_food_data_raw: list[dict], engine: str = "python"
+) -> "FoodEvents | pd.DataFrame":
+    """Parse raw solid food entries with the given engine, see PARSER_ENGINES."""
+    if engine == "python":
+        return parse_food_events(solid_food_data_raw)
+    if engine == "pandas":
+        return process_solid_food_data(solid_food_data_raw)
+
+    raise ValueError(
+        f"Unknown parser engine {engine!r}, expected one of {', '.join(PARSER_ENGINES)}"
+    )
+
 
-def process_solid_food_data(solid_food_data_raw: list[dict]) -> pd.DataFrame:
+def process_solid_food_data(solid_food_data_raw: list[dict]) -> "pd.DataFrame":
     """Clean and process raw solid food data into a DataFrame."""
+    import pandas as pd
+
     df = pd.DataFrame(solid_food_data_raw)
 
     # Convert timestamps
     df["start"] = pd.to_datetime(df["start"], unit="s")
-    df["start"] = df["start"].dt.tz_localize("UTC").dt.tz_convert("US/Eastern")
+    df["start"] = df["start"].dt.tz_localize("UTC").dt.tz_convert(LOCAL_TIMEZONE)
 
     # Flatten the food entries
     df["foods_list"] = df["foods"].apply(
         lambda x: list(x.values()) if isinstance(x, dict) else []
     )
-    df_exploded = df.explode("foods_list")
-    df_final = pd.json_normalize(df_exploded["foods_list"].dropna())
-    df_exploded = df_exploded.reset_index(drop=True)
+    df_exploded = df.explode("foods_list").reset_index(drop=True)
+    foods = df_exploded["foods_list"].dropna()
+    # Keep each food aligned with its own entry when some entries have no foods
+    df_final = pd.json_normalize(foods.tolist()).set_axis(foods.index)
     df = pd.concat(
         [df_exploded.drop(["foods", "foods_list"], axis=1), df_final], axis=1
     )
@@ -94,51 +267,214 @@ def process_solid_food_data(solid_food_data_raw: list[dict]) -> pd.DataFrame:
     return df
 
 
-def calculate_allergen_exposure(df: pd.DataFrame) -> list[dict]:
+def calculate_allergen_exposure(
+    data: "FoodEvents | pd.DataFrame", match_mode: str = "exact"
+) -> list[dict]:
     """
     Calculate days since last exposure for each allergen.
 
+    Args:
+        data: FoodEvents, or a DataFrame of (datetime, food) rows from
+            process_solid_food_data
+        match_mode: How food names are matched to allergens, see MATCH_MODES
+
     Returns:
         List of allergen data dicts sorted by days_since_exposure (descending)
     """
-    today = date.today()
-    allergen_data = []
+    today = local_today()
+
+    # One pass for each food's latest timestamp, then fan each food out to its
+    # allergens through the matcher
+    if isinstance(data, FoodEvents):
+        tz = ZoneInfo(LOCAL_TIMEZONE)
+        last_by_food = data.last_seen_by_food().items()
 
-    for allergen, foods in ALLERGEN_FOOD_MAP.items():
-        # Find entries matching this allergen's foods (case insensitive)
-        foods_lower = [f.lower() for f in foods]
-        mask = df["food"].isin(foods_lower)
-        matching_entries = df[mask]
+        def to_date(last_seen):
+            return datetime.fromtimestamp(last_seen, tz=tz).date()
+    else:
+        last_by_food = data.groupby("food", sort=False)["datetime"].max().items()
+
+        def to_date(last_seen):
+            return last_seen.date()
+
+    compiled = get_compiled_food_map()
+    last_by_allergen = last_exposure_by_allergen(
+        last_by_food, compiled.matcher(match_mode)
+    )
 
-        if matching_entries.empty:
-            last_exposure_date = None
-            days_since = None
-        else:
-            last_exposure_date = matching_entries["datetime"].max().date()
-            days_since = (today - last_exposure_date).days
+    allergen_data = []
+    for allergen, foods in compiled.food_map.items():
+        last_seen = last_by_allergen.get(allergen)
+        last_exposure_date = to_date(last_seen) if last_seen is not None else None
 
         allergen_data.append(
-            {
-                "name": allergen,
-                "days_since_exposure": days_since,
-                "last_exposure_date": last_exposure_date.isoformat()
-                if last_exposure_date
-                else None,
-                "foods": foods,
-            }
+            build_allergen_result(allergen, foods, last_exposure_date, today)
         )
 
-    # Sort by days_since_exposure descending (most urgent first), None values at end
+    return sort_allergens(allergen_data)
+
+
+def last_exposure_by_allergen(
+    last_by_food: Iterable[tuple[str, object]],
+    match: Callable[[str], tuple[str, ...]],
+    allergens: set[str] | None = None,
+) -> dict:
+    """
+    Reduce per-food last-seen times to per-allergen last exposure times.
+
+    Args:
+        last_by_food: (food, last_seen) pairs, one per distinct food
+        match: Food matcher from get_food_matcher
+        allergens: Only collect these allergens (all when None)
+    """
+    last_by_allergen = {}
+    for food, last_seen in last_by_food:
+        for allergen in match(food):
+            if allergens is not None and allergen not in allergens:
+                continue
+            current = last_by_allergen.get(allergen)
+            if current is None or last_seen > current:
+                last_by_allergen[allergen] = last_seen
+    return last_by_allergen
+
+
+def build_allergen_result(
+    allergen: str, foods: list[str], last_exposure_date: date | None, today: date
+) -> dict:
+    """Build the result dict for a single allergen."""
+    return {
+        "name": allergen,
+        "days_since_exposure": (today - last_exposure_date).days
+        if last_exposure_date
+        else None,
+        "last_exposure_date": last_exposure_date.isoformat()
+        if last_exposure_date
+        else None,
+        "foods": foods,
+    }
+
+
+def apply_days_since(allergen_data: list[dict], today: date) -> list[dict]:
+    """
+    Recompute days_since_exposure from last_exposure_date for the given day.
+
+    Returns:
+        New list of allergen data dicts sorted by days_since_exposure (descending)
+    """
+    return sort_allergens(
+        [
+            build_allergen_result(
+                a["name"],
+                a["foods"],
+                date.fromisoformat(a["last_exposure_date"])
+                if a["last_exposure_date"]
+                else None,
+                today,
+            )
+            for a in allergen_data
+        ]
+    )
+
+
+def sort_allergens(allergen_data: list[dict]) -> list[dict]:
+    """Sort by days_since_exposure descending (most urgent first), None values at end."""
     allergen_data.sort(
         key=lambda x: (x["days_since_exposure"] is None, x["days_since_exposure"] or 0),
         reverse=True,
     )
-
     return allergen_data
 
 
-def get_allergen_data() -> list[dict]:
+def diff_allergens(old: list[dict], new: list[dict]) -> list[dict]:
+    """
+    Return compact changes between two allergen result lists.
+
+    Only allergens whose days_since_exposure, last_exposure_date or food list
+    differ (or that are new) are included. The food list is only included
+    when it changed, since it rarely does. Allergens dropped from `new` are
+    not listed; the caller signals them through the new ordering.
+    """
+    previous = {a["name"]: a for a in old}
+    changes = []
+    for allergen in new:
+        before = previous.get(allergen["name"])
+        foods_changed = before is None or before["foods"] != allergen["foods"]
+        if (
+            foods_changed
+            or before["days_since_exposure"] != allergen["days_since_exposure"]
+            or before["last_exposure_date"] != allergen["last_exposure_date"]
+        ):
+            change = {
+                "name": allergen["name"],
+                "days_since_exposure": allergen["days_since_exposure"],
+                "last_exposure_date": allergen["last_exposure_date"],
+            }
+            if foods_changed:
+                change["foods"] = allergen["foods"]
+            changes.append(change)
+    return changes
+
+
+def normalize_food_name(food: str) -> str:
+    """Normalize a user-supplied food name to the lowercased form entries store."""
+    return food.strip().lower()
+
+
+def allergens_for_foods(foods: set[str], match_mode: str = "exact") -> set[str]:
+    """Return the allergens matched by any of the given food names."""
+    match = get_food_matcher(match_mode)
+    return {allergen for food in foods for allergen in match(food)}
+
+
+def foods_for_allergen(
+    foods: Iterable[str], allergen: str, match_mode: str = "exact"
+) -> set[str]:
+    """Return the food names that map to the given allergen."""
+    match = get_food_matcher(match_mode)
+    return {food for food in foods if allergen in match(food)}
+
+
+def update_allergen_exposure(
+    allergen_data: list[dict], store, allergens: set[str], match_mode: str = "exact"
+) -> list[dict]:
+    """
+    Recalculate only the given allergens from a FeedStore's last-seen index.
+
+    Results for allergens not listed are carried over from allergen_data
+    unchanged; any allergen missing from allergen_data is always calculated.
+
+    Returns:
+        List of allergen data dicts sorted by days_since_exposure (descending)
+    """
+    today = local_today()
+    tz = ZoneInfo(LOCAL_TIMEZONE)
+    compiled = get_compiled_food_map()
+    food_map = compiled.food_map
+    results = {a["name"]: a for a in allergen_data}
+    stale = {a for a in food_map if a in allergens or a not in results}
+
+    last_by_allergen = last_exposure_by_allergen(
+        ((food, store.last_seen(food)) for food in store.foods()),
+        compiled.matcher(match_mode),
+        stale,
+    )
+
+    for allergen in stale:
+        last_seen = last_by_allergen.get(allergen)
+        last_exposure_date = (
+            datetime.fromtimestamp(last_seen, tz=tz).date()
+            if last_seen is not None
+            else None
+        )
+        results[allergen] = build_allergen_result(
+            allergen, food_map[allergen], last_exposure_date, today
+        )
+
+    return sort_allergens([results[allergen] for allergen in food_map])
+
+
+def get_allergen_data(match_mode: str = "exact", engine: str = "python") -> list[dict]:
     """Fetch and process allergen exposure data."""
     solid_food_data = fetch_solid_food_entries()
-    df = process_solid_food_data(solid_food_data)
-    return calculate_allergen_exposure(df)
+    data = parse_solid_food_data(solid_food_data, engine)
+    return calculate_allergen_exposure(data, match_mode)
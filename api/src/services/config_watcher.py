@@ -0,0 +1,69 @@
+"""Polling watcher that reports when a file changes."""
+
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class FileWatcher:
+    """
+    Calls a function on a background thread whenever a file changes.
+
+    The file's modification time and size are polled every `interval`
+    seconds; creating, editing, replacing or deleting the file all count as
+    a change. Polling needs no extra dependency and copes with editors and
+    config tooling that replace files by renaming.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        callback: Callable[[], None],
+        interval: float = 5.0,
+        name: str = "file-watcher",
+    ):
+        self._path = Path(path)
+        self._callback = callback
+        self._interval = interval
+        self._name = name
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._signature = self._stat()
+
+    def start(self) -> None:
+        """Start polling, treating the file's current state as seen."""
+        if self._thread is not None:
+            return
+        self._signature = self._stat()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            signature = self._stat()
+            if signature == self._signature:
+                continue
+            self._signature = signature
+            try:
+                self._callback()
+            except Exception:
+                logger.exception("Change handler for %s failed", self._path)
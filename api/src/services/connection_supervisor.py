@@ -0,0 +1,217 @@
+"""Upstream session supervision: reconnect backoff and a circuit breaker."""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class Backoff:
+    """Exponential backoff with full jitter: delay n is uniform in [0, base * 2**n], capped."""
+
+    def __init__(self, base: float = 1.0, cap: float = 300.0):
+        self._base = base
+        self._cap = cap
+        self._attempt = 0
+
+    def next_delay(self) -> float:
+        """Return the delay before the next attempt and count the attempt."""
+        ceiling = min(self._cap, self._base * 2**self._attempt)
+        self._attempt += 1
+        return random.uniform(0, ceiling)
+
+    def reset(self) -> None:
+        """Start again from the base delay after a success."""
+        self._attempt = 0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail fast with CircuitOpenError. Once `reset_timeout` seconds have
+    passed it is half-open: the next call goes through as a trial, and
+    closes the circuit on success or reopens it on failure. `on_change` is
+    called after the circuit opens or closes.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        on_change: Callable[[], None] | None = None,
+    ):
+        self._threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self.opened_since: datetime | None = None
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half_open"."""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self._reset_timeout:
+            return "open"
+        return "half_open"
+
+    def call(self, fn: Callable[[], object]) -> object:
+        """Call fn unless the circuit is open, recording whether it succeeded."""
+        with self._lock:
+            if self._state() == "open":
+                remaining = self._reset_timeout - (time.monotonic() - self._opened_at)
+                raise CircuitOpenError(
+                    f"Firestore unavailable after {self._failures} failures, "
+                    f"retrying in {remaining:.0f}s"
+                )
+
+        try:
+            result = fn()
+        except Exception:
+            self._record_failure()
+            raise
+        self._record_success()
+        return result
+
+    def _record_success(self) -> None:
+        with self._lock:
+            closed = self._opened_at is not None
+            if closed:
+                logger.info("Circuit closed after a successful trial call")
+            self._failures = 0
+            self._opened_at = None
+            self.opened_since = None
+        if closed and self._on_change is not None:
+            self._on_change()
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            opened = False
+            if self._state() == "half_open" or self._failures >= self._threshold:
+                if self._opened_at is None:
+                    opened = True
+                    self.opened_since = datetime.now(timezone.utc)
+                    logger.warning("Circuit opened after %d failures", self._failures)
+                self._opened_at = time.monotonic()
+        if opened and self._on_change is not None:
+            self._on_change()
+
+
+class ConnectionSupervisor:
+    """
+    Keeps an upstream connection alive on a background thread.
+
+    `connect` is retried with jittered exponential backoff until it
+    succeeds. While connected, `maintain` (e.g. proactive token refresh) and
+    `healthy` run every `interval` seconds; if either fails, `disconnect` is
+    called and the connection is re-established with backoff.
+
+    `status` is "starting" before the first connection, then "connected" or
+    "reconnecting"; `since` is when that status began. `on_status` is
+    called after every status change.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], None],
+        disconnect: Callable[[], None],
+        maintain: Callable[[], None],
+        healthy: Callable[[], bool],
+        interval: float = 30.0,
+        backoff: Backoff | None = None,
+        name: str = "connection-supervisor",
+        on_status: Callable[[], None] | None = None,
+    ):
+        self._connect = connect
+        self._disconnect = disconnect
+        self._maintain = maintain
+        self._healthy = healthy
+        self._interval = interval
+        self._backoff = backoff or Backoff()
+        self._name = name
+        self._on_status = on_status
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.status = "starting"
+        self.since = datetime.now(timezone.utc)
+        self.reconnects = 0
+
+    def start(self) -> None:
+        """Start connecting on the supervisor thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop supervising once the current attempt or check finishes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _set_status(self, status: str) -> None:
+        if status != self.status:
+            self.status = status
+            self.since = datetime.now(timezone.utc)
+            if self._on_status is not None:
+                self._on_status()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self.status != "connected":
+                try:
+                    self._connect()
+                except Exception as e:
+                    delay = self._backoff.next_delay()
+                    logger.warning("Connect failed, retrying in %.1fs: %s", delay, e)
+                    logger.debug("Connect failure", exc_info=True)
+                    # Drop whatever the failed attempt set up before retrying
+                    try:
+                        self._disconnect()
+                    except Exception:
+                        logger.exception("Error closing failed connection")
+                    if self._stop.wait(delay):
+                        return
+                    continue
+                self._backoff.reset()
+                self._set_status("connected")
+
+            if self._stop.wait(self._interval):
+                return
+
+            try:
+                self._maintain()
+                healthy = self._healthy()
+            except Exception as e:
+                logger.warning("Session maintenance failed: %s", e)
+                logger.debug("Session maintenance failure", exc_info=True)
+                healthy = False
+            if healthy:
+                continue
+
+            logger.warning("Upstream connection lost, reconnecting")
+            self.reconnects += 1
+            self._set_status("reconnecting")
+            try:
+                self._disconnect()
+            except Exception:
+                logger.exception("Error closing lost connection")
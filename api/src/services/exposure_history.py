@@ -0,0 +1,207 @@
+"""Columnar per-allergen exposure history for time-series analytics."""
+
+from collections.abc import Callable, Iterable
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Trailing windows, in days, of the rolling exposure counts
+ROLLING_WINDOWS = (7, 30)
+
+
+class ExposureHistory:
+    """
+    Exposure events stored as parallel (local day, allergen id) NumPy columns.
+
+    Each solid food entry contributes one row per allergen its foods match,
+    keyed by entry id so an edited or deleted entry can be retracted. Days are
+    proleptic ordinals in the configured time zone, computed once on insert so
+    queries are pure array arithmetic. Removed rows are masked out and the
+    columns are compacted once more than half of them are dead.
+    """
+
+    def __init__(
+        self,
+        allergens: Iterable[str],
+        match: Callable[[str], tuple[str, ...]],
+        tz_name: str,
+        capacity: int = 1024,
+    ):
+        self._tz = ZoneInfo(tz_name)
+        self._days = np.empty(capacity, dtype=np.int32)
+        self._allergen_col = np.empty(capacity, dtype=np.int16)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._size = 0
+        self._dead = 0
+        self._rows: dict[str, list[int]] = {}
+        self.configure(allergens, match)
+
+    def __len__(self) -> int:
+        return self._size - self._dead
+
+    def configure(
+        self, allergens: Iterable[str], match: Callable[[str], tuple[str, ...]]
+    ) -> None:
+        """Switch to a new allergen list and matcher, dropping all exposure events."""
+        self.clear()
+        self._allergens = list(allergens)
+        self._allergen_ids = {name: i for i, name in enumerate(self._allergens)}
+        self._match = match
+
+    def clear(self) -> None:
+        """Remove all exposure events."""
+        self._alive[: self._size] = False
+        self._size = 0
+        self._dead = 0
+        self._rows.clear()
+
+    def add(self, entry_id: str, start: float, foods: Iterable[str]) -> None:
+        """Record the allergen exposures of one entry, replacing any previous ones."""
+        if entry_id in self._rows:
+            self.remove(entry_id)
+
+        allergen_ids = sorted(
+            {self._allergen_ids[a] for food in foods for a in self._match(food)}
+        )
+        if not allergen_ids:
+            return
+
+        count = len(allergen_ids)
+        self._reserve(count)
+        rows = range(self._size, self._size + count)
+        day = datetime.fromtimestamp(start, tz=self._tz).toordinal()
+        self._days[rows.start : rows.stop] = day
+        self._allergen_col[rows.start : rows.stop] = allergen_ids
+        self._alive[rows.start : rows.stop] = True
+        self._size += count
+        self._rows[entry_id] = list(rows)
+
+    def remove(self, entry_id: str) -> None:
+        """Retract the exposures recorded for an entry, if any."""
+        rows = self._rows.pop(entry_id, None)
+        if not rows:
+            return
+
+        self._alive[rows] = False
+        self._dead += len(rows)
+        if self._dead > self._size // 2:
+            self._compact()
+
+    def summarize(self, start: date, end: date, allergen: str | None = None) -> dict:
+        """
+        Build exposure time series for the days from start to end inclusive.
+
+        Args:
+            start: First day of the window
+            end: Last day of the window (usually today)
+            allergen: Only summarize this allergen (all when None)
+
+        Returns:
+            dict with "start_date", "end_date", "week_starts" (the Monday of
+            each week overlapping the window) and an "allergens" list of
+            per-allergen totals, weekly counts, daily rolling counts and the
+            longest gap in days between exposures (including the gap since
+            the last exposure, up to end)
+        """
+        n = len(self._allergens)
+        alive = self._alive[: self._size]
+        days = self._days[: self._size][alive].astype(np.int64)
+        ids = self._allergen_col[: self._size][alive].astype(np.int64)
+
+        first, last = start.toordinal(), end.toordinal()
+        span = last - first + 1
+
+        # Daily counts per allergen, padded at the front so the widest
+        # trailing window is complete on the first day
+        pad = max(ROLLING_WINDOWS) - 1
+        width = span + pad
+        in_padded = (days >= first - pad) & (days <= last)
+        daily = np.bincount(
+            ids[in_padded] * width + (days[in_padded] - (first - pad)),
+            minlength=n * width,
+        ).reshape(n, width)
+        cumulative = np.concatenate(
+            [np.zeros((n, 1), dtype=np.int64), np.cumsum(daily, axis=1)], axis=1
+        )
+        window_end = np.arange(pad, width) + 1
+        rolling = {
+            w: cumulative[:, window_end] - cumulative[:, window_end - w]
+            for w in ROLLING_WINDOWS
+        }
+
+        # Weekly counts on Monday-aligned weeks
+        week_zero = first - start.weekday()
+        n_weeks = (last - week_zero) // 7 + 1
+        in_window = (days >= first) & (days <= last)
+        weekly = np.bincount(
+            ids[in_window] * n_weeks + (days[in_window] - week_zero) // 7,
+            minlength=n * n_weeks,
+        ).reshape(n, n_weeks)
+
+        # Longest gap between consecutive exposure days, per allergen
+        totals = np.bincount(ids, minlength=n)
+        order = np.lexsort((days, ids))
+        sorted_days, sorted_ids = days[order], ids[order]
+        same = sorted_ids[1:] == sorted_ids[:-1]
+        longest = np.zeros(n, dtype=np.int64)
+        np.maximum.at(longest, sorted_ids[1:][same], np.diff(sorted_days)[same])
+        latest = np.full(n, np.iinfo(np.int64).min)
+        np.maximum.at(latest, ids, days)
+        seen = totals > 0
+        longest[seen] = np.maximum(longest[seen], np.maximum(last - latest[seen], 0))
+
+        selected = range(n) if allergen is None else [self._allergen_ids[allergen]]
+        return {
+            "start_date": start,
+            "end_date": end,
+            "week_starts": [
+                date.fromordinal(week_zero) + timedelta(weeks=i) for i in range(n_weeks)
+            ],
+            "allergens": [
+                {
+                    "name": self._allergens[i],
+                    "total_exposures": int(totals[i]),
+                    "weekly_counts": weekly[i].tolist(),
+                    "rolling_7d": rolling[7][i].tolist(),
+                    "rolling_30d": rolling[30][i].tolist(),
+                    "longest_gap_days": int(longest[i]) if seen[i] else None,
+                }
+                for i in selected
+            ],
+        }
+
+    def _reserve(self, count: int) -> None:
+        needed = self._size + count
+        capacity = len(self._days)
+        if needed <= capacity:
+            return
+
+        while capacity < needed:
+            capacity *= 2
+        self._days = _grow(self._days, capacity)
+        self._allergen_col = _grow(self._allergen_col, capacity)
+        self._alive = _grow(self._alive, capacity, fill=False)
+
+    def _compact(self) -> None:
+        alive = self._alive[: self._size]
+        new_index = np.cumsum(alive) - 1
+        live = int(alive.sum())
+
+        self._days[:live] = self._days[: self._size][alive]
+        self._allergen_col[:live] = self._allergen_col[: self._size][alive]
+        self._alive[:live] = True
+        self._alive[live : self._size] = False
+        self._rows = {
+            entry_id: new_index[rows].tolist() for entry_id, rows in self._rows.items()
+        }
+        self._size = live
+        self._dead = 0
+
+
+def _grow(column: np.ndarray, capacity: int, fill=None) -> np.ndarray:
+    grown = np.empty(capacity, dtype=column.dtype)
+    grown[: len(column)] = column
+    if fill is not None:
+        grown[len(column) :] = fill
+    return grown
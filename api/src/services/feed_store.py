@@ -0,0 +1,288 @@
+"""Keyed in-memory store of solid food entries for incremental updates."""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import TYPE_CHECKING
+
+from services.food_events import entry_food_names
+from services.huckleberry import expand_interval_document
+
+if TYPE_CHECKING:
+    from services.exposure_history import ExposureHistory
+
+# Batches larger than this are applied with a single timeline sort
+BULK_APPLY_THRESHOLD = 64
+
+
+class FeedStore:
+    """
+    Solid food entries keyed by Firestore interval document.
+
+    Each interval document maps to the entries it contains (one for regular
+    documents, many for `multi` batch documents), so a listener change can be
+    applied by replacing or dropping a single document's entries. A per-food
+    last-seen index is kept alongside so allergen results can be updated for
+    just the foods a change touched, as is a timestamp-sorted timeline of
+    (start, entry_id) pairs for paging through the feed log and a sorted list
+    of food names for prefix search. An optional ExposureHistory is kept in
+    step with every entry added or removed.
+
+    Entries are kept as the documents' dicts rather than FoodEvents columns:
+    /api/feeds returns each entry's foods grouped and as logged (FoodEvents
+    holds one lowercased name per row), and a changed or deleted document
+    must drop exactly its own entries, which append-only columns cannot do.
+    FoodEvents remains the compact form for full-mode recalculation.
+    """
+
+    def __init__(self, history: "ExposureHistory | None" = None):
+        self._history = history
+        self._doc_entries: dict[str, list[str]] = {}
+        self._entries: dict[str, dict] = {}
+        self._food_times: dict[str, dict[str, float]] = {}
+        self._food_last: dict[str, float] = {}
+        self._food_names: list[str] = []
+        self._timeline: list[tuple[float, str]] = []
+        self._multi_documents = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._doc_entries.clear()
+        self._entries.clear()
+        self._food_times.clear()
+        self._food_last.clear()
+        self._food_names.clear()
+        self._timeline.clear()
+        self._multi_documents = 0
+        if self._history is not None:
+            self._history.clear()
+
+    def load(self, all_entries: list[tuple[str, dict]]) -> set[str]:
+        """
+        Replace the store contents with a full set of feed entries.
+
+        Args:
+            all_entries: (entry_id, entry_data) tuples as returned by
+                fetch_all_feed_intervals
+
+        Returns:
+            set: All food names present after loading
+        """
+        self.clear()
+        for entry_id, data in all_entries:
+            doc_id = entry_id.split(":", 1)[0]
+            self._add_entry(doc_id, entry_id, data, sorted_insert=False)
+        self._timeline.sort()
+        self._food_names.sort()
+        return set(self._food_last)
+
+    def apply_document(self, doc_id: str, data: dict | None) -> set[str]:
+        """
+        Add or replace the entries of one interval document.
+
+        Returns:
+            set: Food names whose last-seen time may have changed
+        """
+        touched = self.remove_document(doc_id)
+        for entry_id, entry in expand_interval_document(doc_id, data):
+            touched.update(self._add_entry(doc_id, entry_id, entry))
+        return touched
+
+    def apply_documents(self, documents: list[tuple[str, dict | None]]) -> set[str]:
+        """
+        Add, replace or (when data is None) remove many interval documents.
+
+        Large batches, such as a listener's initial snapshot, append to the
+        timeline and sort it once instead of inserting entry by entry.
+
+        Returns:
+            set: Food names whose last-seen time may have changed
+        """
+        if len(documents) <= BULK_APPLY_THRESHOLD:
+            touched: set[str] = set()
+            for doc_id, data in documents:
+                if data is None:
+                    touched |= self.remove_document(doc_id)
+                else:
+                    touched |= self.apply_document(doc_id, data)
+            return touched
+
+        touched = set()
+        for doc_id, _ in documents:
+            touched |= self.remove_document(doc_id)
+        for doc_id, data in documents:
+            for entry_id, entry in expand_interval_document(doc_id, data):
+                touched.update(
+                    self._add_entry(doc_id, entry_id, entry, sorted_insert=False)
+                )
+        self._timeline.sort()
+        self._food_names.sort()
+        return touched
+
+    def remove_document(self, doc_id: str) -> set[str]:
+        """
+        Drop all entries belonging to one interval document.
+
+        Returns:
+            set: Food names whose last-seen time may have changed
+        """
+        touched: set[str] = set()
+        entry_ids = self._doc_entries.pop(doc_id, [])
+        if entry_ids and ":" in entry_ids[0]:
+            self._multi_documents -= 1
+        for entry_id in entry_ids:
+            entry = self._entries.pop(entry_id)
+            self._remove_from_timeline(entry.get("start", 0), entry_id)
+            if self._history is not None:
+                self._history.remove(entry_id)
+            for food in entry_food_names(entry):
+                touched.add(food)
+                self._remove_food_time(food, entry_id)
+        return touched
+
+    def rebuild_history(self) -> None:
+        """Re-add every entry to the ExposureHistory, e.g. after its matcher changed."""
+        if self._history is None:
+            return
+        self._history.clear()
+        for entry_id, entry in self._entries.items():
+            self._history.add(entry_id, entry.get("start", 0), entry_food_names(entry))
+
+    def multi_document_count(self) -> int:
+        """Return the number of `multi` batch documents holding solid entries."""
+        return self._multi_documents
+
+    def last_seen(self, food: str) -> float | None:
+        """Return the most recent start timestamp for a food, if ever eaten."""
+        return self._food_last.get(food)
+
+    def food_count(self, food: str) -> int:
+        """Return the number of entries containing a food."""
+        return len(self._food_times.get(food, ()))
+
+    def foods_with_prefix(self, prefix: str, limit: int | None = None) -> list[str]:
+        """Return food names starting with `prefix`, in alphabetical order."""
+        names = self._food_names
+        foods = []
+        for i in range(bisect_left(names, prefix), len(names)):
+            if limit is not None and len(foods) >= limit:
+                break
+            if not names[i].startswith(prefix):
+                break
+            foods.append(names[i])
+        return foods
+
+    def foods(self) -> set[str]:
+        """Return every food name present in the store."""
+        return set(self._food_last)
+
+    def entry_ids_for_foods(self, foods: set[str]) -> set[str]:
+        """Return the ids of entries containing any of the given food names."""
+        entry_ids: set[str] = set()
+        for food in foods:
+            entry_ids.update(self._food_times.get(food, ()))
+        return entry_ids
+
+    def items(self) -> list[tuple[str, dict]]:
+        """Return all (entry_id, entry_data) pairs, in the form load() accepts."""
+        return list(self._entries.items())
+
+    def solid_entries(self) -> list[dict]:
+        """Return all solid food entries sorted by timestamp (newest first)."""
+        return [self._entries[entry_id] for _, entry_id in reversed(self._timeline)]
+
+    def query(
+        self,
+        before: float | None = None,
+        after: float | None = None,
+        limit: int | None = None,
+        entry_ids: set[str] | None = None,
+        cursor: tuple[float, str] | None = None,
+    ) -> list[tuple[str, dict]]:
+        """
+        Return (entry_id, entry_data) pairs newest first, sliced from the timeline.
+
+        Args:
+            before: Only entries starting strictly before this timestamp
+            after: Only entries starting strictly after this timestamp
+            limit: Maximum number of entries to return
+            entry_ids: Only entries with these ids (e.g. from entry_ids_for_foods)
+            cursor: Only entries after this (start, entry_id) position in
+                newest-first order, e.g. the last entry of the previous page.
+                Entries sharing its start time are told apart by entry_id.
+        """
+        timeline = self._timeline
+        hi = (
+            len(timeline)
+            if before is None
+            else bisect_left(timeline, before, key=_start)
+        )
+        if cursor is not None:
+            hi = min(hi, bisect_left(timeline, cursor))
+        lo = 0 if after is None else bisect_right(timeline, after, key=_start)
+
+        entries = []
+        for i in range(hi - 1, lo - 1, -1):
+            if limit is not None and len(entries) >= limit:
+                break
+            entry_id = timeline[i][1]
+            if entry_ids is None or entry_id in entry_ids:
+                entries.append((entry_id, self._entries[entry_id]))
+        return entries
+
+    def _add_entry(
+        self, doc_id: str, entry_id: str, entry: dict, sorted_insert: bool = True
+    ) -> list[str]:
+        if entry.get("mode") != "solids":
+            return []
+
+        entry_ids = self._doc_entries.setdefault(doc_id, [])
+        if not entry_ids and ":" in entry_id:
+            self._multi_documents += 1
+        entry_ids.append(entry_id)
+        self._entries[entry_id] = entry
+
+        start = entry.get("start", 0)
+        if sorted_insert:
+            insort(self._timeline, (start, entry_id))
+        else:
+            self._timeline.append((start, entry_id))
+
+        foods = entry_food_names(entry)
+        for food in foods:
+            times = self._food_times.get(food)
+            if times is None:
+                times = self._food_times[food] = {}
+                if sorted_insert:
+                    insort(self._food_names, food)
+                else:
+                    self._food_names.append(food)
+            times[entry_id] = start
+            if start > self._food_last.get(food, float("-inf")):
+                self._food_last[food] = start
+        if self._history is not None:
+            self._history.add(entry_id, start, foods)
+        return foods
+
+    def _remove_food_time(self, food: str, entry_id: str) -> None:
+        times = self._food_times.get(food)
+        if not times or entry_id not in times:
+            return
+
+        start = times.pop(entry_id)
+        if not times:
+            del self._food_times[food]
+            del self._food_last[food]
+            del self._food_names[bisect_left(self._food_names, food)]
+        elif start >= self._food_last[food]:
+            self._food_last[food] = max(times.values())
+
+    def _remove_from_timeline(self, start: float, entry_id: str) -> None:
+        i = bisect_left(self._timeline, (start, entry_id))
+        if i < len(self._timeline) and self._timeline[i] == (start, entry_id):
+            del self._timeline[i]
+
+
+def _start(item: tuple[float, str]) -> float:
+    return item[0]
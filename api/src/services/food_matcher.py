@@ -0,0 +1,124 @@
+"""Multi-pattern allergen keyword matching for free-text food names."""
+
+import threading
+from collections import OrderedDict, deque
+
+# Suffixes a keyword may carry and still count as a whole-word match
+# ("eggs", "peaches")
+PLURAL_SUFFIXES = ("es", "s")
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over every allergen keyword in a food map.
+
+    A food name is scanned once, in time linear in its length, and a keyword
+    only counts when it sits on word boundaries (optionally followed by a
+    plural suffix), so "salmon cakes" matches "salmon" while "butternut squash"
+    does not match "butter". Keywords contained in a longer match are dropped,
+    so "peanut butter toast" maps to peanut and wheat but not dairy.
+
+    Results are memoized per distinct food name, so matching cost scales with
+    the size of the food vocabulary rather than the length of the history.
+    The memo keeps the `memo_size` most recently matched names; names looked
+    up through the API need not be stored foods, so it is bounded.
+    """
+
+    def __init__(
+        self, allergen_food_map: dict[str, list[str]], memo_size: int = 10_000
+    ):
+        self._allergen_order = list(allergen_food_map)
+        self._keyword_allergens: dict[str, set[str]] = {}
+        for allergen, foods in allergen_food_map.items():
+            for food in foods:
+                keyword = food.lower()
+                if keyword:
+                    self._keyword_allergens.setdefault(keyword, set()).add(allergen)
+
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[str]] = [[]]
+        self._build()
+        self._memo_size = memo_size
+        self._memo: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def __call__(self, food: str) -> tuple[str, ...]:
+        """Return the allergens matched by a food name, in map order."""
+        with self._memo_lock:
+            allergens = self._memo.get(food)
+            if allergens is not None:
+                self._memo.move_to_end(food)
+                return allergens
+
+        allergens = self._match(food)
+        with self._memo_lock:
+            self._memo[food] = allergens
+            while len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        return allergens
+
+    def _build(self) -> None:
+        for keyword in self._keyword_allergens:
+            state = 0
+            for ch in keyword:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(keyword)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def _match(self, food: str) -> tuple[str, ...]:
+        text = food.lower()
+        spans: list[tuple[int, int, str]] = []
+
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for keyword in self._output[state]:
+                start = i - len(keyword) + 1
+                if _is_word_match(text, start, i + 1):
+                    spans.append((start, i + 1, keyword))
+
+        matched: set[str] = set()
+        for start, end, keyword in spans:
+            contained = any(
+                s <= start and end <= e and (s, e) != (start, end) for s, e, _ in spans
+            )
+            if not contained:
+                matched |= self._keyword_allergens[keyword]
+
+        return tuple(a for a in self._allergen_order if a in matched)
+
+
+def _is_word_match(text: str, start: int, end: int) -> bool:
+    """Check a keyword span sits on word boundaries, allowing a plural suffix."""
+    if start > 0 and text[start - 1].isalnum():
+        return False
+
+    if end == len(text) or not text[end].isalnum():
+        return True
+
+    for suffix in PLURAL_SUFFIXES:
+        if text.startswith(suffix, end):
+            after = end + len(suffix)
+            if after == len(text) or not text[after].isalnum():
+                return True
+    return False
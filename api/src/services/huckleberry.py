@@ -1,60 +1,282 @@
 """Huckleberry API client for fetching solid food entries."""
 
-from huckleberry_api import HuckleberryAPI
-from dotenv import load_dotenv
 import os
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from typing import Protocol
 
+# Fields the pipeline reads. Map keys under `foods` are generated ids, so the
+# whole map is projected rather than just each food's created_name
+SOLID_FIELDS = ["start", "mode", "foods"]
+MULTI_FIELDS = ["multi", "data"]
+INTERVAL_FIELDS = SOLID_FIELDS + MULTI_FIELDS
 
-def get_api_client() -> HuckleberryAPI:
-    """Create and authenticate Huckleberry API client."""
-    load_dotenv()
 
-    api = HuckleberryAPI(
-        email=os.getenv("HUCKLEBERRY_EMAIL"), password=os.getenv("HUCKLEBERRY_PASSWORD")
+class DataSource(Protocol):
+    """
+    The parts of HuckleberryAPI the app uses, so a local stand-in can replace it.
+
+    `_get_firestore_client()` must return a client supporting the collection,
+    query, get_all and on_snapshot calls made in this module; `_listeners`
+    holds the watches started by setup_feed_listener.
+    """
+
+    token_expires_at: float | None
+    _listeners: dict
+
+    def authenticate(self) -> None: ...
+
+    def refresh_auth_token(self) -> None: ...
+
+    def get_children(self) -> list[dict]: ...
+
+    def _get_firestore_client(self): ...
+
+    def setup_feed_listener(
+        self, child_uid: str, callback: Callable[[dict], None]
+    ) -> None: ...
+
+    def stop_all_listeners(self) -> None: ...
+
+
+# "huckleberry" is the real service; "fake" serves a synthetic feed from
+# devtools.fake_huckleberry, for load tests and offline development
+DATA_SOURCES = ("huckleberry", "fake")
+
+
+def create_data_source(kind: str | None = None) -> DataSource:
+    """
+    Create an unauthenticated client for the DATA_SOURCE feed backend.
+
+    The fake source is configured with FAKE_FEED_ENTRIES (synthetic history
+    size) and FAKE_EVENTS_PER_SECOND (new feeds logged once authenticated).
+    """
+    kind = kind or os.getenv("DATA_SOURCE", "huckleberry")
+
+    if kind == "huckleberry":
+        # huckleberry_api pulls in the Firestore client, which is slow to
+        # import, so it is only imported once a client is actually created
+        from huckleberry_api import HuckleberryAPI
+
+        return HuckleberryAPI(
+            email=os.getenv("HUCKLEBERRY_EMAIL"),
+            password=os.getenv("HUCKLEBERRY_PASSWORD"),
+        )
+    if kind == "fake":
+        from devtools.fake_huckleberry import FakeHuckleberryAPI
+
+        return FakeHuckleberryAPI(
+            entries=int(os.getenv("FAKE_FEED_ENTRIES", "5000")),
+            events_per_second=float(os.getenv("FAKE_EVENTS_PER_SECOND", "0")),
+        )
+
+    raise ValueError(
+        f"Unknown data source {kind!r}, expected one of {', '.join(DATA_SOURCES)}"
     )
+
+
+def get_api_client() -> DataSource:
+    """Create and authenticate a client for the DATA_SOURCE feed backend."""
+    api = create_data_source()
     api.authenticate()
 
     return api
 
 
-def fetch_all_feed_intervals(client, child_uid: str) -> list[tuple[str, dict]]:
+def get_intervals_ref(client, child_uid: str):
+    """Return the Firestore collection holding a child's feed intervals."""
+    return client.collection("feed").document(child_uid).collection("intervals")
+
+
+def expand_interval_document(doc_id: str, data: dict | None) -> list[tuple[str, dict]]:
+    """
+    Expand one interval document into its feed entries.
+
+    Regular documents hold a single entry; `multi` batch documents hold many
+    entries in a nested `data` map, which are keyed as "<doc_id>:<entry_id>".
+
+    Returns:
+        list: List of tuples (entry_id, entry_data)
+    """
+    if not data:
+        return []
+
+    if not data.get("multi"):
+        return [(doc_id, data)] if "start" in data else []
+
+    if not isinstance(data.get("data"), dict):
+        return []
+
+    return [
+        (f"{doc_id}:{entry_id}", entry)
+        for entry_id, entry in data["data"].items()
+        if isinstance(entry, dict) and "start" in entry
+    ]
+
+
+def iter_feed_intervals(
+    client, child_uid: str, solids_only: bool = True, queue_size: int = 16
+) -> Iterator[tuple[str, dict]]:
+    """
+    Stream feed entries from regular and batched documents.
+
+    The regular-document query and the `multi` batch-document query run
+    concurrently on their own threads, and entries are yielded as either
+    query produces them, in no particular order. With solids_only, regular
+    documents are filtered to `mode == "solids"` by the server, batched
+    entries are filtered as they are expanded, and only the fields in
+    SOLID_FIELDS and MULTI_FIELDS are downloaded.
+
+    Yields:
+        tuple: (entry_id, entry_data)
+    """
+    intervals_ref = get_intervals_ref(client, child_uid)
+    multi = intervals_ref.where("multi", "==", True)
+    if solids_only:
+        regular = intervals_ref.where("mode", "==", "solids").select(SOLID_FIELDS)
+        multi = multi.select(MULTI_FIELDS)
+    else:
+        # Ordering by start skips batch documents, which have no start field
+        regular = intervals_ref.order_by("start", direction="DESCENDING")
+
+    def regular_entries():
+        for doc in regular.stream():
+            data = doc.to_dict()
+            if data and not data.get("multi") and "start" in data:
+                yield doc.id, data
+
+    def batched_entries():
+        # Huckleberry batches older data into multi-entry documents
+        for doc in multi.stream():
+            for entry_id, entry in expand_interval_document(doc.id, doc.to_dict()):
+                if not solids_only or entry.get("mode") == "solids":
+                    yield entry_id, entry
+
+    yield from _merge_streams([regular_entries, batched_entries], queue_size)
+
+
+def fetch_all_feed_intervals(
+    client, child_uid: str, solids_only: bool = False
+) -> list[tuple[str, dict]]:
     """
     Fetch all feed intervals including both regular and batched entries.
 
+    Args:
+        solids_only: Only fetch solid food entries, see iter_feed_intervals
+
     Returns:
         list: List of tuples (entry_id, entry_data)
     """
-    feed_ref = client.collection("feed").document(child_uid)
-    intervals_ref = feed_ref.collection("intervals")
+    return list(iter_feed_intervals(client, child_uid, solids_only))
+
+
+def _merge_streams(
+    producers: list[Callable[[], Iterable]], queue_size: int, chunk_size: int = 256
+) -> Iterator:
+    """
+    Run each producer on its own thread and yield their items as they arrive.
+
+    Items are handed over in chunks to keep queue overhead per item low; at
+    most queue_size chunks are buffered before producers wait.
+    """
+    items: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
 
-    # Fetch regular intervals
-    regular_intervals = []
-    for doc in intervals_ref.order_by("start", direction="DESCENDING").stream():
-        data = doc.to_dict()
-        if not data.get("multi"):
-            regular_intervals.append((doc.id, data))
+    def put(item, error=None) -> bool:
+        while not stop.is_set():
+            try:
+                items.put((item, error), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-    # Fetch multi-entry batch documents (Huckleberry batches older data)
-    multi_docs = list(intervals_ref.where("multi", "==", True).stream())
+    def run(producer):
+        try:
+            chunk = []
+            for item in producer():
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    if not put(chunk):
+                        return
+                    chunk = []
+            if chunk and not put(chunk):
+                return
+            put(done)
+        except BaseException as e:  # noqa: BLE001
+            # Re-raised on the consuming thread
+            put(done, e)
 
-    # Extract individual entries from batch documents
-    batched_entries = []
-    for doc in multi_docs:
-        doc_data = doc.to_dict()
-        if not doc_data or not isinstance(doc_data.get("data"), dict):
-            continue
+    threads = [
+        threading.Thread(target=run, args=(p,), name="feed-query", daemon=True)
+        for p in producers
+    ]
+    for thread in threads:
+        thread.start()
 
-        for entry_id, entry in doc_data["data"].items():
-            if isinstance(entry, dict) and "start" in entry:
-                batched_entries.append((f"{doc.id}:{entry_id}", entry))
+    try:
+        remaining = len(threads)
+        while remaining:
+            chunk, error = items.get()
+            if error is not None:
+                raise error
+            if chunk is done:
+                remaining -= 1
+            else:
+                yield from chunk
+    finally:
+        # Unblock producers if the consumer stopped early or a query failed
+        stop.set()
 
-    return regular_intervals + batched_entries
 
+def list_interval_update_times(client, child_uid: str) -> dict[str, float]:
+    """
+    List every interval document id with its Firestore update time.
 
-def extract_solid_food_entries(all_entries: list[tuple[str, dict]]) -> list[dict]:
+    Uses an empty field projection, so no document fields are downloaded.
+
+    Returns:
+        dict: Mapping of doc_id to update time (epoch seconds)
+    """
+    intervals_ref = get_intervals_ref(client, child_uid)
+    return {
+        doc.id: doc.update_time.timestamp() for doc in intervals_ref.select([]).stream()
+    }
+
+
+def fetch_interval_documents(
+    client, child_uid: str, doc_ids: list[str], batch_size: int = 300
+) -> list[tuple[str, float, dict]]:
+    """
+    Fetch specific interval documents by id, in batched reads.
+
+    Only the fields in INTERVAL_FIELDS are downloaded.
+
+    Returns:
+        list: List of tuples (doc_id, update_time, data) for documents that exist
+    """
+    intervals_ref = get_intervals_ref(client, child_uid)
+    refs = [intervals_ref.document(doc_id) for doc_id in doc_ids]
+
+    documents = []
+    for i in range(0, len(refs), batch_size):
+        for doc in client.get_all(
+            refs[i : i + batch_size], field_paths=INTERVAL_FIELDS
+        ):
+            if doc.exists:
+                documents.append((doc.id, doc.update_time.timestamp(), doc.to_dict()))
+    return documents
+
+
+def extract_solid_food_entries(all_entries: Iterable[tuple[str, dict]]) -> list[dict]:
     """
     Filter feed entries to extract only solid food entries.
 
+    Accepts any iterable, so entries can be streamed in from
+    iter_feed_intervals without materializing them first.
+
     Returns:
         list: List of entry_data dicts sorted by timestamp (newest first)
     """
@@ -72,5 +294,4 @@ def fetch_solid_food_entries() -> list[dict]:
     child_uid = children[0]["uid"]
 
     client = api._get_firestore_client()
-    all_entries = fetch_all_feed_intervals(client, child_uid)
-    return extract_solid_food_entries(all_entries)
+    return extract_solid_food_entries(iter_feed_intervals(client, child_uid))
@@ -0,0 +1,219 @@
+"""Incremental ingestion of Firestore interval documents through a local store."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from cache.interval_store import INTERVAL_STORE_FILE, IntervalStore
+from services.connection_supervisor import CircuitBreaker
+from services.huckleberry import (
+    DataSource,
+    fetch_interval_documents,
+    get_intervals_ref,
+    list_interval_update_times,
+)
+from services.metrics import (
+    LISTENER_CALLBACKS,
+    REFRESH_FAILURES,
+    REFRESH_STAGE_SECONDS,
+    REFRESHES,
+)
+
+logger = logging.getLogger(__name__)
+
+_stage = REFRESH_STAGE_SECONDS.labels
+
+# (doc_id, data) pairs, with data None for a removed document
+DocumentChanges = list[tuple[str, dict | None]]
+
+
+class IntervalSync:
+    """
+    Keeps a local IntervalStore in step with a child's Firestore intervals.
+
+    sync() lists every document's update time without downloading fields and
+    fetches only the documents whose update time differs from the stored
+    one; watch() subscribes to recent intervals and stores each added,
+    modified or removed document as it arrives. Every change is stored
+    first, then handed to `apply_documents`.
+
+    `multi` batch documents have no top-level start, so no watch covers
+    them; they are reconciled by sync(), which runs on connect, after every
+    token refresh and on refresh requests. Watching them would make every
+    re-watch download every batch body again in its initial snapshot.
+
+    A document also leaves a watched query when it is edited out of the
+    query's range, so removals seen by a watch call `on_removed`, which
+    should schedule a sync to tell the two apart.
+    """
+
+    def __init__(
+        self,
+        api: DataSource,
+        child_uid: str,
+        apply_documents: Callable[[DocumentChanges], None],
+        on_removed: Callable[[], None],
+        breaker: CircuitBreaker,
+        watch_lookback: float,
+        path: Path = INTERVAL_STORE_FILE,
+    ):
+        self._api = api
+        self._child_uid = child_uid
+        self._apply_documents = apply_documents
+        self._on_removed = on_removed
+        self._breaker = breaker
+        self._watch_lookback = watch_lookback
+        self._store = IntervalStore(child_uid, path)
+        self._watches: list = []
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Apply every document already held in the local store."""
+        self._apply_documents(self._store.documents())
+
+    def close(self) -> None:
+        """Stop watching and close the local store."""
+        self.stop_watches()
+        self._store.close()
+
+    def sync(self) -> None:
+        """Fetch interval documents changed since they were stored locally."""
+        with self._lock:
+            known = self._store.update_times()
+            with _stage("firestore").time():
+                remote, documents = self._breaker.call(
+                    lambda: self._fetch_changed(known)
+                )
+            removed = [doc_id for doc_id in known if doc_id not in remote]
+
+            with _stage("interval_store").time():
+                self._store.upsert(documents)
+                self._store.delete(removed)
+            self._apply_documents(
+                [(doc_id, data) for doc_id, _, data in documents]
+                + [(doc_id, None) for doc_id in removed]
+            )
+
+        logger.info(
+            "Synced %d interval documents: %d fetched, %d removed (high-water mark %s)",
+            len(remote),
+            len(documents),
+            len(removed),
+            self._store.high_water_mark(),
+        )
+
+    def _fetch_changed(
+        self, known: dict[str, float]
+    ) -> tuple[dict[str, float], list[tuple[str, float, dict]]]:
+        """Fetch update times of all interval documents, and the changed documents."""
+        client = self._api._get_firestore_client()
+        remote = list_interval_update_times(client, self._child_uid)
+        changed = [doc_id for doc_id, t in remote.items() if known.get(doc_id) != t]
+        return remote, fetch_interval_documents(client, self._child_uid, changed)
+
+    def watch(self) -> None:
+        """(Re)subscribe to interval changes with the current Firestore client."""
+        self.stop_watches()
+
+        # Older history and batch documents are reconciled by syncing, so
+        # only recent intervals need watching; this keeps the initial
+        # snapshot, repeated on every re-watch, small
+        client = self._api._get_firestore_client()
+        intervals_ref = get_intervals_ref(client, self._child_uid)
+        recent = intervals_ref.where("start", ">=", time.time() - self._watch_lookback)
+        self._watches = [recent.on_snapshot(self._on_snapshot)]
+
+    def stop_watches(self) -> None:
+        """Unsubscribe every watch."""
+        watches, self._watches = self._watches, []
+        for watch in watches:
+            watch.unsubscribe()
+
+    def watches_active(self) -> bool:
+        """Check that the watches exist and are all still streaming."""
+        watches = self._watches
+        return bool(watches) and all(
+            getattr(watch, "is_active", True) for watch in watches
+        )
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        """Callback for Firestore intervals query changes."""
+        LISTENER_CALLBACKS.labels("intervals").inc()
+        try:
+            REFRESHES.labels("snapshot").inc()
+            with self._lock:
+                self._apply_snapshot_changes(changes)
+        except Exception:
+            REFRESH_FAILURES.labels("snapshot").inc()
+            logger.exception("Error applying interval changes")
+
+    def _apply_snapshot_changes(self, changes) -> None:
+        known = self._store.update_times([c.document.id for c in changes])
+        upserts = []
+        removed = []
+        for change in changes:
+            doc = change.document
+            if change.type.name == "REMOVED":
+                removed.append(doc.id)
+                continue
+            update_time = doc.update_time.timestamp()
+            # A watch's initial snapshot repeats documents already stored
+            if known.get(doc.id) != update_time:
+                upserts.append((doc.id, update_time, doc.to_dict()))
+
+        with _stage("interval_store").time():
+            self._store.upsert(upserts)
+            self._store.delete(removed)
+        self._apply_documents(
+            [(doc_id, data) for doc_id, _, data in upserts]
+            + [(doc_id, None) for doc_id in removed]
+        )
+        if removed:
+            # Reconcile on the caller's sync thread rather than reading here
+            self._on_removed()
+
+
+class SharedIntervalReader:
+    """
+    Follows the interval store another worker process writes.
+
+    Follower workers read the leader's store rather than Firestore, and
+    every worker reads it once at startup to serve feed data before
+    upstream is reached; apply_changes() passes on what was stored or
+    deleted since the previous call.
+    """
+
+    def __init__(self, path: Path = INTERVAL_STORE_FILE):
+        self._path = path
+        self._store: IntervalStore | None = None
+        self._update_times: dict[str, float] = {}
+
+    @property
+    def child_uid(self) -> str | None:
+        """The child whose documents the store holds, or None if not read yet."""
+        return self._store.child_uid if self._store is not None else None
+
+    def apply_changes(self, apply_documents: Callable[[DocumentChanges], None]) -> None:
+        """Pass the documents changed since the last call to `apply_documents`."""
+        if self._store is None:
+            if not self._path.exists():
+                return
+            self._store = IntervalStore(None, self._path)
+
+        known = self._update_times
+        current = self._store.update_times()
+        changed = [doc_id for doc_id, t in current.items() if known.get(doc_id) != t]
+        removed = [doc_id for doc_id in known if doc_id not in current]
+        apply_documents(
+            self._store.get_documents(changed) + [(doc_id, None) for doc_id in removed]
+        )
+        self._update_times = current
+
+    def close(self) -> None:
+        """Close the store; the next apply_changes() passes on every document."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+        self._update_times = {}
@@ -0,0 +1,107 @@
+"""File-lock leader election between worker processes on one host."""
+
+import fcntl
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_FILE = CACHE_DIR / "leader.lock"
+
+
+class LeaderElection:
+    """
+    Elects one leader among processes sharing a lock file.
+
+    The leader holds an exclusive flock on the file until it stops; the OS
+    releases the lock when the process exits or crashes, so one of the
+    followers, which retry every `interval` seconds, takes over. Followers
+    call `on_follow` after each failed attempt, which is where they pick up
+    state the leader has published. Once elected, `on_elected` runs on the
+    election thread; if it raises, leadership is given up and retried after
+    `retry_delay` seconds.
+    """
+
+    def __init__(
+        self,
+        on_elected: Callable[[], None],
+        on_follow: Callable[[], None],
+        path: Path = LEADER_LOCK_FILE,
+        interval: float = 0.25,
+        retry_delay: float = 30.0,
+        name: str = "leader-election",
+    ):
+        self._on_elected = on_elected
+        self._on_follow = on_follow
+        self._path = Path(path)
+        self._interval = interval
+        self._retry_delay = retry_delay
+        self._name = name
+        self._fd: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def start(self) -> None:
+        """Start competing for leadership on a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop competing and give up leadership if held."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._release()
+
+    def _try_acquire(self) -> bool:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        # The pid is informational only; the lock itself is what counts
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def _release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._try_acquire():
+                logger.info("Worker %d elected leader", os.getpid())
+                try:
+                    self._on_elected()
+                    return
+                except Exception:
+                    logger.exception("Leader startup failed, stepping down")
+                    self._release()
+                    if self._stop.wait(self._retry_delay):
+                        return
+                    continue
+
+            try:
+                self._on_follow()
+            except Exception:
+                logger.exception("Follower update failed")
+            self._stop.wait(self._interval)
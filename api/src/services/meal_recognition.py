@@ -0,0 +1,271 @@
+"""Food recognition in meal photos through a bounded queue of model calls."""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Protocol
+
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEAL_MODEL = "claude-sonnet-4-5"
+
+RECOGNITION_PROMPT = (
+    "This is a photo of a meal for a baby or toddler. List every distinct food "
+    "you can see, using short common names a parent would log (e.g. "
+    '"scrambled eggs", "banana", "peanut butter toast"). Reply with only a JSON '
+    "array of strings, and an empty array if there is no food in the photo."
+)
+
+RECOGNITION_CALLS = REGISTRY.counter(
+    "allergen_meal_recognitions_total",
+    "Meal photo recognitions, by whether the model was called or the result cached.",
+    ["result"],
+)
+RECOGNITION_SECONDS = REGISTRY.histogram(
+    "allergen_meal_recognition_seconds",
+    "Time spent in model calls recognizing foods in a meal photo.",
+)
+
+
+class FoodRecognizer(Protocol):
+    """
+    A model client that lists the foods in a photo.
+
+    `name` identifies the model (and prompt) so cached results from one
+    recognizer are not served for another.
+    """
+
+    name: str
+
+    async def recognize(self, jpeg: bytes) -> list[str]:
+        """Return the food names seen in a normalized JPEG."""
+        ...
+
+
+class RecognitionError(RuntimeError):
+    """Raised when the model call fails or its reply cannot be used."""
+
+
+class AnthropicRecognizer:
+    """Recognizes foods with a Claude vision model via the Anthropic API."""
+
+    def __init__(self, model: str = DEFAULT_MEAL_MODEL, max_tokens: int = 512):
+        import anthropic
+
+        self._api_error = anthropic.APIError
+        # Reads ANTHROPIC_API_KEY; the queue bounds concurrency, not the SDK
+        self._client = anthropic.AsyncAnthropic()
+        self._model = model
+        self._max_tokens = max_tokens
+        self.name = f"anthropic:{model}"
+
+    async def recognize(self, jpeg: bytes) -> list[str]:
+        try:
+            message = await self._create_message(jpeg)
+        except self._api_error as e:
+            raise RecognitionError(f"{self.name} request failed: {e}") from e
+
+        text = "".join(block.text for block in message.content if block.type == "text")
+        try:
+            return parse_food_list(text)
+        except ValueError as e:
+            raise RecognitionError(str(e)) from e
+
+    async def _create_message(self, jpeg: bytes):
+        return await self._client.messages.create(
+            model=self._model,
+            max_tokens=self._max_tokens,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "image/jpeg",
+                                "data": base64.b64encode(jpeg).decode("ascii"),
+                            },
+                        },
+                        {"type": "text", "text": RECOGNITION_PROMPT},
+                    ],
+                }
+            ],
+        )
+
+
+def parse_food_list(text: str) -> list[str]:
+    """
+    Parse a model reply into food names.
+
+    The reply should be a JSON array of strings; any text around the array is
+    ignored. Names are stripped and de-duplicated case-insensitively.
+
+    Raises:
+        ValueError: If the reply contains no JSON array of strings
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        raise ValueError(f"Expected a JSON array of foods, got: {text[:200]!r}")
+    foods = json.loads(text[start : end + 1])
+    if not isinstance(foods, list) or not all(isinstance(f, str) for f in foods):
+        raise ValueError(f"Expected a JSON array of foods, got: {text[:200]!r}")
+
+    seen: set[str] = set()
+    result = []
+    for food in foods:
+        food = food.strip()
+        if food and food.lower() not in seen:
+            seen.add(food.lower())
+            result.append(food)
+    return result
+
+
+class RecognitionQueueFull(RuntimeError):
+    """Raised when too many photos are already waiting for the model."""
+
+
+class RecognitionQueue:
+    """
+    Bounded-concurrency queue of food recognition calls.
+
+    At most MEAL_MODEL_CONCURRENCY model calls run at once and at most
+    MEAL_QUEUE_SIZE photos may be waiting or running; beyond that, submit()
+    fails fast with RecognitionQueueFull instead of queuing unbounded work.
+    Results are cached by (recognizer, photo content hash), up to
+    MEAL_RESULT_CACHE_SIZE entries, and concurrent submissions of the same
+    photo share one call.
+
+    The recognizer is MEAL_RECOGNIZER: "anthropic" (default) or "stub" for a
+    local stand-in that needs no API key; set_recognizer() swaps it, e.g.
+    in tests.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, recognizer: FoodRecognizer | None = None):
+        self._recognizer = recognizer
+        self._concurrency = int(os.getenv("MEAL_MODEL_CONCURRENCY", "4"))
+        self._max_pending = int(os.getenv("MEAL_QUEUE_SIZE", "32"))
+        self._cache_size = int(os.getenv("MEAL_RESULT_CACHE_SIZE", "256"))
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        self._pending = 0
+        self._results: OrderedDict[tuple[str, str], list[str]] = OrderedDict()
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+
+        REGISTRY.gauge(
+            "allergen_meal_queue_depth",
+            "Meal photos waiting for or in a model call.",
+            lambda: self._pending,
+        )
+
+    @classmethod
+    def get_instance(cls) -> "RecognitionQueue":
+        """Get or create the singleton instance."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def recognizer(self) -> FoodRecognizer:
+        """The recognizer in use, created from MEAL_RECOGNIZER on first use."""
+        if self._recognizer is None:
+            self._recognizer = create_recognizer(
+                os.getenv("MEAL_RECOGNIZER", "anthropic")
+            )
+        return self._recognizer
+
+    def set_recognizer(self, recognizer: FoodRecognizer) -> None:
+        """Switch to another recognizer; cached results stay keyed by name."""
+        self._recognizer = recognizer
+
+    async def submit(self, content_hash: str, jpeg: bytes) -> tuple[list[str], bool]:
+        """
+        Recognize the foods in a photo, waiting for a free model slot.
+
+        Args:
+            content_hash: Content hash of the photo, the result cache key
+            jpeg: Normalized photo
+
+        Returns:
+            (food names, whether the result came from the cache)
+
+        Raises:
+            RecognitionQueueFull: If MEAL_QUEUE_SIZE photos are already queued
+        """
+        recognizer = self.recognizer
+        key = (recognizer.name, content_hash)
+
+        foods = self._results.get(key)
+        if foods is not None:
+            self._results.move_to_end(key)
+            RECOGNITION_CALLS.labels("cached").inc()
+            return list(foods), True
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            RECOGNITION_CALLS.labels("cached").inc()
+            return list(await asyncio.shield(future)), True
+
+        if self._pending >= self._max_pending:
+            raise RecognitionQueueFull(
+                f"{self._pending} meal photos already queued, try again shortly"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                with RECOGNITION_SECONDS.time():
+                    foods = await recognizer.recognize(jpeg)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case nobody joined this call
+            future.exception()
+            raise
+        else:
+            future.set_result(foods)
+            self._store(key, foods)
+        finally:
+            self._pending -= 1
+            del self._in_flight[key]
+
+        RECOGNITION_CALLS.labels("model").inc()
+        return list(foods), False
+
+    def _store(self, key: tuple[str, str], foods: list[str]) -> None:
+        self._results[key] = foods
+        self._results.move_to_end(key)
+        while len(self._results) > self._cache_size:
+            self._results.popitem(last=False)
+
+
+# Recognizers selectable with MEAL_RECOGNIZER
+RECOGNIZERS = ("anthropic", "stub")
+
+
+def create_recognizer(kind: str) -> FoodRecognizer:
+    """Create the recognizer named by MEAL_RECOGNIZER, see RECOGNIZERS."""
+    if kind == "anthropic":
+        return AnthropicRecognizer(os.getenv("MEAL_MODEL", DEFAULT_MEAL_MODEL))
+    if kind == "stub":
+        from devtools.fake_recognizer import StubRecognizer
+
+        return StubRecognizer()
+
+    raise ValueError(
+        f"Unknown meal recognizer {kind!r}, expected one of {', '.join(RECOGNIZERS)}"
+    )
@@ -0,0 +1,58 @@
+"""Meal photo analysis: decode, recognize foods and match them to allergens."""
+
+import asyncio
+import os
+
+from services.allergen_service import get_allergen_food_map, get_food_matcher
+from services.meal_recognition import RecognitionQueue
+from services.photo_processing import PhotoProcessor
+
+
+async def analyze_meal_photos(photos: list[bytes]) -> dict:
+    """
+    Find the foods in a batch of meal photos and the allergens they contain.
+
+    Photos are decoded in the photo process pool, then recognized through the
+    bounded model queue; both steps are cached by content hash. Food names
+    are matched with the same matcher and ALLERGEN_MATCH_MODE as the feed.
+
+    Args:
+        photos: Raw uploaded files
+
+    Returns:
+        Dict with per-photo results and the allergens found across all
+        photos, in allergen map order
+
+    Raises:
+        PhotoError: If a photo cannot be decoded
+        RecognitionQueueFull: If the model queue is full
+        RecognitionError: If the model call fails
+    """
+    processed = await PhotoProcessor.get_instance().process(photos)
+
+    queue = RecognitionQueue.get_instance()
+    recognized = await asyncio.gather(
+        *(queue.submit(photo.content_hash, photo.jpeg) for photo in processed)
+    )
+
+    match = get_food_matcher(os.getenv("ALLERGEN_MATCH_MODE", "exact"))
+    found: set[str] = set()
+    results = []
+    for photo, (foods, recognition_cached) in zip(processed, recognized):
+        matched = []
+        for food in foods:
+            allergens = list(match(food.lower()))
+            found.update(allergens)
+            matched.append({"name": food, "allergens": allergens})
+        results.append(
+            {
+                "content_hash": photo.content_hash,
+                "foods": matched,
+                "cached": photo.cached and recognition_cached,
+            }
+        )
+
+    return {
+        "photos": results,
+        "allergens": [a for a in get_allergen_food_map() if a in found],
+    }
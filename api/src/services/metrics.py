@@ -0,0 +1,327 @@
+"""
+Minimal Prometheus-style metrics with lock-free recording.
+
+Counters and histograms keep one value shard per recording thread, so the
+Firebase callback thread, the refresh worker and the event loop each update
+their own plain list without taking a lock; shards are only summed when
+/metrics is scraped, and the shards of threads that have exited are folded
+into a base total then. Gauges are read from callbacks at scrape time.
+"""
+
+import abc
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Default latency buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class _Shards:
+    """
+    Per-thread lists of `size` floats, summed on read.
+
+    A thread that has exited can no longer write its shard, so reads fold
+    such shards into `_base` and drop them; threads that come and go (e.g.
+    a thread pool's workers) then do not grow the shard list forever.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._base = [0.0] * size
+        self._shards: list[tuple[threading.Thread, list[float]]] = []
+        self._lock = threading.Lock()
+
+    def local(self) -> list[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self._size
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            self._local.values = values
+            return values
+
+    def totals(self) -> list[float]:
+        with self._lock:
+            live = []
+            for shard in self._shards:
+                thread, values = shard
+                if thread.is_alive():
+                    live.append(shard)
+                else:
+                    self._base = [a + b for a, b in zip(self._base, values)]
+            self._shards = live
+            shards = [self._base] + [values for _, values in live]
+        return [sum(column) for column in zip(*shards)]
+
+
+class _Metric(abc.ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not labelnames:
+            self._unlabelled = self.labels()
+
+    def labels(self, *values: str):
+        """Return the child series for the given label values."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Create the value holder for one combination of label values."""
+
+    def _label_text(self, values: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abc.abstractmethod
+    def samples(self) -> list[str]:
+        """Render the metric's sample lines in the Prometheus text format."""
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.local()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled.inc(amount)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{self._label_text(values)} {_format(child.value())}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]):
+        self._buckets = buckets
+        # One count per bucket, one for +Inf, then the running sum
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._shards.local()
+        values[bisect_left(self._buckets, value)] += 1
+        values[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the with-block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def totals(self) -> tuple[list[float], float]:
+        values = self._shards.totals()
+        return values[:-1], values[-1]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled.observe(value)
+
+    def time(self):
+        return self._unlabelled.time()
+
+    def samples(self) -> list[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            counts, total = child.totals()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + ("+Inf" if bound == math.inf else _format(bound)) + '"'
+                lines.append(
+                    f"{self.name}_bucket{self._label_text(values, le)} {_format(cumulative)}"
+                )
+            lines.append(f"{self.name}_sum{self._label_text(values)} {_format(total)}")
+            lines.append(
+                f"{self.name}_count{self._label_text(values)} {_format(cumulative)}"
+            )
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Point-in-time value read from a callback when metrics are collected.
+
+    With labelnames, the callback returns a dict of label values -> value
+    instead of a single value.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], float | dict[tuple[str, ...], float] | None],
+        labelnames: tuple[str, ...] = (),
+    ):
+        self._read = read
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> None:
+        return None
+
+    def samples(self) -> list[str]:
+        try:
+            value = self._read()
+        except Exception:
+            # A failing gauge is left out rather than failing the whole scrape
+            logger.debug("Could not read gauge %s", self.name, exc_info=True)
+            value = None
+        if value is None:
+            return []
+        if not self.labelnames:
+            return [f"{self.name} {_format(value)}"]
+        return [
+            f"{self.name}{self._label_text(values)} {_format(v)}"
+            for values, v in value.items()
+        ]
+
+
+class Registry:
+    """Collection of metrics rendered together in the text exposition format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, tuple(labelnames)))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, tuple(labelnames), buckets))
+
+    def gauge(
+        self, name: str, documentation: str, read: Callable, labelnames=()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, read, tuple(labelnames)))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+
+REFRESH_STAGE_SECONDS = REGISTRY.histogram(
+    "allergen_refresh_stage_seconds",
+    "Time spent in each stage of an allergen cache update.",
+    ["stage"],
+)
+LISTENER_CALLBACKS = REGISTRY.counter(
+    "allergen_listener_callbacks_total",
+    "Firestore listener callbacks received.",
+    ["listener"],
+)
+REFRESHES = REGISTRY.counter(
+    "allergen_refreshes_total",
+    "Allergen cache updates run, by how they were started.",
+    ["kind"],
+)
+REFRESH_FAILURES = REGISTRY.counter(
+    "allergen_refresh_failures_total",
+    "Allergen cache updates that raised an error.",
+    ["kind"],
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code.",
+    ["method", "route", "status"],
+)
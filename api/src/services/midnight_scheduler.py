@@ -0,0 +1,64 @@
+"""Scheduler that fires just after each local midnight."""
+
+import logging
+import threading
+from collections.abc import Callable
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+
+class MidnightScheduler:
+    """
+    Calls a function on a background thread just after midnight in a time zone.
+
+    The wait is recomputed from the wall clock after every run, so daylight
+    saving transitions and a late wake-up do not accumulate drift.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[], None],
+        tz_name: str,
+        slack_seconds: float = 1.0,
+        name: str = "midnight-scheduler",
+    ):
+        self._callback = callback
+        self._tz = ZoneInfo(tz_name)
+        self._slack = slack_seconds
+        self._name = name
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def seconds_until_midnight(self, now: datetime | None = None) -> float:
+        """Return the seconds from now until the next local midnight."""
+        now = now or datetime.now(self._tz)
+        midnight = datetime.combine(
+            now.date() + timedelta(days=1), time(0), tzinfo=self._tz
+        )
+        # Subtracting datetimes in the same zone gives the wall-clock difference,
+        # an hour off across a DST change; compare the instants instead
+        return max(midnight.timestamp() - now.timestamp(), 0.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.seconds_until_midnight() + self._slack):
+            try:
+                self._callback()
+            except Exception:
+                logger.exception("Midnight callback failed")
@@ -0,0 +1,244 @@
+"""Meal photo decoding and normalization in a process pool, cached by content hash."""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from cache import CACHE_DIR
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PHOTO_CACHE_DIR = CACHE_DIR / "photos"
+
+PHOTOS_PROCESSED = REGISTRY.counter(
+    "allergen_photos_total",
+    "Uploaded meal photos, by whether they were decoded or served from the cache.",
+    ["result"],
+)
+PHOTO_DECODE_SECONDS = REGISTRY.histogram(
+    "allergen_photo_decode_seconds",
+    "Time to decode and normalize one meal photo, including the process pool queue.",
+)
+
+
+class PhotoError(ValueError):
+    """Raised when an uploaded file is not a decodable image."""
+
+
+class ProcessedPhoto:
+    """A normalized JPEG and the SHA-256 of the upload it was made from."""
+
+    def __init__(self, content_hash: str, jpeg: bytes, cached: bool):
+        self.content_hash = content_hash
+        self.jpeg = jpeg
+        self.cached = cached
+
+
+def normalize_photo(data: bytes, max_dimension: int, quality: int) -> bytes:
+    """
+    Decode a photo (JPEG, PNG, HEIC, ...) into an upright RGB JPEG.
+
+    Runs in a pool worker process, so Pillow is imported here rather than in
+    the API process.
+
+    Args:
+        data: Raw uploaded file contents
+        max_dimension: Longest side of the result, in pixels
+        quality: JPEG quality of the result
+
+    Raises:
+        PhotoError: If the data is not an image Pillow can decode
+    """
+    import io
+
+    from PIL import Image, ImageOps, UnidentifiedImageError
+    from pillow_heif import register_heif_opener
+
+    register_heif_opener()
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # draft() lets the JPEG decoder downscale while decoding
+            image.draft("RGB", (max_dimension, max_dimension))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        raise PhotoError(f"Not a supported image: {e}") from None
+
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+class PhotoProcessor:
+    """
+    Decodes batches of meal photos off the event loop.
+
+    HEIC decoding and resizing are CPU-bound, so they run in a process pool of
+    PHOTO_WORKERS spawned workers rather than in threads. Normalized JPEGs are
+    kept in cache/photos named by the SHA-256 of the uploaded bytes, so a
+    re-uploaded photo is not decoded again, and identical photos decoded
+    concurrently share one decode. The oldest files are removed beyond
+    PHOTO_CACHE_MAX_FILES.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, cache_dir: Path = PHOTO_CACHE_DIR):
+        self._cache_dir = Path(cache_dir)
+        self._workers = int(
+            os.getenv("PHOTO_WORKERS", str(min(4, os.cpu_count() or 1)))
+        )
+        self._max_dimension = int(os.getenv("PHOTO_MAX_DIMENSION", "1568"))
+        self._quality = int(os.getenv("PHOTO_JPEG_QUALITY", "85"))
+        self._max_files = int(os.getenv("PHOTO_CACHE_MAX_FILES", "500"))
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def get_instance(cls) -> "PhotoProcessor":
+        """Get or create the singleton instance."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    async def process(self, photos: list[bytes]) -> list[ProcessedPhoto]:
+        """
+        Normalize a batch of uploaded photos concurrently.
+
+        Returns:
+            One ProcessedPhoto per upload, in order
+
+        Raises:
+            PhotoError: If any upload is not a decodable image
+        """
+        return list(await asyncio.gather(*(self._process_one(data) for data in photos)))
+
+    def shutdown(self) -> None:
+        """Stop the pool's worker processes, if any were started."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    async def _process_one(self, data: bytes) -> ProcessedPhoto:
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        jpeg = self._read_cached(content_hash)
+        if jpeg is not None:
+            PHOTOS_PROCESSED.labels("cached").inc()
+            return ProcessedPhoto(content_hash, jpeg, cached=True)
+
+        # Join a decode of the same bytes already in progress
+        future = self._in_flight.get(content_hash)
+        if future is not None:
+            PHOTOS_PROCESSED.labels("cached").inc()
+            return ProcessedPhoto(
+                content_hash, await asyncio.shield(future), cached=True
+            )
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._in_flight[content_hash] = future
+        try:
+            pool = self._get_pool()
+            with PHOTO_DECODE_SECONDS.time():
+                try:
+                    jpeg = await loop.run_in_executor(
+                        pool, normalize_photo, data, self._max_dimension, self._quality
+                    )
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for memory); start a fresh
+                    # pool for the next upload
+                    self._discard_pool(pool)
+                    raise
+            await loop.run_in_executor(None, self._write_cached, content_hash, jpeg)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case nobody joined this decode
+            future.exception()
+            raise
+        else:
+            future.set_result(jpeg)
+        finally:
+            del self._in_flight[content_hash]
+
+        PHOTOS_PROCESSED.labels("decoded").inc()
+        return ProcessedPhoto(content_hash, jpeg, cached=False)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawned rather than forked: the API process runs threads
+                # (listener, scheduler) that a fork would copy mid-operation
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info("Started photo process pool with %d workers", self._workers)
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._pool_lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        logger.warning("Photo process pool broke, restarting it on next use")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _cache_path(self, content_hash: str) -> Path:
+        return self._cache_dir / f"{content_hash}.jpg"
+
+    def _read_cached(self, content_hash: str) -> bytes | None:
+        path = self._cache_path(content_hash)
+        try:
+            jpeg = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Refresh the mtime so pruning removes the least recently used files
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return jpeg
+
+    def _write_cached(self, content_hash: str, jpeg: bytes) -> None:
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(jpeg)
+            os.replace(tmp_path, self._cache_path(content_hash))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._prune()
+
+    def _prune(self) -> None:
+        files = []
+        for path in self._cache_dir.glob("*.jpg"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        if len(files) <= self._max_files:
+            return
+
+        files.sort()
+        for _, path in files[: len(files) - self._max_files]:
+            path.unlink(missing_ok=True)
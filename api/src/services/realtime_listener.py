@@ -3,23 +3,103 @@
 import logging
 import os
 import threading
-from datetime import datetime, timezone
+import time
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 
-from dotenv import load_dotenv
-from huckleberry_api import HuckleberryAPI
-
-from cache.file_cache import read_cache, write_cache, CACHE_FILE
+from cache.event_store import map_food_events, write_food_events
+from cache.file_cache import (
+    read_cache,
+    read_header,
+    read_upstream_status,
+    write_cache,
+    write_upstream_status,
+)
+from cache.response_cache import EncodedResponse
+from models import AllergenResponse
 from services.allergen_service import (
-    process_solid_food_data,
+    ALLERGEN_CONFIG_FILE,
+    ALLERGEN_FOOD_MAP,
+    LOCAL_TIMEZONE,
+    allergens_for_foods,
+    apply_days_since,
     calculate_allergen_exposure,
+    diff_allergens,
+    foods_for_allergen,
+    get_allergen_food_map,
+    get_compiled_food_map,
+    get_food_matcher,
+    load_allergen_food_map,
+    local_today,
+    normalize_food_name,
+    parse_solid_food_data,
+    set_allergen_food_map,
+    update_allergen_exposure,
+)
+from services.config_watcher import FileWatcher
+from services.connection_supervisor import Backoff, CircuitBreaker, ConnectionSupervisor
+from services.exposure_history import ExposureHistory
+from services.feed_store import FeedStore
+from services.food_events import FoodEvents
+from services.huckleberry import (
+    DataSource,
+    create_data_source,
+    extract_solid_food_entries,
+    fetch_all_feed_intervals,
 )
-from services.huckleberry import fetch_all_feed_intervals, extract_solid_food_entries
+from services.interval_sync import DocumentChanges, IntervalSync, SharedIntervalReader
+from services.leader_election import LeaderElection
+from services.metrics import (
+    LISTENER_CALLBACKS,
+    REFRESH_FAILURES,
+    REFRESH_STAGE_SECONDS,
+    REFRESHES,
+    REGISTRY,
+)
+from services.midnight_scheduler import MidnightScheduler
+from services.refresh_scheduler import RefreshScheduler
+from services.startup import STARTUP
+from services.update_history import UpdateHistory
+from services.worker_relay import REFRESH_REQUEST_FILE, RefreshRelay
 
 logger = logging.getLogger(__name__)
 
+_stage = REFRESH_STAGE_SECONDS.labels
+
 
 class AllergenCache:
-    """Singleton class managing in-memory allergen cache with Firebase real-time updates."""
+    """
+    Singleton class managing in-memory allergen cache with Firebase real-time updates.
+
+    In "incremental" ingest mode (the default, see INGEST_MODE) an
+    IntervalSync keeps raw interval documents in a local IntervalStore and
+    hands only added, modified or removed documents to the FeedStore. In
+    "full" mode every feed document update triggers a full re-fetch of the
+    collection.
+
+    Every published update bumps a state version and is broadcast as a compact
+    diff; recent diffs are kept so reconnecting clients can resume from the
+    version they last saw (see get_update_since).
+
+    The Huckleberry session is kept up by a ConnectionSupervisor: the token
+    is refreshed before it expires, a dead listener is reconnected with
+    jittered exponential backoff, and Firestore fetches go through a circuit
+    breaker so refreshes fail fast during an outage. Reads are always served
+    from the last good results, marked stale while upstream is unhealthy
+    (see get_upstream_status).
+
+    Day counts are derived from last exposure dates for the current day in
+    LOCAL_TIMEZONE. A midnight scheduler republishes them when the day rolls
+    over, without fetching from Firestore.
+
+    With WORKERS above 1, one cache per worker process competes for a file
+    lock. Only the leader authenticates, runs the listener and writes the
+    snapshot file; followers watch the snapshot header for a new state
+    version, adopt the leader's results and broadcast the diff to their own
+    WebSocket clients. Refreshes requested on a follower are relayed to the
+    leader through the cache directory by a RefreshRelay.
+    """
 
     _instance = None
     _lock = threading.Lock()
@@ -27,9 +107,127 @@ class AllergenCache:
     def __init__(self):
         self._allergens: list[dict] = []
         self._last_updated: datetime | None = None
-        self._api: HuckleberryAPI | None = None
+        self._view_date: date | None = None
+        # Seeded from the clock so versions keep increasing across restarts
+        self._version = time.time_ns() // 1_000_000
+        self._updates = UpdateHistory(int(os.getenv("WS_DIFF_HISTORY", "64")))
+        self._state_lock = threading.Lock()
+        self._encoded_allergens: EncodedResponse | None = None
+        self._api: DataSource | None = None
         self._child_uid: str | None = None
         self._listener_active = False
+        self._incremental = os.getenv("INGEST_MODE", "incremental") == "incremental"
+        self._match_mode = os.getenv("ALLERGEN_MATCH_MODE", "exact")
+        self._parser_engine = os.getenv("PARSER_ENGINE", "python")
+        self._intervals: IntervalSync | None = None
+        self._watch_lookback = float(os.getenv("WATCH_LOOKBACK_HOURS", "48")) * 3600
+        self._history = ExposureHistory(
+            get_allergen_food_map(), get_food_matcher(self._match_mode), LOCAL_TIMEZONE
+        )
+        self._store = FeedStore(self._history)
+        self._store_applied = False
+        # Child whose interval store documents self._store holds
+        self._store_child: str | None = None
+        self._update_lock = threading.Lock()
+        self._refresh_timeout = float(os.getenv("REFRESH_TIMEOUT_SECONDS", "120"))
+        self._scheduler = RefreshScheduler(
+            self._fetch_and_update,
+            window=float(os.getenv("REFRESH_COALESCE_SECONDS", "0.5")),
+            name="allergen-refresh",
+        )
+        self._breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "60")),
+            on_change=self._share_upstream_status,
+        )
+        self._token_refresh_margin = float(
+            os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "600")
+        )
+        self._supervisor = ConnectionSupervisor(
+            self._connect,
+            self._disconnect,
+            self._maintain_session,
+            self._listener_healthy,
+            interval=float(os.getenv("SESSION_CHECK_SECONDS", "30")),
+            backoff=Backoff(
+                float(os.getenv("RECONNECT_BACKOFF_BASE_SECONDS", "1")),
+                float(os.getenv("RECONNECT_BACKOFF_MAX_SECONDS", "300")),
+            ),
+            name="allergen-session",
+            on_status=self._share_upstream_status,
+        )
+        self._midnight = MidnightScheduler(
+            self._roll_over_day, LOCAL_TIMEZONE, name="allergen-midnight"
+        )
+        self._config_watcher = FileWatcher(
+            ALLERGEN_CONFIG_FILE,
+            self._reload_allergen_config,
+            interval=float(os.getenv("ALLERGEN_CONFIG_POLL_SECONDS", "5")),
+            name="allergen-config",
+        )
+
+        # Multi-worker mode: elect one leader process per host
+        self._election: LeaderElection | None = None
+        self._follow_interval = float(os.getenv("WORKER_POLL_SECONDS", "0.25"))
+        self._leader_intervals = SharedIntervalReader()
+        self._adopted_version: int | None = None
+        # The leader's (status, stale_since), from its snapshot header
+        self._leader_upstream: tuple[str, datetime | None] | None = None
+        # Serializes snapshot writes with header-only status rewrites
+        self._snapshot_lock = threading.Lock()
+        self._relay = RefreshRelay(self._refresh_timeout, self._follow_interval)
+        self._refresh_requests = FileWatcher(
+            REFRESH_REQUEST_FILE,
+            self._handle_refresh_request,
+            interval=self._follow_interval,
+            name="allergen-refresh-requests",
+        )
+        if int(os.getenv("WORKERS", "1")) > 1:
+            self._election = LeaderElection(
+                self._become_leader,
+                self._follow_leader,
+                interval=self._follow_interval,
+                name="allergen-leader-election",
+            )
+            REGISTRY.gauge(
+                "allergen_worker_is_leader",
+                "1 if this worker process runs the listener, 0 if it follows.",
+                lambda: int(self._election.is_leader),
+            )
+        self._reload_allergen_config()
+
+        REGISTRY.gauge(
+            "allergen_upstream_connected",
+            "1 while the Firebase listener is connected and Firestore reachable.",
+            lambda: int(self.get_upstream_status()[1] is None),
+        )
+        REGISTRY.gauge(
+            "allergen_upstream_reconnects",
+            "Times the Firebase listener was found dead and reconnected.",
+            lambda: self._supervisor.reconnects,
+        )
+        REGISTRY.gauge(
+            "allergen_refresh_scheduler",
+            "Refresh triggers and requests received, requests that joined a "
+            "running fetch, fetches started, and whether one is running or pending.",
+            lambda: {(stat,): value for stat, value in self._scheduler.stats().items()},
+            labelnames=("stat",),
+        )
+        REGISTRY.gauge(
+            "allergen_cache_age_seconds",
+            "Seconds since allergen results were last published.",
+            self._cache_age,
+        )
+        REGISTRY.gauge(
+            "allergen_feed_entries",
+            "Solid food entries held in memory.",
+            lambda: len(self._store),
+        )
+        REGISTRY.gauge(
+            "allergen_multi_documents",
+            "Multi batch documents holding solid food entries.",
+            self._store.multi_document_count,
+        )
 
     @classmethod
     def get_instance(cls) -> "AllergenCache":
@@ -43,120 +241,828 @@ class AllergenCache:
     def _load_from_file_cache(self) -> bool:
         """Load existing data from file cache for warm boot. Returns True if loaded."""
         try:
-            if CACHE_FILE.exists():
-                import json
-
-                with open(CACHE_FILE, "r") as f:
-                    data = json.load(f)
-                self._allergens = data.get("allergens", [])
-                self._last_updated = datetime.fromisoformat(data["last_updated"])
-                logger.info("Loaded %d allergens from file cache", len(self._allergens))
-                return True
+            data = read_cache(ignore_ttl=True)
+            if data is None:
+                return False
+
+            with self._update_lock:
+                self._view_date = local_today()
+                self._allergens = apply_days_since(data["allergens"], self._view_date)
+                self._last_updated = data["last_updated"]
+                if not self._incremental:
+                    self._recalculate_from_event_file()
+                # Workers share the leader's version sequence
+                if self._election is not None and "version" in data:
+                    self._version = self._adopted_version = data["version"]
+                if "entries" in data and not self._store_applied:
+                    self._store.load(data["entries"])
+                    self._store_applied = True
+            logger.info(
+                "Loaded %d allergens and %d entries from file cache",
+                len(self._allergens),
+                len(self._store),
+            )
+            return True
         except Exception as e:
-            logger.warning("Could not load file cache: %s", e)
+            logger.warning("Could not load file cache: %s", e, exc_info=True)
         return False
 
+    def _load_interval_store(self) -> None:
+        """Apply the interval documents an earlier run stored, before going upstream."""
+        try:
+            with self._update_lock:
+                self._leader_intervals.apply_changes(self._store.apply_documents)
+                self._store_child = self._leader_intervals.child_uid
+                if self._store_child is None:
+                    return
+                if self._last_updated is None:
+                    # No snapshot to take results from, so calculate them
+                    self._view_date = local_today()
+                    self._allergens = update_allergen_exposure(
+                        [], self._store, set(), self._match_mode
+                    )
+                self._store_applied = True
+            logger.info(
+                "Loaded %d solid entries from the interval store", len(self._store)
+            )
+        except Exception as e:
+            logger.warning("Could not load interval store: %s", e, exc_info=True)
+
+    def _recalculate_from_event_file(self) -> None:
+        """
+        Recalculate file-cached results made with a different allergen config.
+
+        Full mode saves each fetch's FoodEvents to a mappable file, so the
+        results can be corrected at boot without parsing any entries.
+        """
+        cached = {a["name"]: a["foods"] for a in self._allergens}
+        if cached == get_allergen_food_map():
+            return
+
+        events = map_food_events()
+        if events is None:
+            return
+        allergens = calculate_allergen_exposure(events, self._match_mode)
+        self._allergens = apply_days_since(allergens, self._view_date)
+        logger.info(
+            "Recalculated cached allergens for the current config from %d food events",
+            len(events),
+        )
+
     def _fetch_and_update(self) -> None:
-        """Fetch fresh data from Firestore and update caches."""
+        """
+        Fetch fresh data from Firestore and update caches.
+
+        Runs on the refresh scheduler's worker thread, which logs and records
+        any error raised here against the run.
+        """
+        if self._is_follower():
+            REFRESHES.labels("relay").inc()
+            self._request_leader_refresh()
+            return
+
+        kind = "sync" if self._intervals is not None else "full"
         try:
             if not self._api or not self._child_uid:
                 logger.warning("Cannot fetch: API or child_uid not initialized")
                 return
 
+            REFRESHES.labels(kind).inc()
+            if self._intervals is not None:
+                self._intervals.sync()
+                return
+
             # Fetch all feed intervals
-            client = self._api._get_firestore_client()
-            all_entries = fetch_all_feed_intervals(client, self._child_uid)
-            solid_entries = extract_solid_food_entries(all_entries)
+            with _stage("firestore").time():
+                all_entries = self._breaker.call(
+                    lambda: fetch_all_feed_intervals(
+                        self._api._get_firestore_client(),
+                        self._child_uid,
+                        solids_only=True,
+                    )
+                )
+            with _stage("extract").time():
+                solid_entries = extract_solid_food_entries(all_entries)
 
             if not solid_entries:
                 logger.warning("No solid food entries found")
                 return
 
             # Process and calculate allergen exposure
-            df = process_solid_food_data(solid_entries)
-            allergens = calculate_allergen_exposure(df)
+            with _stage("process").time():
+                data = parse_solid_food_data(solid_entries, self._parser_engine)
+            with _stage("calculate").time():
+                allergens = calculate_allergen_exposure(data, self._match_mode)
+            if isinstance(data, FoodEvents):
+                with _stage("events_write").time():
+                    write_food_events(data)
+
+            with self._update_lock:
+                with _stage("apply").time():
+                    self._store.load(all_entries)
+                self._store_applied = True
+                self._publish(allergens)
+
+            logger.info(
+                "Updated allergen cache with %d allergens from %d solid food entries",
+                len(allergens),
+                len(solid_entries),
+            )
+
+        except Exception:
+            REFRESH_FAILURES.labels(kind).inc()
+            raise
+
+    def _publish(
+        self,
+        allergens: list[dict],
+        version: int | None = None,
+        last_updated: datetime | None = None,
+    ) -> None:
+        """
+        Update in-memory cache, persist to file cache and broadcast a diff.
+
+        Args:
+            allergens: New allergen results
+            version: State version to adopt instead of bumping our own; the
+                results then came from the leader's snapshot file, so they
+                are not written back to it
+            last_updated: Calculation time to keep (defaults to now)
+        """
+        today = local_today()
+        allergens = apply_days_since(allergens, today)
+        with self._state_lock:
+            changes = diff_allergens(self._allergens, allergens)
+            order = [a["name"] for a in allergens]
+            order_changed = order != [a["name"] for a in self._allergens]
 
-            # Update in-memory cache
             self._allergens = allergens
-            self._last_updated = datetime.now(timezone.utc)
+            self._view_date = today
+            self._last_updated = last_updated or datetime.now(timezone.utc)
+            base_version = self._version
+            self._version = self._version + 1 if version is None else version
+            if not order_changed:
+                order = None
+            self._updates.record(base_version, self._version, changes, order)
+            message = self._diff_message(base_version, changes, order)
 
-            # Persist to file cache
-            write_cache(allergens, self._last_updated)
+        # Persist to file cache; the interval store already holds the entries
+        # in incremental mode, so only full mode snapshots them
+        if version is None:
+            entries = None if self._incremental else self._store.items()
+            with _stage("file_write").time(), self._snapshot_lock:
+                write_cache(
+                    allergens,
+                    self._last_updated,
+                    entries,
+                    self._version,
+                    self.get_upstream_status(),
+                )
 
-            # Broadcast update to WebSocket clients
-            from websocket.connection_manager import ConnectionManager
+        # Broadcast update to WebSocket clients
+        from websocket.connection_manager import ConnectionManager
 
-            manager = ConnectionManager.get_instance()
-            manager.broadcast_sync(
-                {
-                    "type": "update",
-                    "allergens": allergens,
-                    "last_updated": self._last_updated.isoformat(),
-                }
-            )
+        manager = ConnectionManager.get_instance()
+        with _stage("broadcast").time():
+            manager.broadcast_sync(message)
 
+    def _roll_over_day(self) -> None:
+        """
+        Recompute day counts if the local date changed since the last publish.
+
+        Runs on the midnight scheduler's thread, and when a worker takes over
+        as leader, never on a read path: publishing writes the file cache and
+        broadcasts, which must stay off the event loop.
+        """
+        # Followers get rolled-over counts from the leader's next snapshot
+        if self._is_follower():
+            return
+
+        with self._update_lock:
+            if self._view_date != local_today() and self._allergens:
+                self._publish(self._allergens)
+                logger.info("Rolled allergen day counts over to %s", self._view_date)
+
+    def _reload_allergen_config(self) -> None:
+        """Apply ALLERGEN_CONFIG_FILE, or the built-in map if the file is gone."""
+        try:
+            if ALLERGEN_CONFIG_FILE.exists():
+                food_map = load_allergen_food_map(ALLERGEN_CONFIG_FILE)
+            else:
+                food_map = ALLERGEN_FOOD_MAP
+        except (OSError, ValueError) as e:
+            logger.error("Keeping current allergen config: %s", e)
+            return
+
+        changed = self.apply_allergen_food_map(food_map)
+        if changed:
             logger.info(
-                "Updated allergen cache with %d allergens from %d solid food entries",
-                len(allergens),
-                len(solid_entries),
+                "Applied allergen config from %s, %d allergens affected",
+                ALLERGEN_CONFIG_FILE
+                if food_map is not ALLERGEN_FOOD_MAP
+                else "built-in map",
+                len(changed),
             )
 
-        except Exception as e:
-            logger.error("Error fetching and updating allergens: %s", e)
+    def apply_allergen_food_map(self, food_map: dict[str, list[str]]) -> set[str]:
+        """
+        Switch to a new allergen -> foods map and recompute from held entries.
+
+        Affected allergens are those added, removed or with a different food
+        list, plus any whose matches changed for a food already in the store
+        (keyword matches can shift when another allergen gains a longer
+        keyword). They are recalculated from the in-memory store without
+        contacting Firestore, and only they are broadcast.
+
+        Returns:
+            set: Names of the affected allergens
+        """
+        with self._update_lock:
+            old = get_compiled_food_map()
+            if food_map == old.food_map:
+                return set()
+
+            set_allergen_food_map(food_map)
+            new = get_compiled_food_map()
+            old_match = old.matcher(self._match_mode)
+            new_match = new.matcher(self._match_mode)
+
+            affected = {
+                allergen
+                for allergen in old.food_map.keys() | food_map.keys()
+                if old.food_map.get(allergen) != food_map.get(allergen)
+            }
+            for food in self._store.foods():
+                affected.update(set(old_match(food)) ^ set(new_match(food)))
+
+            self._history.configure(food_map, new_match)
+            self._store.rebuild_history()
+
+            # Without entries there is nothing to recompute from yet; the first
+            # application of feed data calculates everything. Followers reload
+            # the config too, for feed queries, but take results from the leader
+            if self._store_applied and not self._is_follower():
+                allergens = update_allergen_exposure(
+                    self._allergens, self._store, affected, self._match_mode
+                )
+                self._publish(allergens)
+            return affected
+
+    def _snapshot_message(self) -> dict:
+        return {
+            "type": "snapshot",
+            "version": self._version,
+            "allergens": self._allergens,
+            "last_updated": self._last_updated.isoformat()
+            if self._last_updated
+            else None,
+        }
+
+    def _diff_message(
+        self, base_version: int, changes: list[dict], order: list[str] | None
+    ) -> dict:
+        message = {
+            "type": "diff",
+            "version": self._version,
+            "base_version": base_version,
+            "changes": changes,
+            "last_updated": self._last_updated.isoformat()
+            if self._last_updated
+            else None,
+        }
+        if order is not None:
+            message["order"] = order
+        return message
+
+    def _apply_documents(self, documents: DocumentChanges) -> None:
+        """Apply interval document changes and update the allergens they touch."""
+        if not documents:
+            return
+
+        with self._update_lock:
+            with _stage("apply").time():
+                touched = self._store.apply_documents(documents)
+                affected = allergens_for_foods(touched, self._match_mode)
+            if not affected and self._store_applied:
+                logger.debug(
+                    "Applied %d interval changes, no allergens affected", len(documents)
+                )
+                return
+
+            # The first application replaces whatever the file cache held
+            with _stage("calculate").time():
+                allergens = update_allergen_exposure(
+                    self._allergens if self._store_applied else [],
+                    self._store,
+                    affected,
+                    self._match_mode,
+                )
+            self._store_applied = True
+            self._publish(allergens)
+
+        logger.info(
+            "Applied %d interval changes, updated %d allergens (%d solid entries)",
+            len(documents),
+            len(affected),
+            len(self._store),
+        )
 
     def _on_feed_update(self, data: dict) -> None:
         """Callback for Firebase feed updates."""
-        logger.info("Received feed update from Firebase, fetching fresh data")
-        self._fetch_and_update()
+        LISTENER_CALLBACKS.labels("feed").inc()
+        logger.info("Received feed update from Firebase, scheduling refresh")
+        self._scheduler.trigger()
+
+    def _is_follower(self) -> bool:
+        """True in a multi-worker process that started without winning the election."""
+        return (
+            self._election is not None
+            and self._listener_active
+            and not self._election.is_leader
+        )
+
+    def _become_leader(self) -> None:
+        """Take over the listener after winning the election (election thread)."""
+        if self._incremental:
+            # Catch up on what the previous leader stored, as the stored
+            # documents already applied are not loaded again on connect
+            self._leader_intervals.apply_changes(self._apply_documents)
+        with self._update_lock:
+            # The leader writes the interval store instead of following it
+            self._leader_intervals.close()
+        # The previous leader may have stopped before rolling the day over
+        self._roll_over_day()
+        # Followers would otherwise keep reporting the previous leader's status
+        self._share_upstream_status()
+        self._supervisor.start()
+        self._refresh_requests.start()
+
+    def _share_upstream_status(self) -> None:
+        """Write a leader's new upstream status into the snapshot for followers."""
+        if self._election is None or not self._election.is_leader:
+            return
+        status, stale_since = self.get_upstream_status()
+        try:
+            with self._snapshot_lock:
+                write_upstream_status(status, stale_since)
+        except OSError as e:
+            logger.warning("Could not share upstream status: %s", e)
+
+    def _follow_leader(self) -> None:
+        """Adopt the leader's latest snapshot if its state version changed."""
+        header = read_header()
+        if header is not None:
+            self._leader_upstream = read_upstream_status(header)
+        if header is None or header.get("state_version") in (
+            None,
+            self._adopted_version,
+        ):
+            return
+
+        data = read_cache(ignore_ttl=True)
+        if data is None or "version" not in data:
+            return
+
+        with self._update_lock:
+            if data["version"] == self._adopted_version or not self._is_follower():
+                return
+            self._adopted_version = data["version"]
+            if "entries" in data:
+                self._store.load(data["entries"])
+            else:
+                with _stage("apply").time():
+                    self._leader_intervals.apply_changes(self._store.apply_documents)
+                self._store_child = self._leader_intervals.child_uid
+            self._store_applied = True
+            self._publish(data["allergens"], data["version"], data["last_updated"])
+        logger.debug("Adopted leader snapshot version %d", data["version"])
+
+    def _request_leader_refresh(self) -> None:
+        """Ask the leader worker to refresh and wait until it reports back."""
+        self._relay.request()
+        # Pick up the refreshed snapshot before reporting success
+        self._follow_leader()
+
+    def _handle_refresh_request(self) -> None:
+        """Run a refresh requested by a follower worker (refresh request watcher)."""
+        self._relay.serve(self._run_requested_refresh)
+
+    def _run_requested_refresh(self) -> tuple[str, str | None]:
+        job_id = self._scheduler.submit()
+        self._scheduler.wait(job_id, self._refresh_timeout)
+        status, error = self._scheduler.run_status(job_id) or ("failed", None)
+        if status not in ("succeeded", "failed"):
+            return "failed", "Timed out waiting for allergen data refresh"
+        return status, error
 
     def start_listener(self) -> None:
-        """Start the Firebase real-time listener."""
+        """
+        Start the Firebase real-time listener without blocking.
+
+        The file cache and the interval store are loaded first, so requests
+        can be answered as soon as this returns, even while upstream is
+        down; authentication and listener setup continue on the session
+        supervisor's thread, retrying with backoff. In multi-worker mode this
+        only enters the leader election; the listener starts in whichever
+        worker wins it.
+        """
         if self._listener_active:
             logger.warning("Listener already active")
             return
 
         # Load from file cache first for immediate availability
-        self._load_from_file_cache()
+        with STARTUP.phase("file_cache"):
+            self._load_from_file_cache()
+        if self._incremental:
+            with STARTUP.phase("interval_store"):
+                self._load_interval_store()
 
-        # Authenticate with Huckleberry
-        load_dotenv()
-        self._api = HuckleberryAPI(
-            email=os.getenv("HUCKLEBERRY_EMAIL"),
-            password=os.getenv("HUCKLEBERRY_PASSWORD"),
-        )
-        self._api.authenticate()
+        self._scheduler.start()
+        self._midnight.start()
+        self._config_watcher.start()
+        self._listener_active = True
+        if self._election is not None:
+            self._election.start()
+            logger.info("Worker %d joined leader election", os.getpid())
+            return
+        self._supervisor.start()
+
+    def _connect(self) -> None:
+        """Authenticate and start the listener (session supervisor thread)."""
+        # Only the first connection counts towards startup timings
+        first = "listener_ready" not in STARTUP.phases()
+        phase = STARTUP.phase if first else lambda name: nullcontext()
+
+        if self._api is None:
+            # Importing huckleberry_api dominates creating the client
+            with phase("import_huckleberry_api"):
+                self._api = create_data_source()
+        # Reconnects authenticate afresh in case the refresh token was revoked
+        with phase("authenticate"):
+            self._api.authenticate()
         logger.info("Authenticated with Huckleberry API")
 
         # Get child UID
-        children = self._api.get_children()
-        if not children:
-            logger.error("No children found in Huckleberry account")
-            return
-        self._child_uid = children[0]["uid"]
+        if self._child_uid is None:
+            with phase("get_children"):
+                children = self._api.get_children()
+            if not children:
+                raise RuntimeError("No children found in Huckleberry account")
+            self._child_uid = children[0]["uid"]
 
         # Setup real-time listener
-        self._api.setup_feed_listener(self._child_uid, self._on_feed_update)
-        self._listener_active = True
+        with phase("listener"):
+            if self._incremental:
+                if self._intervals is None:
+                    self._leader_intervals.close()
+                    self._intervals = IntervalSync(
+                        self._api,
+                        self._child_uid,
+                        self._apply_documents,
+                        self._scheduler.trigger,
+                        self._breaker,
+                        self._watch_lookback,
+                    )
+                    # The store was applied at startup unless it held
+                    # another child, whose documents must go
+                    if self._store_child != self._child_uid:
+                        with self._update_lock:
+                            self._store.clear()
+                            self._store_applied = False
+                        self._store_child = self._child_uid
+                        self._intervals.load()
+                # Also catches up on changes missed while disconnected
+                with phase("sync"):
+                    self._intervals.sync()
+                self._intervals.watch()
+            else:
+                self._api.setup_feed_listener(self._child_uid, self._on_feed_update)
         logger.info("Firebase listener started for child %s", self._child_uid)
+        if first:
+            STARTUP.mark("listener_ready")
+            STARTUP.report()
+
+    def _disconnect(self) -> None:
+        """Stop the listener, keeping the session and the cached data."""
+        if self._intervals is not None:
+            self._intervals.stop_watches()
+        if self._api is not None:
+            self._api.stop_all_listeners()
+
+    def _maintain_session(self) -> None:
+        """Refresh the token ahead of expiry; retry Firestore once the circuit half-opens."""
+        expires_at = self._api.token_expires_at
+        if (
+            expires_at is not None
+            and expires_at - time.time() < self._token_refresh_margin
+        ):
+            # Also recreates the feed listener (full mode) with the new token
+            self._api.refresh_auth_token()
+            if self._intervals is not None:
+                self._intervals.watch()
+            # Catch up on changes made while listeners were being replaced
+            self._scheduler.trigger()
+            logger.info("Refreshed Huckleberry token ahead of expiry")
+
+        if self._breaker.state == "half_open":
+            self._scheduler.trigger()
+
+    def _listener_healthy(self) -> bool:
+        """Check that every Firestore watch is still streaming."""
+        if self._incremental:
+            return self._intervals is not None and self._intervals.watches_active()
+        watches = list(self._api._listeners.values())
+        return bool(watches) and all(
+            watch is not None and getattr(watch, "is_active", True) for watch in watches
+        )
+
+    def get_upstream_status(self) -> tuple[str, datetime | None]:
+        """
+        Get the state of the upstream connection behind the served data.
+
+        Returns:
+            Tuple of (status, stale_since). status is "connected", "starting",
+            "reconnecting", "circuit_open" or, in follower workers whose
+            leader has not shared its status yet, "following". Followers
+            report the leader's status from its snapshot header. stale_since
+            is when the data stopped being kept current (for "starting", when
+            it was last updated), or None while it is current
+        """
+        if self._is_follower():
+            return self._leader_upstream or ("following", None)
+        if self._breaker.state != "closed":
+            return "circuit_open", self._breaker.opened_since
+        status = self._supervisor.status
+        if status == "connected":
+            return status, None
+        if status == "starting":
+            return status, self._last_updated
+        return status, self._supervisor.since
 
     def stop_listener(self) -> None:
         """Stop the Firebase real-time listener."""
-        if self._api and self._listener_active:
-            self._api.stop_all_listeners()
-            self._listener_active = False
-            logger.info("Firebase listener stopped")
+        if not self._listener_active:
+            return
+
+        self._supervisor.stop()
+        self._disconnect()
+        self._refresh_requests.stop()
+        self._scheduler.stop()
+        self._midnight.stop()
+        self._config_watcher.stop()
+        if self._intervals is not None:
+            self._intervals.close()
+            self._intervals = None
+        self._leader_intervals.close()
+        # Hand leadership over only once the listener is down
+        if self._election is not None:
+            self._election.stop()
+        self._listener_active = False
+        logger.info("Firebase listener stopped")
 
     def get_allergens(self) -> tuple[list[dict], datetime | None]:
         """Get current allergen data from cache."""
         return self._allergens, self._last_updated
 
-    def refresh(self) -> tuple[list[dict], datetime]:
-        """Force refresh allergen data from Huckleberry."""
-        if not self._api or not self._child_uid:
+    def get_state(self) -> tuple[list[dict], datetime | None, int]:
+        """Get current allergen data together with its state version."""
+        with self._state_lock:
+            return self._allergens, self._last_updated, self._version
+
+    def get_encoded_allergens(self) -> EncodedResponse | None:
+        """
+        Get the GET /api/allergens response body, encoded once per state version.
+
+        Returns:
+            EncodedResponse, or None if there is no allergen data yet
+        """
+        status, stale_since = self.get_upstream_status()
+        stale = status not in ("connected", "following")
+        # The body also carries upstream health, which followers learn from
+        # the leader only when they next poll, so it is part of the key;
+        # otherwise a client switching workers could get a 304 for a body it
+        # never saw
+        tag = (
+            status if stale_since is None else f"{status}-{stale_since.timestamp():.6f}"
+        )
+        with self._state_lock:
+            if not self._allergens:
+                return None
+
+            encoded = self._encoded_allergens
+            if encoded is None or (encoded.version, encoded.tag) != (
+                self._version,
+                tag,
+            ):
+                response = AllergenResponse(
+                    allergens=self._allergens,
+                    last_updated=self._last_updated,
+                    version=self._version,
+                    stale=stale,
+                    stale_since=stale_since,
+                    upstream_status=status,
+                )
+                encoded = EncodedResponse(
+                    response.model_dump_json().encode(), self._version, tag
+                )
+                self._encoded_allergens = encoded
+            return encoded
+
+    def get_update_since(self, since: int | None = None) -> dict | None:
+        """
+        Get the WebSocket message that brings a client up to date.
+
+        Args:
+            since: State version the client already has, if any
+
+        Returns:
+            A "diff" merging every change after `since` when the recent diff
+            history still covers it, a full "snapshot" otherwise, or None if
+            the client is already current or there is no data yet
+        """
+        with self._state_lock:
+            if not self._allergens or since == self._version:
+                return None
+
+            merged = None
+            if since is not None:
+                merged = self._updates.merged_since(since, self._version)
+            if merged is None:
+                return self._snapshot_message()
+            return self._diff_message(since, *merged)
+
+    def get_feed_entries(
+        self,
+        before: float | None = None,
+        after: float | None = None,
+        limit: int | None = None,
+        food: str | None = None,
+        allergen: str | None = None,
+        cursor: tuple[float, str] | None = None,
+    ) -> tuple[list[tuple[str, dict]], int] | None:
+        """
+        Get solid food entries from the in-memory store, newest first.
+
+        Args:
+            before: Only entries starting strictly before this epoch timestamp
+            after: Only entries starting strictly after this epoch timestamp
+            limit: Maximum number of entries to return
+            food: Only entries containing this food name (case insensitive)
+            allergen: Only entries containing a food mapped to this allergen
+            cursor: (start, entry_id) of the last entry already returned
+
+        Returns:
+            Tuple of ((entry_id, entry) pairs, total entries matching the
+            food/allergen filters), or None if the store has not been
+            populated yet
+        """
+        with self._update_lock:
+            if not self._store_applied:
+                return None
+
+            entry_ids = None
+            if food is not None or allergen is not None:
+                foods = self._store.foods()
+                if food is not None:
+                    foods &= {food.lower()}
+                if allergen is not None:
+                    foods = foods_for_allergen(foods, allergen, self._match_mode)
+                entry_ids = self._store.entry_ids_for_foods(foods)
+
+            entries = self._store.query(before, after, limit, entry_ids, cursor)
+            total_count = len(self._store) if entry_ids is None else len(entry_ids)
+            return entries, total_count
+
+    def get_food(self, food: str) -> dict | None:
+        """
+        Look up when a food was last eaten, how often, and its allergens.
+
+        A food never logged is reported with a count of 0, so "when did she
+        last eat tahini?" still gets its allergens back.
+
+        Returns:
+            Food stats dict, or None if the store has not been populated yet
+        """
+        with self._update_lock:
+            if not self._store_applied:
+                return None
+            return self._food_result(normalize_food_name(food), local_today())
+
+    def suggest_foods(self, prefix: str, limit: int = 10) -> list[dict] | None:
+        """
+        Autocomplete eaten food names by prefix, in alphabetical order.
+
+        Returns:
+            Up to `limit` food stats dicts, or None if the store has not been
+            populated yet
+        """
+        with self._update_lock:
+            if not self._store_applied:
+                return None
+            today = local_today()
+            return [
+                self._food_result(food, today)
+                for food in self._store.foods_with_prefix(
+                    normalize_food_name(prefix), limit
+                )
+            ]
+
+    def _food_result(self, food: str, today: date) -> dict:
+        last_seen = self._store.last_seen(food)
+        last_seen_at = days_since = None
+        if last_seen is not None:
+            last_seen_at = datetime.fromtimestamp(
+                last_seen, tz=ZoneInfo(LOCAL_TIMEZONE)
+            )
+            days_since = (today - last_seen_at.date()).days
+        return {
+            "name": food,
+            "count": self._store.food_count(food),
+            "last_seen": last_seen_at,
+            "days_since": days_since,
+            "allergens": list(get_food_matcher(self._match_mode)(food)),
+        }
+
+    def get_exposure_history(
+        self, days: int, allergen: str | None = None
+    ) -> dict | None:
+        """
+        Get per-allergen exposure time series for the last `days` days.
+
+        Returns:
+            dict as returned by ExposureHistory.summarize, or None if the
+            store has not been populated yet
+        """
+        with self._update_lock:
+            if not self._store_applied:
+                return None
+
+            end = local_today()
+            start = end - timedelta(days=days - 1)
+            return self._history.summarize(start, end, allergen)
+
+    def _cache_age(self) -> float | None:
+        last_updated = self._last_updated
+        if last_updated is None:
+            return None
+        return (datetime.now(last_updated.tzinfo) - last_updated).total_seconds()
+
+    def start_refresh(self) -> int:
+        """
+        Start refreshing allergen data from Huckleberry without waiting.
+
+        Joins a refresh already in flight rather than starting a second one.
+
+        Returns:
+            int: Job id to pass to wait_for_refresh and get_refresh_job
+        """
+        if not self._is_follower() and (not self._api or not self._child_uid):
             raise RuntimeError("Listener not started")
+        return self._scheduler.submit()
+
+    def wait_for_refresh(self, job_id: int, timeout: float | None = None) -> bool:
+        """
+        Block until a refresh job finishes (REFRESH_TIMEOUT_SECONDS by default).
+
+        Returns:
+            bool: True if the job finished within timeout
+        """
+        if timeout is None:
+            timeout = self._refresh_timeout
+        return self._scheduler.wait(job_id, timeout)
+
+    def get_refresh_job(self, job_id: int) -> dict | None:
+        """
+        Get the status of a refresh job.
+
+        Returns:
+            dict with "job_id", "status" ("pending", "running", "succeeded" or
+            "failed"), "error" and "last_updated", or None for an unknown job
+        """
+        status = self._scheduler.run_status(job_id)
+        if status is None:
+            return None
+        return {
+            "job_id": job_id,
+            "status": status[0],
+            "error": status[1],
+            "last_updated": self._last_updated,
+        }
+
+    def refresh(self) -> tuple[list[dict], datetime]:
+        """
+        Force refresh allergen data from Huckleberry and wait for it.
 
-        self._fetch_and_update()
+        Blocks the calling thread; async callers should use start_refresh and
+        wait_for_refresh off the event loop instead.
+        """
+        job_id = self.start_refresh()
+        if not self.wait_for_refresh(job_id):
+            raise RuntimeError("Timed out waiting for allergen data refresh")
 
+        job = self.get_refresh_job(job_id)
+        if job["status"] == "failed":
+            raise RuntimeError(f"Failed to refresh allergen data: {job['error']}")
         if not self._last_updated:
             raise RuntimeError("Failed to refresh allergen data")
 
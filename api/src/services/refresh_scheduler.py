@@ -0,0 +1,186 @@
+"""Coalescing, single-flight scheduler for allergen cache refreshes."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Number of failed runs whose errors are kept for status lookups
+MAX_RECORDED_ERRORS = 64
+
+
+class RefreshScheduler:
+    """
+    Runs a refresh function on a dedicated worker thread.
+
+    Triggers arriving within `window` seconds of the first pending trigger are
+    merged into one run, at most one run is in flight at a time, and a trigger
+    that arrives mid-run schedules exactly one follow-up run. Callers that need
+    the result use submit(), which joins a run already in flight or starts one
+    immediately and returns its run number, then wait() for that run (or
+    request() to do both). Runs are numbered from 1 in the order they start.
+    """
+
+    def __init__(
+        self,
+        refresh_fn: Callable[[], None],
+        window: float = 0.5,
+        name: str = "refresh-scheduler",
+    ):
+        self._refresh_fn = refresh_fn
+        self._window = window
+        self._name = name
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+
+        self._pending = False
+        self._deadline = 0.0
+        self._running = False
+        self._started = 0
+        self._completed = 0
+        self._issued = 0
+        self._errors: OrderedDict[int, str] = OrderedDict()
+
+        self._triggers = 0
+        self._requests = 0
+        self._joined = 0
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._run_worker, name=self._name, daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the worker thread after any run in flight finishes."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+    def trigger(self) -> None:
+        """Schedule a run without blocking; merged with other pending triggers."""
+        with self._cond:
+            self._triggers += 1
+            if not self._pending:
+                self._pending = True
+                self._deadline = time.monotonic() + self._window
+                self._cond.notify_all()
+
+    def submit(self) -> int:
+        """
+        Ask for a refresh now without waiting for it.
+
+        Joins the run already in flight if there is one; otherwise starts one
+        immediately, skipping the coalescing window.
+
+        Returns:
+            int: Number of the run that will satisfy the request
+        """
+        with self._cond:
+            self._requests += 1
+            if self._running:
+                self._joined += 1
+                run = self._started
+            else:
+                run = self._started + 1
+                self._pending = True
+                self._deadline = time.monotonic()
+                self._cond.notify_all()
+            self._issued = max(self._issued, run)
+            return run
+
+    def wait(self, run: int, timeout: float | None = None) -> bool:
+        """
+        Wait for a run to finish.
+
+        Returns:
+            bool: True if the run finished within timeout
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._completed >= run or self._stopped, timeout
+            )
+            return self._completed >= run
+
+    def request(self, timeout: float | None = None) -> bool:
+        """
+        Run a refresh now and wait for it to finish.
+
+        Returns:
+            bool: True if the run finished within timeout
+        """
+        return self.wait(self.submit(), timeout)
+
+    def run_status(self, run: int) -> tuple[str, str | None] | None:
+        """
+        Look up a run returned by submit().
+
+        Returns:
+            Tuple of (status, error) where status is "pending", "running",
+            "succeeded" or "failed", or None if no such run was submitted
+        """
+        with self._cond:
+            if not 1 <= run <= max(self._issued, self._started):
+                return None
+            if self._completed >= run:
+                error = self._errors.get(run)
+                return ("failed", error) if error is not None else ("succeeded", None)
+            if self._started >= run:
+                return "running", None
+            return "pending", None
+
+    def stats(self) -> dict[str, int]:
+        """Return counters for triggers received versus runs executed."""
+        with self._cond:
+            return {
+                "triggers": self._triggers,
+                "requests": self._requests,
+                "joined": self._joined,
+                "fetches": self._started,
+                "in_flight": int(self._running),
+                "pending": int(self._pending),
+            }
+
+    def _run_worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                while not self._stopped:
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopped:
+                    return
+
+                self._pending = False
+                self._running = True
+                self._started += 1
+                run = self._started
+
+            try:
+                self._refresh_fn()
+            except Exception as e:
+                logger.exception("Scheduled refresh failed")
+                with self._cond:
+                    self._errors[run] = str(e)
+                    while len(self._errors) > MAX_RECORDED_ERRORS:
+                        self._errors.popitem(last=False)
+            finally:
+                with self._cond:
+                    self._running = False
+                    self._completed += 1
+                    self._cond.notify_all()
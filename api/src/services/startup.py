@@ -0,0 +1,70 @@
+"""Startup phase timings, logged and exported as metrics."""
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    Durations of named startup phases, measured from process boot.
+
+    The server starts answering requests from the file cache before the
+    listener is up, so phases finish on different threads: each records how
+    long it took and how long after boot it finished. `boot` is taken when
+    this module is first imported, which main.py does before anything heavy.
+    """
+
+    def __init__(self):
+        self._boot = time.perf_counter()
+        self._phases: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Record the duration of the with-block as phase `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - started)
+
+    def mark(self, name: str) -> None:
+        """Record a milestone: a phase lasting from boot until now."""
+        self._record(name, time.perf_counter() - self._boot)
+
+    def phases(self) -> dict[str, tuple[float, float]]:
+        """Return phase name -> (seconds taken, seconds after boot it finished)."""
+        with self._lock:
+            return dict(self._phases)
+
+    def report(self) -> None:
+        """Log every phase recorded so far, in the order they finished."""
+        phases = sorted(self.phases().items(), key=lambda item: item[1][1])
+        logger.info(
+            "Startup phases: %s",
+            ", ".join(
+                f"{name} {seconds * 1000:.0f}ms (at {finished * 1000:.0f}ms)"
+                for name, (seconds, finished) in phases
+            ),
+        )
+
+    def _record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._phases[name] = (seconds, time.perf_counter() - self._boot)
+
+
+STARTUP = StartupTimer()
+
+REGISTRY.gauge(
+    "allergen_startup_phase_seconds",
+    "Duration of each startup phase of this process.",
+    lambda: {(name,): seconds for name, (seconds, _) in STARTUP.phases().items()},
+    ["phase"],
+)
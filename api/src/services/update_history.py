@@ -0,0 +1,62 @@
+"""Recent allergen state diffs, for clients catching up after a reconnect."""
+
+from collections import deque
+
+
+class UpdateHistory:
+    """
+    The last `maxlen` published diffs, each from one state version to the next.
+
+    A client that reconnects with the version it last saw can be sent every
+    change since, merged into one diff, as long as the history still reaches
+    back to that version.
+    """
+
+    def __init__(self, maxlen: int):
+        self._diffs: deque[tuple[int, int, list[dict], list[str] | None]] = deque(
+            maxlen=maxlen
+        )
+
+    def record(
+        self,
+        base_version: int,
+        version: int,
+        changes: list[dict],
+        order: list[str] | None,
+    ) -> None:
+        """
+        Record a published diff.
+
+        Args:
+            base_version: State version the diff applies to
+            version: State version after the diff
+            changes: Changed allergen fields, one dict per allergen
+            order: New allergen order, or None if it did not change
+        """
+        self._diffs.append((base_version, version, changes, order))
+
+    def merged_since(
+        self, since: int, version: int
+    ) -> tuple[list[dict], list[str] | None] | None:
+        """
+        Merge every change from `since` up to the current `version`.
+
+        Returns:
+            Tuple of (changes, order), or None if the history no longer
+            covers `since`
+        """
+        diffs = self._diffs
+        if not diffs or not diffs[0][0] <= since < version:
+            return None
+
+        merged: dict[str, dict] = {}
+        order = None
+        for _, diff_version, changes, new_order in diffs:
+            if diff_version <= since:
+                continue
+            for change in changes:
+                # Later changes may omit the food list, so merge fields
+                merged.setdefault(change["name"], {}).update(change)
+            if new_order is not None:
+                order = new_order
+        return list(merged.values()), order
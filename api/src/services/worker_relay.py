@@ -0,0 +1,97 @@
+"""Relays refresh requests from follower workers to the leader through files."""
+
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from cache.file_cache import CACHE_FILE
+
+# Follower workers ask the leader to refresh through these files
+REFRESH_REQUEST_FILE = CACHE_FILE.parent / "refresh.request"
+REFRESH_DONE_FILE = CACHE_FILE.parent / "refresh.done"
+
+
+class RefreshRelay:
+    """
+    Passes refresh requests between worker processes on one host.
+
+    A follower writes a request token and polls until the leader writes a
+    done file carrying that token (or a newer one) and the outcome of the
+    refresh it ran, so followers asking at once can share one refresh.
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        poll_interval: float,
+        request_file: Path = REFRESH_REQUEST_FILE,
+        done_file: Path = REFRESH_DONE_FILE,
+    ):
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._request_file = request_file
+        self._done_file = done_file
+
+    def request(self) -> None:
+        """
+        Ask the leader worker to refresh and wait until it reports back.
+
+        Raises:
+            RuntimeError: If the leader's refresh failed or did not finish
+                within the timeout
+        """
+        token = time.time_ns()
+        _write_json_atomic(self._request_file, {"token": token})
+
+        deadline = time.monotonic() + self._timeout
+        while time.monotonic() < deadline:
+            done = _read_json(self._done_file)
+            if done is not None and done.get("token", 0) >= token:
+                if done.get("status") == "failed":
+                    raise RuntimeError(done.get("error") or "Leader refresh failed")
+                return
+            time.sleep(self._poll_interval)
+        raise RuntimeError("Timed out waiting for the leader worker to refresh")
+
+    def serve(self, refresh: Callable[[], tuple[str, str | None]]) -> None:
+        """
+        Run the pending request, if any, and report its outcome to followers.
+
+        Args:
+            refresh: Runs a refresh and returns its (status, error), status
+                being "succeeded" or "failed"
+        """
+        request = _read_json(self._request_file)
+        if request is None:
+            return
+
+        status, error = refresh()
+        _write_json_atomic(
+            self._done_file,
+            {"token": request["token"], "status": status, "error": error},
+        )
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    """Write a small JSON file by renaming a temporary file into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
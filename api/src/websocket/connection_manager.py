@@ -3,23 +3,55 @@
 import asyncio
 import json
 import logging
+import os
 import threading
 from typing import Any
 
-from fastapi import WebSocket
+from fastapi import WebSocket, WebSocketDisconnect
+
+from services.metrics import REGISTRY
 
 logger = logging.getLogger(__name__)
 
+# Close code sent to clients evicted for falling behind (RFC 6455 "try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class _Client:
+    """A connected WebSocket with its bounded outbound queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task | None = None
+
 
 class ConnectionManager:
-    """Singleton class managing WebSocket connections."""
+    """
+    Singleton class managing WebSocket connections.
+
+    Each client gets a bounded outbound queue drained by its own writer task,
+    so a broadcast serializes the message once and enqueues it for every
+    client without awaiting network I/O. Clients whose queue overflows, or
+    whose send stalls past the send timeout, are evicted.
+    """
 
     _instance = None
     _lock = threading.Lock()
 
     def __init__(self):
-        self._connections: set[WebSocket] = set()
+        self._clients: dict[WebSocket, _Client] = {}
         self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue_size = int(os.getenv("WS_SEND_QUEUE_SIZE", "16"))
+        self._send_timeout = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+        self._messages_sent = 0
+        self._dropped_clients = 0
+
+        REGISTRY.gauge(
+            "websocket_connections",
+            "Live WebSocket connections.",
+            lambda: len(self._clients),
+        )
 
     @classmethod
     def get_instance(cls) -> "ConnectionManager":
@@ -37,37 +69,35 @@ class ConnectionManager:
     async def connect(self, websocket: WebSocket) -> None:
         """Accept and register a new WebSocket connection."""
         await websocket.accept()
-        self._connections.add(websocket)
+        client = _Client(websocket, self._queue_size)
+        client.writer = asyncio.create_task(self._write_loop(client))
+        self._clients[websocket] = client
         logger.info(
-            "WebSocket client connected. Total connections: %d", len(self._connections)
+            "WebSocket client connected. Total connections: %d", len(self._clients)
         )
 
     def disconnect(self, websocket: WebSocket) -> None:
-        """Remove a WebSocket connection."""
-        self._connections.discard(websocket)
+        """Remove a WebSocket connection and stop its writer task."""
+        client = self._clients.pop(websocket, None)
+        if client is None:
+            return
+
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
         logger.info(
             "WebSocket client disconnected. Total connections: %d",
-            len(self._connections),
+            len(self._clients),
         )
 
-    async def broadcast(self, data: dict[str, Any]) -> None:
-        """Send data to all connected clients."""
-        if not self._connections:
-            return
-
-        message = json.dumps(data)
-        disconnected = set()
+    async def send(self, websocket: WebSocket, data: dict[str, Any]) -> None:
+        """Queue data for a single client, behind anything already queued."""
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._enqueue(client, json.dumps(data))
 
-        for connection in self._connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.warning("Failed to send to WebSocket client: %s", e)
-                disconnected.add(connection)
-
-        # Clean up disconnected clients
-        for connection in disconnected:
-            self._connections.discard(connection)
+    async def broadcast(self, data: dict[str, Any]) -> None:
+        """Queue data for all connected clients."""
+        self._enqueue_all(json.dumps(data))
 
     def broadcast_sync(self, data: dict[str, Any]) -> None:
         """Synchronous wrapper for broadcast, used from Firebase callback thread."""
@@ -75,12 +105,74 @@ class ConnectionManager:
             logger.warning("Event loop not set, cannot broadcast")
             return
 
-        if not self._connections:
+        if not self._clients:
             return
 
         try:
-            # Schedule the broadcast coroutine in the main event loop
-            asyncio.run_coroutine_threadsafe(self.broadcast(data), self._loop)
-            logger.info("Scheduled broadcast to %d clients", len(self._connections))
-        except Exception as e:
+            # Serialize on the calling thread; the loop only has to enqueue
+            message = json.dumps(data)
+            self._loop.call_soon_threadsafe(self._enqueue_all, message)
+            logger.info("Scheduled broadcast to %d clients", len(self._clients))
+        except (TypeError, ValueError, RuntimeError) as e:
+            # Unserializable data, or the loop has already shut down
             logger.error("Failed to schedule broadcast: %s", e)
+
+    def stats(self) -> dict[str, int]:
+        """Return connection, queue depth and eviction counters for monitoring."""
+        depths = [client.queue.qsize() for client in self._clients.values()]
+        return {
+            "connections": len(self._clients),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "messages_sent": self._messages_sent,
+            "dropped_clients": self._dropped_clients,
+        }
+
+    def _enqueue_all(self, message: str) -> None:
+        for client in list(self._clients.values()):
+            self._enqueue(client, message)
+
+    def _enqueue(self, client: _Client, message: str) -> None:
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._evict(client, "send queue full")
+
+    async def _write_loop(self, client: _Client) -> None:
+        while True:
+            message = await client.queue.get()
+            try:
+                await asyncio.wait_for(
+                    client.websocket.send_text(message), self._send_timeout
+                )
+                self._messages_sent += 1
+            except asyncio.TimeoutError:
+                self._evict(client, "send timed out")
+                return
+            except (WebSocketDisconnect, RuntimeError, OSError) as e:
+                logger.warning("Failed to send to WebSocket client: %s", e)
+                self.disconnect(client.websocket)
+                return
+            except Exception:
+                # Still drop the client so it is not left without a writer
+                logger.exception("Unexpected error sending to WebSocket client")
+                self.disconnect(client.websocket)
+                return
+
+    def _evict(self, client: _Client, reason: str) -> None:
+        """Drop a slow client and close its socket in the background."""
+        if self._clients.get(client.websocket) is not client:
+            return
+
+        self._dropped_clients += 1
+        logger.warning("Evicting slow WebSocket client: %s", reason)
+        self.disconnect(client.websocket)
+        asyncio.get_running_loop().create_task(self._close(client.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except (WebSocketDisconnect, RuntimeError, OSError) as e:
+            # The client may already be gone, or the socket already closed
+            logger.debug("Failed to close evicted WebSocket client: %s", e)
@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+# Modules read CACHE_DIR on import; keep test runs out of api/cache
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="allergen-tests-"))
+
+from datetime import datetime, timezone
+
+import pytest
+
+from services.allergen_service import local_today
+from services.realtime_listener import AllergenCache
+
+ALLERGENS = [
+    {
+        "name": "egg",
+        "days_since_exposure": 1,
+        "last_exposure_date": "2026-01-01",
+        "foods": ["egg"],
+    }
+]
+
+
+@pytest.fixture
+def cache() -> AllergenCache:
+    cache = AllergenCache()
+    cache._allergens = list(ALLERGENS)
+    cache._last_updated = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cache._view_date = local_today()
+    return cache
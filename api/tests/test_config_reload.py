@@ -0,0 +1,73 @@
+import json
+import time
+
+import pytest
+
+from cache.file_cache import clear_cache
+from services import realtime_listener
+from services.allergen_service import (
+    ALLERGEN_FOOD_MAP,
+    set_allergen_food_map,
+    update_allergen_exposure,
+)
+from services.config_watcher import FileWatcher
+
+DAY = 86400
+
+
+def solid(start: float, food: str) -> dict:
+    return {"mode": "solids", "start": start, "foods": {"f0": {"created_name": food}}}
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "allergens.json"
+    path.write_text(json.dumps(ALLERGEN_FOOD_MAP))
+    monkeypatch.setattr(realtime_listener, "ALLERGEN_CONFIG_FILE", path)
+    yield path
+    set_allergen_food_map(ALLERGEN_FOOD_MAP)
+    clear_cache()
+
+
+def wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def history_totals(cache) -> dict[str, int]:
+    history = cache.get_exposure_history(30)
+    return {a["name"]: a["total_exposures"] for a in history["allergens"]}
+
+
+def test_rewritten_config_rebuilds_matches_and_history(cache, config_file):
+    now = time.time()
+    cache._store.apply_documents(
+        [("a", solid(now - 2 * DAY, "tahini")), ("b", solid(now - DAY, "oat milk"))]
+    )
+    cache._allergens = update_allergen_exposure([], cache._store, set())
+    cache._store_applied = True
+    cache._reload_allergen_config()
+    assert cache.get_food("oat milk")["allergens"] == []
+    assert history_totals(cache)["sesame"] == 1
+
+    watcher = FileWatcher(config_file, cache._reload_allergen_config, interval=0.02)
+    watcher.start()
+    try:
+        food_map = dict(ALLERGEN_FOOD_MAP)
+        food_map["sesame"] = [f for f in food_map["sesame"] if f != "tahini"]
+        food_map["oat"] = ["oat milk"]
+        config_file.write_text(json.dumps(food_map))
+
+        wait_for(lambda: cache.get_food("oat milk")["allergens"] == ["oat"])
+    finally:
+        watcher.stop()
+
+    assert cache.get_food("tahini")["allergens"] == []
+    totals = history_totals(cache)
+    assert totals["sesame"] == 0
+    assert totals["oat"] == 1
+    allergens = {a["name"]: a for a in cache.get_allergens()[0]}
+    assert allergens["oat"]["days_since_exposure"] == 1
+    assert allergens["sesame"]["last_exposure_date"] is None
@@ -0,0 +1,32 @@
+from datetime import date
+
+from services.allergen_service import local_today
+
+
+def test_reads_do_not_roll_the_day_over(cache, monkeypatch):
+    monkeypatch.setattr(cache, "get_upstream_status", lambda: ("connected", None))
+    cache._view_date = date(2025, 12, 31)
+    version = cache._version
+
+    cache.get_allergens()
+    cache.get_state()
+    cache.get_update_since(version - 1)
+    cache.get_encoded_allergens()
+    assert (cache._version, cache._view_date) == (version, date(2025, 12, 31))
+
+
+def test_midnight_rollover_republishes_day_counts(cache):
+    cache._view_date = date(2025, 12, 31)
+    version = cache._version
+
+    cache._roll_over_day()
+    assert cache._version == version + 1
+    assert cache._view_date == local_today()
+    egg = cache._allergens[0]
+    assert egg["days_since_exposure"] == (local_today() - date(2026, 1, 1)).days
+
+
+def test_rollover_is_a_no_op_on_the_same_day(cache):
+    version = cache._version
+    cache._roll_over_day()
+    assert cache._version == version
@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+
+
+def encode(cache, monkeypatch, status, stale_since=None):
+    monkeypatch.setattr(cache, "get_upstream_status", lambda: (status, stale_since))
+    return cache.get_encoded_allergens()
+
+
+def test_leader_and_follower_bodies_get_different_etags(cache, monkeypatch):
+    leader = encode(cache, monkeypatch, "connected")
+    follower = encode(cache, monkeypatch, "following")
+    assert leader.body != follower.body
+    assert leader.etag != follower.etag
+
+
+def test_same_state_reuses_the_encoded_body(cache, monkeypatch):
+    first = encode(cache, monkeypatch, "connected")
+    assert encode(cache, monkeypatch, "connected") is first
+
+
+def test_stale_since_is_part_of_the_etag(cache, monkeypatch):
+    since = datetime(2026, 1, 1, 12, 0, 0, 250_000, tzinfo=timezone.utc)
+    a = encode(cache, monkeypatch, "reconnecting", since)
+    b = encode(cache, monkeypatch, "reconnecting", since.replace(microsecond=750_000))
+    assert a.etag != b.etag
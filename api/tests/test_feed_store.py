@@ -0,0 +1,175 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from routes.allergens import decode_feed_cursor, encode_feed_cursor
+from services.allergen_service import (
+    ALLERGEN_FOOD_MAP,
+    allergens_for_foods,
+    get_food_matcher,
+    update_allergen_exposure,
+)
+from services.exposure_history import ExposureHistory
+from services.feed_store import FeedStore
+
+
+def solid(start: float, *foods: str) -> dict:
+    return {
+        "mode": "solids",
+        "start": start,
+        "foods": {f"f{i}": {"created_name": food} for i, food in enumerate(foods)},
+    }
+
+
+def page_through(store: FeedStore, limit: int, **filters) -> list[str]:
+    """Collect entry ids page by page, following cursors like a client would."""
+    seen, cursor = [], None
+    while True:
+        page = store.query(limit=limit + 1, cursor=cursor, **filters)
+        seen.extend(entry_id for entry_id, _ in page[:limit])
+        if len(page) <= limit:
+            return seen
+        entry_id, entry = page[limit - 1]
+        cursor = decode_feed_cursor(encode_feed_cursor(entry["start"], entry_id))
+
+
+@pytest.fixture
+def store() -> FeedStore:
+    store = FeedStore()
+    # Several entries share a start time, including a multi document's
+    store.load(
+        [
+            ("a", solid(100, "egg")),
+            ("b", solid(200, "peanut butter")),
+            ("c", solid(200, "salmon")),
+            ("d", solid(200, "yogurt")),
+            ("m:1", solid(200, "tofu")),
+            ("m:2", solid(300.123456789, "banana")),
+            ("e", solid(300.123456789, "hummus")),
+            ("f", solid(400, "toast")),
+        ]
+    )
+    return store
+
+
+def test_query_is_newest_first(store):
+    ids = [entry_id for entry_id, _ in store.query()]
+    assert ids == ["f", "m:2", "e", "m:1", "d", "c", "b", "a"]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 100])
+def test_pages_cover_every_entry_once(store, limit):
+    assert page_through(store, limit) == [entry_id for entry_id, _ in store.query()]
+
+
+def test_pages_respect_date_filters(store):
+    assert page_through(store, 2, before=300.5, after=100) == [
+        "m:2",
+        "e",
+        "m:1",
+        "d",
+        "c",
+        "b",
+    ]
+
+
+def test_cursor_round_trips_fractional_start():
+    start = 1_700_000_000.473050117
+    assert decode_feed_cursor(encode_feed_cursor(start, "doc:1")) == (start, "doc:1")
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "not base64!", "WzEsMl0", "bnVsbA", "WyJ4IiwiYSJd"]
+)
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_feed_cursor(cursor)
+
+
+DAY = 86400
+NOW = time.time()
+
+
+def batch(*entries: tuple[float, str]) -> dict:
+    return {
+        "multi": True,
+        "data": {
+            f"e{i}": solid(start, food) for i, (start, food) in enumerate(entries)
+        },
+    }
+
+
+def build(documents: dict[str, dict]) -> tuple[FeedStore, list[dict]]:
+    """A store and allergen results rebuilt from scratch."""
+    store = FeedStore(ExposureHistory(ALLERGEN_FOOD_MAP, get_food_matcher(), "UTC"))
+    store.apply_documents(list(documents.items()))
+    return store, update_allergen_exposure([], store, set())
+
+
+def assert_matches_rebuild(store, allergens, documents):
+    rebuilt, expected = build(documents)
+    assert sorted(store.items()) == sorted(rebuilt.items())
+    assert store.query() == rebuilt.query()
+    assert {f: store.last_seen(f) for f in store.foods()} == {
+        f: rebuilt.last_seen(f) for f in rebuilt.foods()
+    }
+    assert allergens == expected
+    end = date.today()
+    start = end - timedelta(days=30)
+    assert store._history.summarize(start, end) == rebuilt._history.summarize(
+        start, end
+    )
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        # Added document
+        ("n", solid(NOW - DAY, "salmon")),
+        # Modified: same day, same allergen
+        ("a", solid(NOW - 5 * DAY + 60, "scrambled egg")),
+        # Modified: moved to another day and another allergen
+        ("a", solid(NOW - 20 * DAY, "yogurt")),
+        # Removed document, the only exposure to its allergen
+        ("p", None),
+        # Batch document losing one entry and moving another
+        ("m", batch((NOW - 2 * DAY, "toast"))),
+        ("m", None),
+    ],
+)
+def test_incremental_changes_match_a_full_rebuild(change):
+    documents = {
+        "a": solid(NOW - 5 * DAY, "egg"),
+        "p": solid(NOW - 3 * DAY, "peanut butter"),
+        "m": batch((NOW - 10 * DAY, "toast"), (NOW - 8 * DAY, "hummus")),
+    }
+    store, allergens = build(documents)
+
+    doc_id, data = change
+    if data is None:
+        touched = store.remove_document(doc_id)
+        del documents[doc_id]
+    else:
+        touched = store.apply_document(doc_id, data)
+        documents[doc_id] = data
+    allergens = update_allergen_exposure(allergens, store, allergens_for_foods(touched))
+
+    assert_matches_rebuild(store, allergens, documents)
+
+
+def test_bulk_apply_matches_a_full_rebuild():
+    documents = {f"d{i}": solid(NOW - i * 3600, "egg") for i in range(100)}
+    store, allergens = build(documents)
+
+    changes = [(f"d{i}", solid(NOW - i * 7200, "tofu")) for i in range(0, 100, 2)]
+    changes += [(f"d{i}", None) for i in range(1, 100, 4)]
+    touched = store.apply_documents(changes)
+    for doc_id, data in changes:
+        if data is None:
+            del documents[doc_id]
+        else:
+            documents[doc_id] = data
+    allergens = update_allergen_exposure(allergens, store, allergens_for_foods(touched))
+
+    assert_matches_rebuild(store, allergens, documents)
@@ -0,0 +1,87 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from cache.file_cache import (
+    CACHE_FILE,
+    SNAPSHOT_VERSION,
+    clear_cache,
+    is_cache_valid,
+    read_cache,
+    read_header,
+    write_cache,
+)
+
+ALLERGENS = [{"name": "egg", "days_since_exposure": 1, "foods": ["egg"]}]
+ENTRIES = [("a", {"mode": "solids", "start": 100.0, "foods": {}})]
+
+
+@pytest.fixture(autouse=True)
+def snapshot():
+    write_cache(ALLERGENS, datetime.now(timezone.utc), ENTRIES, version=3)
+    yield
+    clear_cache()
+
+
+def split_snapshot() -> tuple[dict, bytes]:
+    header, body = CACHE_FILE.read_bytes().split(b"\n", 1)
+    return json.loads(header), body
+
+
+def rewrite(header: dict, body: bytes) -> None:
+    CACHE_FILE.write_bytes(json.dumps(header).encode() + b"\n" + body)
+
+
+def test_round_trip():
+    data = read_cache()
+    assert data["allergens"] == ALLERGENS
+    assert data["entries"] == ENTRIES
+    assert data["version"] == 3
+
+
+def test_crc_mismatch_is_rejected():
+    header, body = split_snapshot()
+    corrupt = bytes([body[0] ^ 0xFF]) + body[1:]
+    rewrite(header, corrupt)
+
+    assert read_cache(ignore_ttl=True) is None
+
+
+def test_truncated_body_is_rejected():
+    header, body = split_snapshot()
+    rewrite(header, body[: len(body) // 2])
+
+    assert read_cache(ignore_ttl=True) is None
+
+
+def test_body_with_a_matching_crc_but_wrong_length_is_rejected():
+    header, body = split_snapshot()
+    header["length"] = len(body) + 1
+    rewrite(header, body)
+
+    assert read_cache(ignore_ttl=True) is None
+
+
+def test_other_format_versions_are_rejected():
+    header, body = split_snapshot()
+    header["version"] = SNAPSHOT_VERSION - 1
+    rewrite(header, body)
+
+    assert read_header() is None
+    assert not is_cache_valid()
+    assert read_cache(ignore_ttl=True) is None
+
+
+def test_old_json_cache_is_not_a_snapshot():
+    CACHE_FILE.write_text(json.dumps({"allergens": ALLERGENS}, indent=2))
+
+    assert read_header() is None
+    assert read_cache(ignore_ttl=True) is None
+
+
+def test_corrupt_snapshot_leaves_a_cold_start(cache):
+    header, body = split_snapshot()
+    rewrite(header, body[:-1])
+
+    assert not cache._load_from_file_cache()
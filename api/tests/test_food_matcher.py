@@ -0,0 +1,94 @@
+import pytest
+
+from services.allergen_service import ALLERGEN_FOOD_MAP, FOOD_ALLERGEN_INDEX
+from services.food_matcher import KeywordMatcher
+
+FOOD_MAP = {
+    "dairy": ["butter", "milk"],
+    "peanut": ["peanut", "peanut butter"],
+    "wheat": ["toast", "bread"],
+}
+
+
+def test_memo_keeps_only_recent_names():
+    match = KeywordMatcher(FOOD_MAP, memo_size=2)
+    for i in range(100):
+        match(f"unknown food {i}")
+    assert match("milk toast") == ("dairy", "wheat")
+    assert list(match._memo) == ["unknown food 99", "milk toast"]
+
+    # A hit counts as recent use
+    match("unknown food 99")
+    match("bread")
+    assert list(match._memo) == ["unknown food 99", "bread"]
+
+
+def substring_match(food_map: dict[str, list[str]], food: str) -> tuple[str, ...]:
+    """Reference matcher: find every keyword with str.find, then apply the rules."""
+    text = food.lower()
+    spans = []
+    for allergen, keywords in food_map.items():
+        for keyword in keywords:
+            keyword = keyword.lower()
+            start = text.find(keyword)
+            while start != -1:
+                end = start + len(keyword)
+                if on_word_boundaries(text, start, end):
+                    spans.append((start, end, allergen))
+                start = text.find(keyword, start + 1)
+
+    matched = {
+        allergen
+        for start, end, allergen in spans
+        if not any(
+            s <= start and end <= e and (s, e) != (start, end) for s, e, _ in spans
+        )
+    }
+    return tuple(a for a in food_map if a in matched)
+
+
+def on_word_boundaries(text: str, start: int, end: int) -> bool:
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    rest = text[end:]
+    return any(
+        rest.startswith(suffix) and not rest[len(suffix) : len(suffix) + 1].isalnum()
+        for suffix in ("", "s", "es")
+    )
+
+
+@pytest.mark.parametrize(
+    "food, allergens",
+    [
+        ("salmon and toast", ("fish", "wheat")),
+        ("scrambled eggs on toast", ("egg", "wheat")),
+        # Keywords inside a longer match do not count
+        ("peanut butter toast", ("peanut", "wheat")),
+        ("almond milk", ("tree nut",)),
+        # Nor do keywords inside a longer word
+        ("butternut squash", ()),
+        ("eggplant", ()),
+        ("SALMON Cakes", ("fish",)),
+        ("Peanut Butter", ("peanut",)),
+    ],
+)
+def test_keyword_matches(food, allergens):
+    assert KeywordMatcher(ALLERGEN_FOOD_MAP)(food) == allergens
+
+
+def test_config_foods_keep_their_exact_allergens():
+    match = KeywordMatcher(ALLERGEN_FOOD_MAP)
+    for food, allergens in FOOD_ALLERGEN_INDEX.items():
+        assert set(allergens) <= set(match(food)), food
+
+
+def test_parity_with_substring_matching_over_the_config():
+    match = KeywordMatcher(ALLERGEN_FOOD_MAP)
+    keywords = [food for foods in ALLERGEN_FOOD_MAP.values() for food in foods]
+    names = [f"{a} and {b}" for a in keywords for b in keywords]
+    names += [f"{a}{b}" for a in keywords for b in keywords[::7]]
+    for keyword in keywords:
+        names += [keyword, keyword.upper(), f"fresh {keyword}s", f"{keyword}es!"]
+
+    for name in names:
+        assert match(name) == substring_match(ALLERGEN_FOOD_MAP, name), name
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from devtools.feed_generator import generate_feed_documents
+from services.allergen_service import (
+    FOOD_ALLERGEN_INDEX,
+    LOCAL_TIMEZONE,
+    calculate_allergen_exposure,
+    parse_solid_food_data,
+)
+from services.huckleberry import expand_interval_document, extract_solid_food_entries
+
+
+def solid(start, foods) -> dict:
+    return {"mode": "solids", "start": start, "foods": foods}
+
+
+def named(*names) -> dict:
+    return {
+        f"f{i}": {"created_name": name, "amount": "some"}
+        for i, name in enumerate(names)
+    }
+
+
+def random_entries(count: int, seed: int) -> list[dict]:
+    """Entries with empty and missing food lists, unnamed foods and mixed case."""
+    rng = random.Random(seed)
+    vocabulary = [f.title() for f in FOOD_ALLERGEN_INDEX] + ["Banana", "pear"]
+    entries = []
+    for i in range(count):
+        start = 1_600_000_000 + i * 3_600 + rng.choice([0, rng.random()])
+        foods = named(*rng.sample(vocabulary, rng.choice([0, 1, 1, 2, 3])))
+        for food in foods.values():
+            if rng.random() < 0.05:
+                del food["created_name"]
+        entries.append(solid(start, foods))
+    entries.reverse()
+    return entries
+
+
+def assert_engines_agree(entries: list[dict]) -> None:
+    events = parse_solid_food_data(entries, engine="python")
+    df = parse_solid_food_data(entries, engine="pandas")
+
+    expected = df.dropna(subset=["food"]).reset_index(drop=True)
+    actual = events.to_dataframe(LOCAL_TIMEZONE)
+    assert list(actual.dtypes) == list(expected.dtypes)
+    assert actual.equals(expected), f"\n{actual.head()}\n{expected.head()}"
+    for match_mode in ("exact", "keyword"):
+        expected_allergens = calculate_allergen_exposure(df, match_mode)
+        assert calculate_allergen_exposure(events, match_mode) == expected_allergens
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_histories(seed):
+    assert_engines_agree(random_entries(500, seed))
+
+
+def test_fractional_timestamps_keep_sub_second_precision():
+    entries = [
+        solid(1_700_000_000.473050117, named("Egg")),
+        solid(1_700_000_000.999, named("peanut butter")),
+        solid(1_700_000_001, named("Salmon")),
+    ]
+    assert_engines_agree(entries)
+    times = parse_solid_food_data(entries).to_dataframe(LOCAL_TIMEZONE)["datetime"]
+    assert times[0].microsecond == 473050
+
+
+@pytest.mark.parametrize(
+    "malformed",
+    [
+        solid(1_650_000_000, {}),
+        solid(1_650_000_000, None),
+        solid(1_650_000_000, ["egg"]),
+        {"mode": "solids", "start": 1_650_000_000},
+        solid(1_650_000_000, {"f0": {"amount": "some"}}),
+        solid(1_650_000_000, {"f0": {"created_name": None}}),
+    ],
+    ids=["empty", "null", "list", "missing", "unnamed", "null name"],
+)
+def test_entries_without_usable_foods_are_skipped(malformed):
+    assert_engines_agree([solid(1_700_000_000, named("Egg")), malformed])
+
+
+@pytest.mark.parametrize(
+    "foods",
+    [{"f0": "egg"}, {"f0": {"created_name": 5}}],
+    ids=["food not a map", "name not a string"],
+)
+def test_python_engine_skips_foods_pandas_cannot_parse(foods):
+    events = parse_solid_food_data(
+        [solid(1_700_000_000, named("Egg")), solid(1, foods)]
+    )
+    assert list(events) == [(1_700_000_000, "egg")]
+
+
+def test_multi_batch_documents():
+    documents = generate_feed_documents(
+        2_000, seed=1, solids_fraction=0.5, multi_fraction=0.6, end=1_700_000_000
+    )
+    assert any(data.get("multi") for _, data in documents)
+    entries = extract_solid_food_entries(
+        entry
+        for doc_id, data in documents
+        for entry in expand_interval_document(doc_id, data)
+    )
+    assert any(entry["start"] % 1 for entry in entries)
+    assert_engines_agree(entries)
@@ -0,0 +1,51 @@
+import pytest
+
+from cache.interval_store import INTERVAL_STORE_FILE
+from devtools.fake_huckleberry import FAKE_CHILD_UID, FakeHuckleberryAPI
+from services.connection_supervisor import CircuitBreaker
+from services.interval_sync import IntervalSync
+
+
+@pytest.fixture
+def stored_api():
+    """A fake upstream whose intervals an earlier run already stored."""
+    api = FakeHuckleberryAPI(entries=300)
+    sync = IntervalSync(
+        api, FAKE_CHILD_UID, lambda documents: None, lambda: None, CircuitBreaker(), 0
+    )
+    sync.sync()
+    sync.close()
+    yield api
+    for suffix in ("", "-wal", "-shm"):
+        INTERVAL_STORE_FILE.with_name(INTERVAL_STORE_FILE.name + suffix).unlink(
+            missing_ok=True
+        )
+
+
+def test_stored_intervals_are_served_before_connecting(cache, stored_api):
+    assert cache.get_feed_entries() is None
+
+    cache._load_interval_store()
+    try:
+        entries, total = cache.get_feed_entries(limit=5)
+        assert len(entries) == 5
+        assert total > 5
+        assert cache.get_exposure_history(30) is not None
+    finally:
+        cache._leader_intervals.close()
+
+
+def test_connect_does_not_reapply_preloaded_intervals(cache, stored_api, monkeypatch):
+    cache._load_interval_store()
+    preloaded = cache._store.items()
+
+    applied = []
+    monkeypatch.setattr(cache, "_apply_documents", applied.append)
+    cache._api = stored_api
+    cache._connect()
+    try:
+        # Nothing changed upstream, so nothing is fetched or applied again
+        assert all(not documents for documents in applied)
+        assert cache._store.items() == preloaded
+    finally:
+        cache._intervals.close()
@@ -0,0 +1,77 @@
+import time
+
+from devtools.fake_huckleberry import FAKE_CHILD_UID, FakeHuckleberryAPI
+from services.connection_supervisor import CircuitBreaker
+from services.interval_sync import IntervalSync
+
+INTERVALS = f"feed/{FAKE_CHILD_UID}/intervals"
+
+
+def _interval_sync(api, tmp_path, applied):
+    return IntervalSync(
+        api,
+        FAKE_CHILD_UID,
+        applied.extend,
+        lambda: None,
+        CircuitBreaker(),
+        watch_lookback=7 * 86400,
+        path=tmp_path / "intervals.db",
+    )
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_sync_fetches_only_changed_batch_documents(tmp_path):
+    api = FakeHuckleberryAPI(entries=500)
+    applied = []
+    sync = _interval_sync(api, tmp_path, applied)
+    try:
+        sync.sync()
+        batches = {doc_id: data for doc_id, data in applied if data.get("multi")}
+        assert batches
+
+        applied.clear()
+        sync.sync()
+        assert applied == []
+
+        doc_id, data = next(iter(batches.items()))
+        api.firestore.set_document(INTERVALS, doc_id, {**data, "data": {}})
+        sync.sync()
+        assert applied == [(doc_id, {**data, "data": {}})]
+    finally:
+        sync.close()
+
+
+def test_watch_covers_only_recent_intervals(tmp_path):
+    api = FakeHuckleberryAPI(entries=500)
+    applied = []
+    sync = _interval_sync(api, tmp_path, applied)
+    try:
+        sync.sync()
+        batch_id, batch = next((i, d) for i, d in applied if d.get("multi"))
+        recent_id, recent = next(
+            (i, d)
+            for i, d in applied
+            if not d.get("multi") and d["start"] >= time.time() - 86400
+        )
+
+        applied.clear()
+        sync.watch()
+        assert sync.watches_active()
+
+        api.firestore.set_document(INTERVALS, batch_id, {**batch, "data": {}})
+        api.firestore.set_document(INTERVALS, recent_id, {**recent, "amount": 1})
+        _wait_for(lambda: applied)
+        assert applied == [(recent_id, {**recent, "amount": 1})]
+
+        # The batch change waits for the next sync
+        applied.clear()
+        sync.sync()
+        assert applied == [(batch_id, {**batch, "data": {}})]
+    finally:
+        sync.close()
@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from services.metrics import Counter, Histogram, _Metric
+
+
+def run_in_threads(fn, count: int) -> None:
+    for _ in range(count):
+        thread = threading.Thread(target=fn)
+        thread.start()
+        thread.join()
+
+
+def test_exited_threads_shards_are_folded_into_the_total():
+    counter = Counter("test_events", "Test events.")
+    run_in_threads(counter.inc, 50)
+    counter.inc(2)
+
+    assert counter.samples() == ["test_events 52"]
+    # Only the live main thread's shard is left
+    assert len(counter._unlabelled._shards._shards) == 1
+
+    run_in_threads(counter.inc, 10)
+    assert counter.samples() == ["test_events 62"]
+    assert len(counter._unlabelled._shards._shards) == 1
+
+
+def test_histogram_keeps_counts_and_sum_of_exited_threads():
+    histogram = Histogram("test_seconds", "Test durations.", buckets=(1.0,))
+    run_in_threads(lambda: histogram.observe(0.5), 20)
+    run_in_threads(lambda: histogram.observe(2.0), 5)
+
+    assert histogram.samples() == [
+        'test_seconds_bucket{le="1"} 20',
+        'test_seconds_bucket{le="+Inf"} 25',
+        "test_seconds_sum 20",
+        "test_seconds_count 25",
+    ]
+
+
+def test_metrics_must_define_their_children():
+    class Incomplete(_Metric):
+        def samples(self) -> list[str]:
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "Missing _new_child.")
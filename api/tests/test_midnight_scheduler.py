@@ -0,0 +1,40 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from services.midnight_scheduler import MidnightScheduler
+
+TZ = "America/New_York"
+
+
+def at(*args) -> datetime:
+    return datetime(*args, tzinfo=ZoneInfo(TZ))
+
+
+@pytest.fixture
+def scheduler():
+    return MidnightScheduler(lambda: None, TZ)
+
+
+def test_ordinary_day(scheduler):
+    assert scheduler.seconds_until_midnight(at(2026, 6, 1, 23, 0)) == 3600
+
+
+def test_spring_forward_day_is_23_hours(scheduler):
+    # 2026-03-08: clocks jump from 02:00 to 03:00
+    assert scheduler.seconds_until_midnight(at(2026, 3, 8, 0, 0)) == 23 * 3600
+    assert scheduler.seconds_until_midnight(at(2026, 3, 8, 1, 30)) == 21.5 * 3600
+
+
+def test_fall_back_day_is_25_hours(scheduler):
+    # 2026-11-01: clocks fall back from 02:00 to 01:00
+    assert scheduler.seconds_until_midnight(at(2026, 11, 1, 0, 0)) == 25 * 3600
+    assert scheduler.seconds_until_midnight(at(2026, 11, 1, 1, 30)) == 23.5 * 3600
+    # The second 01:30, after the clocks fell back
+    second = at(2026, 11, 1, 1, 30).replace(fold=1)
+    assert scheduler.seconds_until_midnight(second) == 22.5 * 3600
+
+
+def test_just_before_midnight(scheduler):
+    assert scheduler.seconds_until_midnight(at(2026, 6, 1, 23, 59, 59, 500_000)) == 0.5
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.allergens import get_allergen_history, get_feed_log
+from routes.foods import get_food, suggest_foods
+from routes.foods import router as foods_router
+from services.realtime_listener import AllergenCache
+
+
+def _loop_stall(cache, request) -> float:
+    """Run `request` while an update holds the lock; return how long the loop stalled."""
+
+    async def scenario():
+        cache._update_lock.acquire()
+        threading.Timer(0.2, cache._update_lock.release).start()
+        started = time.monotonic()
+        pending = asyncio.ensure_future(request())
+        await asyncio.sleep(0.01)
+        stalled = time.monotonic() - started
+        await pending
+        return stalled
+
+    return asyncio.run(scenario())
+
+
+def test_feed_log_waits_for_updates_off_the_event_loop(cache, monkeypatch):
+    monkeypatch.setattr(AllergenCache, "_instance", cache)
+    cache._store_applied = True
+
+    stalled = _loop_stall(
+        cache,
+        lambda: get_feed_log(
+            before=None, after=None, limit=10, food=None, allergen=None, cursor=None
+        ),
+    )
+    assert stalled < 0.2
+
+
+def test_history_waits_for_updates_off_the_event_loop(cache, monkeypatch):
+    monkeypatch.setattr(AllergenCache, "_instance", cache)
+    cache._store_applied = True
+
+    stalled = _loop_stall(cache, lambda: get_allergen_history(days=30, allergen=None))
+    assert stalled < 0.2
+
+
+def test_food_lookups_wait_for_updates_off_the_event_loop(cache, monkeypatch):
+    monkeypatch.setattr(AllergenCache, "_instance", cache)
+    cache._store_applied = True
+
+    assert _loop_stall(cache, lambda: get_food("egg")) < 0.2
+    assert _loop_stall(cache, lambda: suggest_foods(prefix="e", limit=10)) < 0.2
+
+
+def test_food_names_are_length_limited():
+    app = FastAPI()
+    app.include_router(foods_router, prefix="/api")
+    response = TestClient(app).get("/api/foods/" + "x" * 101)
+    assert response.status_code == 422
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from services.metrics import REGISTRY
+from services.refresh_scheduler import RefreshScheduler
+
+
+class BlockingRefresh:
+    """Refresh function that holds each run until released, tracking overlap."""
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.started.set()
+        self.release.wait(5)
+        with self._lock:
+            self.active -= 1
+
+
+@pytest.fixture
+def refresh():
+    refresh = BlockingRefresh()
+    yield refresh
+    refresh.release.set()
+
+
+@pytest.fixture
+def scheduler(refresh):
+    scheduler = RefreshScheduler(refresh, window=0.1)
+    scheduler.start()
+    yield scheduler
+    refresh.release.set()
+    scheduler.stop(timeout=5)
+
+
+def test_triggers_within_the_window_coalesce(scheduler, refresh):
+    refresh.release.set()
+    for _ in range(20):
+        scheduler.trigger()
+
+    assert scheduler.wait(1, timeout=5)
+    time.sleep(0.2)
+    assert refresh.calls == 1
+    assert scheduler.stats()["triggers"] == 20
+    assert scheduler.stats()["fetches"] == 1
+
+
+def test_triggers_during_a_run_schedule_one_follow_up(scheduler, refresh):
+    scheduler.trigger()
+    assert refresh.started.wait(5)
+    for _ in range(10):
+        scheduler.trigger()
+    assert scheduler.stats()["pending"] == 1
+
+    refresh.release.set()
+    assert scheduler.wait(2, timeout=5)
+    time.sleep(0.2)
+    assert refresh.calls == 2
+    assert refresh.max_active == 1
+
+
+def test_requests_join_the_run_in_flight(scheduler, refresh):
+    first = scheduler.submit()
+    assert refresh.started.wait(5)
+    joined = [scheduler.submit() for _ in range(5)]
+    assert joined == [first] * 5
+    assert scheduler.run_status(first) == ("running", None)
+
+    refresh.release.set()
+    assert scheduler.wait(first, timeout=5)
+    assert scheduler.run_status(first) == ("succeeded", None)
+    assert refresh.calls == 1
+    assert scheduler.stats()["joined"] == 5
+
+
+def test_failed_runs_report_their_error():
+    def fail():
+        raise RuntimeError("upstream down")
+
+    scheduler = RefreshScheduler(fail, window=0)
+    scheduler.start()
+    try:
+        assert scheduler.request(timeout=5)
+        assert scheduler.run_status(1) == ("failed", "upstream down")
+    finally:
+        scheduler.stop(timeout=5)
+
+
+def test_stats_are_exported(cache):
+    cache._scheduler.trigger()
+    assert 'allergen_refresh_scheduler{stat="triggers"} 1' in REGISTRY.render()
@@ -0,0 +1,28 @@
+from services.update_history import UpdateHistory
+
+
+def test_merges_changes_after_the_client_version():
+    history = UpdateHistory(8)
+    history.record(1, 2, [{"name": "egg", "days_since_exposure": 0, "foods": []}], None)
+    history.record(2, 3, [{"name": "egg", "days_since_exposure": 1}], ["egg", "soy"])
+    history.record(3, 4, [{"name": "soy", "days_since_exposure": 5}], None)
+
+    changes, order = history.merged_since(2, 4)
+    assert changes == [
+        {"name": "egg", "days_since_exposure": 1},
+        {"name": "soy", "days_since_exposure": 5},
+    ]
+    assert order == ["egg", "soy"]
+
+    changes, order = history.merged_since(1, 4)
+    assert changes[0] == {"name": "egg", "days_since_exposure": 1, "foods": []}
+
+
+def test_versions_outside_the_history_need_a_snapshot():
+    history = UpdateHistory(2)
+    for version in range(1, 5):
+        history.record(version, version + 1, [], None)
+
+    assert history.merged_since(2, 5) is None
+    assert history.merged_since(3, 5) == ([], None)
+    assert history.merged_since(5, 5) is None
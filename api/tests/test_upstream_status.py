@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from cache.file_cache import (
+    clear_cache,
+    read_cache,
+    read_header,
+    read_upstream_status,
+    write_cache,
+    write_upstream_status,
+)
+
+SINCE = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+ALLERGENS = [
+    {
+        "name": "egg",
+        "days_since_exposure": 1,
+        "last_exposure_date": "2026-01-01",
+        "foods": ["egg"],
+    }
+]
+
+
+@pytest.fixture(autouse=True)
+def snapshot():
+    write_cache(ALLERGENS, SINCE, version=7, upstream=("connected", None))
+    yield
+    clear_cache()
+
+
+def test_status_rewrite_keeps_the_snapshot_body():
+    assert read_upstream_status(read_header()) == ("connected", None)
+
+    assert write_upstream_status("reconnecting", SINCE)
+    assert read_upstream_status(read_header()) == ("reconnecting", SINCE)
+    data = read_cache(ignore_ttl=True)
+    assert data["allergens"] == ALLERGENS
+    assert data["version"] == 7
+
+
+def test_followers_report_the_leaders_status(cache):
+    cache._election = SimpleNamespace(is_leader=False)
+    cache._listener_active = True
+    assert cache.get_upstream_status() == ("following", None)
+
+    write_upstream_status("circuit_open", SINCE)
+    cache._follow_leader()
+    assert cache.get_upstream_status() == ("circuit_open", SINCE)
+
+
+def test_leader_shares_status_changes(cache):
+    cache._election = SimpleNamespace(is_leader=True)
+    cache._supervisor._set_status("reconnecting")
+
+    status, stale_since = read_upstream_status(read_header())
+    assert status == "reconnecting"
+    assert stale_since == cache._supervisor.since
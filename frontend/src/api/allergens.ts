@@ -1,4 +1,10 @@
-import type { AllergenResponse, RefreshResponse, FeedLogResponse } from '../types/allergen';
+import type {
+  AllergenResponse,
+  RefreshResponse,
+  FeedLogResponse,
+  FoodStats,
+  FoodSuggestionsResponse,
+} from '../types/allergen';
 
 const API_BASE = '/api';
 
@@ -20,10 +26,31 @@ export async function refreshAllergens(): Promise<RefreshResponse> {
   return response.json();
 }
 
-export async function fetchFeedLog(): Promise<FeedLogResponse> {
-  const response = await fetch(`${API_BASE}/feeds`);
+export async function fetchFeedLog(cursor?: string): Promise<FeedLogResponse> {
+  const params = cursor ? `?${new URLSearchParams({ cursor })}` : '';
+  const response = await fetch(`${API_BASE}/feeds${params}`);
   if (!response.ok) {
     throw new Error(`Failed to fetch feed log: ${response.statusText}`);
   }
   return response.json();
 }
+
+export async function fetchFood(name: string): Promise<FoodStats> {
+  const response = await fetch(`${API_BASE}/foods/${encodeURIComponent(name)}`);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch food: ${response.statusText}`);
+  }
+  return response.json();
+}
+
+export async function fetchFoodSuggestions(
+  prefix: string,
+  limit = 10
+): Promise<FoodSuggestionsResponse> {
+  const params = new URLSearchParams({ prefix, limit: String(limit) });
+  const response = await fetch(`${API_BASE}/foods?${params}`);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch food suggestions: ${response.statusText}`);
+  }
+  return response.json();
+}
@@ -10,7 +10,9 @@ interface FeedLogProps {
 
 export function FeedLog({ isOpen, onClose }: FeedLogProps) {
   const [entries, setEntries] = useState<FeedEntry[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(false);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
@@ -25,6 +27,7 @@ export function FeedLog({ isOpen, onClose }: FeedLogProps) {
     try {
       const data = await fetchFeedLog();
       setEntries(data.entries);
+      setNextCursor(data.next_cursor);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to load feed log');
     } finally {
@@ -32,6 +35,20 @@ export function FeedLog({ isOpen, onClose }: FeedLogProps) {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const data = await fetchFeedLog(nextCursor);
+      setEntries((current) => [...current, ...data.entries]);
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Failed to load feed log');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   if (!isOpen) return null;
 
   const formatDate = (timestamp: string) => {
@@ -95,6 +112,15 @@ export function FeedLog({ isOpen, onClose }: FeedLogProps) {
                   </div>
                 </div>
               ))}
+              {nextCursor && (
+                <button
+                  onClick={loadMore}
+                  disabled={isLoadingMore}
+                  className="w-full text-blue-600 hover:text-blue-800 disabled:text-gray-400 font-medium py-2"
+                >
+                  {isLoadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              )}
             </div>
           )}
         </div>
@@ -1,12 +1,37 @@
 import { useEffect, useRef, useState, useCallback } from 'react';
-import type { AllergenResponse } from '../types/allergen';
+import type { Allergen, AllergenResponse } from '../types/allergen';
 
-interface WebSocketMessage {
-  type: 'update';
-  allergens: AllergenResponse['allergens'];
+// Food lists are only sent when the allergen config changed them
+type AllergenChange = Pick<Allergen, 'name' | 'days_since_exposure' | 'last_exposure_date'> &
+  Partial<Pick<Allergen, 'foods'>>;
+
+interface SnapshotMessage {
+  type: 'snapshot';
+  version: number;
+  allergens: Allergen[];
+  last_updated: string;
+}
+
+interface DiffMessage {
+  type: 'diff';
+  version: number;
+  base_version: number;
+  changes: AllergenChange[];
+  order?: string[];
   last_updated: string;
 }
 
+type WebSocketMessage = SnapshotMessage | DiffMessage;
+
+function applyDiff(allergens: Allergen[], message: DiffMessage): Allergen[] {
+  const byName = new Map(allergens.map((allergen) => [allergen.name, allergen]));
+  for (const change of message.changes) {
+    byName.set(change.name, { foods: [], ...byName.get(change.name), ...change });
+  }
+  const order = message.order ?? allergens.map((allergen) => allergen.name);
+  return order.flatMap((name) => byName.get(name) ?? []);
+}
+
 interface UseWebSocketOptions {
   onUpdate: (data: AllergenResponse) => void;
 }
@@ -16,6 +41,8 @@ export function useWebSocket({ onUpdate }: UseWebSocketOptions) {
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectAttemptsRef = useRef(0);
   const reconnectTimeoutRef = useRef<number | null>(null);
+  const versionRef = useRef<number | null>(null);
+  const allergensRef = useRef<Allergen[]>([]);
   const maxReconnectAttempts = 10;
 
   const connect = useCallback(() => {
@@ -26,7 +53,9 @@ export function useWebSocket({ onUpdate }: UseWebSocketOptions) {
 
     // Determine WebSocket URL based on current location
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.host}/ws/allergens`;
+    // Resume from the last version seen so the server only sends what was missed
+    const since = versionRef.current !== null ? `?since=${versionRef.current}` : '';
+    const wsUrl = `${protocol}//${window.location.host}/ws/allergens${since}`;
 
     const ws = new WebSocket(wsUrl);
     wsRef.current = ws;
@@ -39,12 +68,27 @@ export function useWebSocket({ onUpdate }: UseWebSocketOptions) {
     ws.onmessage = (event) => {
       try {
         const message: WebSocketMessage = JSON.parse(event.data);
-        if (message.type === 'update') {
-          onUpdate({
-            allergens: message.allergens,
-            last_updated: message.last_updated,
-          });
+        if (message.type === 'snapshot') {
+          allergensRef.current = message.allergens;
+        } else if (message.type === 'diff') {
+          if (versionRef.current === null || message.version <= versionRef.current) {
+            return;
+          }
+          if (message.base_version !== versionRef.current) {
+            // Missed an update; reconnect and resume from the last version seen
+            ws.close();
+            return;
+          }
+          allergensRef.current = applyDiff(allergensRef.current, message);
+        } else {
+          return;
         }
+        versionRef.current = message.version;
+        onUpdate({
+          allergens: allergensRef.current,
+          last_updated: message.last_updated,
+          version: message.version,
+        });
       } catch (e) {
         console.error('Failed to parse WebSocket message:', e);
       }
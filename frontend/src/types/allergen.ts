@@ -8,6 +8,10 @@ export interface Allergen {
 export interface AllergenResponse {
   allergens: Allergen[];
   last_updated: string;
+  version?: number;
+  stale?: boolean;
+  stale_since?: string | null;
+  upstream_status?: string | null;
 }
 
 export interface RefreshResponse {
@@ -24,4 +28,17 @@ export interface FeedEntry {
 export interface FeedLogResponse {
   entries: FeedEntry[];
   total_count: number;
+  next_cursor: string | null;
+}
+
+export interface FoodStats {
+  name: string;
+  count: number;
+  last_seen: string | null;
+  days_since: number | null;
+  allergens: string[];
+}
+
+export interface FoodSuggestionsResponse {
+  foods: FoodStats[];
 }